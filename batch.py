@@ -0,0 +1,176 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import collections                      ## Voor namedtuple
+import threading                        ## Werkerpool
+import urlparse                         ## Host van netlogin
+import socket                           ## IP-adres herkennen
+import Queue                            ## Taken verdelen over de pool
+import time                             ## Begrenzer en metingen
+import csv                              ## Accountbestand
+
+import communicator                     ## QuietCommunicator
+import errors                           ## Mislukte stappen
+import localip                          ## Interface -> IP-adres
+import session                          ## Statistieken van de pool
+import worker                           ## Eigenlijke loginmodule
+
+## Logt een hele reeks accounts in, bv. voor een lab vol machines. Elke lijn
+## van het accountbestand is
+##
+##      gebruikersnaam,wachtwoord[,bron]
+##
+## waarbij bron een lokaal IP-adres of een interface is waarvan de login
+## moet vertrekken. Lege lijnen en lijnen die met # beginnen, worden
+## overgeslagen. De logins lopen in een pool van threads; per host van het
+## portaal starten er nooit meer dan `tempo` logins per seconde.
+
+Account = collections.namedtuple("Account", \
+["gebruikersnaam", "wachtwoord", "bron"])
+Resultaat = collections.namedtuple("Resultaat", \
+["gebruikersnaam", "bron", "rccode", "download", "upload", "duur", "fout"])
+
+POOL = 4
+TEMPO = 5.0
+
+def leesAccounts(pad):
+    ## Een lijn zonder wachtwoord is een fout in het bestand, geen account
+    ## om over te slaan; we melden alle zulke lijnen in één keer.
+    accounts = []
+    fout = []
+    with open(pad) as bestand:
+        lezer = csv.reader(bestand)
+        for velden in lezer:
+            if not velden or not velden[0].strip() or \
+            velden[0].lstrip().startswith("#"):
+                continue
+            if len(velden) < 2:
+                fout.append(str(lezer.line_num))
+                continue
+            bron = velden[2].strip() if len(velden) > 2 else ""
+            accounts.append(Account(velden[0].strip(), velden[1], \
+            bron or None))
+    if fout:
+        raise errors.KotnetFout("%s: geen gebruikersnaam,wachtwoord op " \
+        "lijn %s" % (pad, ", ".join(fout)))
+    return accounts
+
+def bronadres(bron):
+    ## Een bron is een IP-adres of de naam van een interface.
+    if bron is None:
+        return None
+    try:
+        socket.inet_aton(bron)
+        if bron.count(".") == 3:
+            return bron
+    except socket.error:
+        pass
+    return localip.lokaalip(bron)
+
+class Begrenzer():
+    ## Laat hoogstens `tempo` starts per seconde door, gelijkmatig gespreid.
+    def __init__(self, tempo):
+        self.interval = 1.0 / tempo
+        self.volgende = 0
+        self.slot = threading.Lock()
+    
+    def wacht(self):
+        with self.slot:
+            nu = time.time()
+            moment = max(nu, self.volgende)
+            self.volgende = moment + self.interval
+        if moment > nu:
+            time.sleep(moment - nu)
+
+def login(account, begrenzers):
+    co = communicator.QuietCommunicator()
+    begin = time.time()
+    try:
+        bron = bronadres(account.bron)
+        kl = worker.Kotnetlogin(co, account.gebruikersnaam, \
+        account.wachtwoord, bron=bron)
+        begrenzers[urlparse.urlparse(worker.NETLOGIN).hostname].wacht()
+        
+        if not kl.snelinloggen():
+            kl.netlogin()
+            kl.kuleuven()
+            kl.gegevensinvoeren()
+            kl.gegevensopsturen()
+        kl.tegoeden()
+    except errors.StapMislukt as e:
+        return Resultaat(account.gebruikersnaam, account.bron, None, None, \
+        None, time.time() - begin, e.stap)
+    except Exception as e:
+        return Resultaat(account.gebruikersnaam, account.bron, None, None, \
+        None, time.time() - begin, str(e))
+    
+    return Resultaat(account.gebruikersnaam, account.bron, kl.rccode, \
+    kl.resultaat.downloadpercentage, kl.resultaat.uploadpercentage, \
+    time.time() - begin, None)
+
+def batch(accounts, pool=POOL, tempo=TEMPO):
+    ## Geeft de resultaten terug in de volgorde van de accounts.
+    taken = Queue.Queue()
+    for index, account in enumerate(accounts):
+        taken.put((index, account))
+    
+    begrenzers = collections.defaultdict(lambda: Begrenzer(tempo))
+    begrenzers[urlparse.urlparse(worker.NETLOGIN).hostname]
+    resultaten = [None] * len(accounts)
+    
+    def werker():
+        while True:
+            try:
+                index, account = taken.get_nowait()
+            except Queue.Empty:
+                return
+            resultaten[index] = login(account, begrenzers)
+    
+    threads = [threading.Thread(target=werker) \
+    for i in range(min(pool, len(accounts)))]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+    return resultaten
+
+def toon(resultaten):
+    def veld(waarde, suffix=""):
+        if waarde is None:
+            return "-"
+        return "%s%s" % (waarde, suffix)
+    
+    print "%-16s %-16s %5s %9s %7s %9s  %s" % ("gebruikersnaam", "bron", \
+    "rc", "download", "upload", "tijd (s)", "fout")
+    for r in resultaten:
+        print "%-16s %-16s %5s %9s %7s %9.2f  %s" % (r.gebruikersnaam, \
+        veld(r.bron), veld(r.rccode), veld(r.download, "%"), \
+        veld(r.upload, "%"), r.duur, veld(r.fout))
+    
+    statistieken = session.statistieken()
+    print "verbindingen: %d geopend, %d hergebruikt, handdruk %.1f ms, " \
+    "%d TLS-sessies hervat" % (statistieken["geopend"], \
+    statistieken["hergebruikt"], statistieken["handdruktijd"] * 1000, \
+    statistieken["tlshervat"])
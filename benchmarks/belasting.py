@@ -0,0 +1,229 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Belastingstest: N gesimuleerde kotnetcli-clients die tegelijk inloggen
+## op het nepportaal (nepportaal.py), als threads in één proces (zoals een
+## daemon of de dienst) of als aparte processen (zoals losse oproepen
+## vanuit cron of een batch). Per aantal clients tonen we de logins per
+## seconde, p50/p95/p99, de CPU-tijd per login aan clientzijde en aan de
+## kant van het portaal, en het geheugen per client.
+##
+## Met --volledig vergeet elke login het formulierschema, zodat elke
+## oproep de hele weg door mechanize en BeautifulSoup gaat. --profiel
+## toont waar de CPU-tijd van de clients naartoe gaat.
+##
+## asyncio bestaat niet in Python 2 en mechanize blokkeert toch; threads
+## en processen zijn de twee vormen die kotnetcli echt kent.
+##
+## Gebruik:
+##      $ ./benchmarks/belasting.py -c 1,4,16 -n 50
+##      $ ./benchmarks/belasting.py -c 8 --processen --volledig --profiel 15
+
+import multiprocessing                  ## Clients als processen
+import threading                        ## Clients als threads
+import argparse                         ## Parst argumenten
+import resource                         ## CPU-tijd en geheugen
+import tempfile                         ## Cachemap, profielen
+import cProfile                         ## --profiel
+import pstats                           ## --profiel
+import shutil                           ## Opruimen
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import eindtoeind                       ## Portaal starten, tellers
+
+def cpu(wie=resource.RUSAGE_SELF):
+    gebruik = resource.getrusage(wie)
+    return gebruik.ru_utime + gebruik.ru_stime
+
+def rss():
+    ## Huidig (niet maximaal) residentgeheugen in kB, via /proc.
+    try:
+        with open("/proc/self/statm") as bestand:
+            return int(bestand.read().split()[1]) * \
+            resource.getpagesize() // 1024
+    except (IOError, OSError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def portaalCpu(pid):
+    ## utime + stime van het portaalproces, in seconden (enkel Linux).
+    try:
+        with open("/proc/%d/stat" % pid) as bestand:
+            velden = bestand.read().rsplit(")", 1)[1].split()
+        return (int(velden[11]) + int(velden[12])) / \
+        float(os.sysconf("SC_CLK_TCK"))
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+
+def client(index, aantal, volledig, profielmap):
+    ## Eén client: `aantal` logins na elkaar. Geeft (tijden, fouten) terug.
+    import kotnetcli
+    import worker
+    gebruikersnaam = "s%07d" % index
+    profiel = cProfile.Profile() if profielmap else None
+    tijden = []
+    fouten = 0
+    for i in range(aantal):
+        if volledig:
+            worker.vergeetFormulierschema()
+        if profiel:
+            profiel.enable()
+        begin = time.time()
+        try:
+            kotnetcli.login(gebruikersnaam, eindtoeind.WACHTWOORD)
+            tijden.append(time.time() - begin)
+        except Exception:
+            fouten += 1
+        if profiel:
+            profiel.disable()
+    if profiel:
+        profiel.dump_stats(os.path.join(profielmap, "%d.prof" % index))
+    return tijden, fouten
+
+def procesclient(index, aantal, volledig, profielmap, wachtrij):
+    tijden, fouten = client(index, aantal, volledig, profielmap)
+    wachtrij.put((tijden, fouten, cpu(), \
+    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+def metThreads(clients, aantal, volledig, profielmap):
+    resultaten = [None] * clients
+    def draai(index):
+        resultaten[index] = client(index, aantal, volledig, profielmap)
+    
+    cpuVoor = cpu()
+    rssVoor = rss()
+    threads = [threading.Thread(target=draai, args=(i,)) for i in \
+    range(clients)]
+    begin = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duur = time.time() - begin
+    tijden = sum((r[0] for r in resultaten), [])
+    fouten = sum(r[1] for r in resultaten)
+    ## Geheugen per client: wat er bij kwam, gedeeld door het aantal.
+    return tijden, fouten, duur, cpu() - cpuVoor, \
+    max(0, rss() - rssVoor) / float(clients)
+
+def metProcessen(clients, aantal, volledig, profielmap):
+    wachtrij = multiprocessing.Queue()
+    processen = [multiprocessing.Process(target=procesclient, args=(i, \
+    aantal, volledig, profielmap, wachtrij)) for i in range(clients)]
+    begin = time.time()
+    for p in processen:
+        p.start()
+    resultaten = [wachtrij.get() for p in processen]
+    duur = time.time() - begin
+    for p in processen:
+        p.join()
+    tijden = sum((r[0] for r in resultaten), [])
+    fouten = sum(r[1] for r in resultaten)
+    ## Geheugen per client: het volledige proces, interpreter inbegrepen.
+    return tijden, fouten, duur, sum(r[2] for r in resultaten), \
+    sum(r[3] for r in resultaten) / float(clients)
+
+def toonProfiel(profielmap, regels):
+    bestanden = [os.path.join(profielmap, naam) for naam in \
+    sorted(os.listdir(profielmap))]
+    if not bestanden:
+        return
+    statistieken = pstats.Stats(*bestanden)
+    print
+    print "profiel over alle clients (eigen tijd):"
+    statistieken.strip_dirs().sort_stats("tottime").print_stats(regels)
+
+def main():
+    parser = argparse.ArgumentParser(description="Laat N clients \
+    tegelijk inloggen op een lokaal nepportaal")
+    parser.add_argument("-c", "--clients", default="1,2,4,8,16", \
+    help="Aantallen clients, gescheiden door komma's")
+    parser.add_argument("-n", "--herhalingen", type=int, default=50, \
+    help="Logins per client")
+    parser.add_argument("--processen", action="store_true", \
+    help="Elke client in een eigen proces in plaats van een thread")
+    parser.add_argument("--volledig", action="store_true", \
+    help="Elke login zonder bewaard formulierschema")
+    parser.add_argument("--latentie", type=float, default=0.0, \
+    metavar="SECONDEN", help="Wachttijd van het portaal per verzoek")
+    parser.add_argument("--spreiding", type=float, default=0.0, \
+    metavar="SECONDEN", help="Willekeurige extra wachttijd per verzoek")
+    parser.add_argument("--foutkans", type=float, default=0.0, \
+    help="Kans dat een verzoek mislukt")
+    parser.add_argument("--profiel", type=int, metavar="REGELS", \
+    help="Profileer de clients en toon de duurste functies")
+    argumenten = parser.parse_args()
+    aantallen = [int(aantal) for aantal in argumenten.clients.split(",")]
+    
+    cache = tempfile.mkdtemp()
+    profielmap = tempfile.mkdtemp() if argumenten.profiel else None
+    proces, url = eindtoeind.startPortaal(argumenten.latentie, \
+    argumenten.spreiding, argumenten.foutkans)
+    os.environ["KOTNETCLI_CACHE"] = cache
+    os.environ["KOTNETCLI_NETLOGIN"] = url
+    try:
+        ## Opwarmen: modules laden en het formulierschema bewaren, voor de
+        ## processen geforkt worden.
+        client(9999999, 1, False, None)
+        
+        print "%s, %d logins per client%s" % ("processen" if \
+        argumenten.processen else "threads", argumenten.herhalingen, \
+        ", zonder formulierschema" if argumenten.volledig else "")
+        print "%7s %9s %6s %8s %8s %8s %12s %12s %12s" % ("clients", \
+        "logins/s", "fouten", "p50 (ms)", "p95 (ms)", "p99 (ms)", \
+        "CPU/login", "portaal/login", "kB/client")
+        for clients in aantallen:
+            portaalVoor = portaalCpu(proces.pid)
+            tijden, fouten, duur, clientCpu, geheugen = \
+            (metProcessen if argumenten.processen else metThreads)( \
+            clients, argumenten.herhalingen, argumenten.volledig, \
+            profielmap)
+            portaalNa = portaalCpu(proces.pid)
+            
+            tijden.sort()
+            logins = max(1, len(tijden))
+            portaal = "-" if portaalVoor is None or portaalNa is None else \
+            "%.2f ms" % ((portaalNa - portaalVoor) / logins * 1000)
+            print "%7d %9.1f %6d %8s %8s %8s %12s %12s %12.0f" % (clients, \
+            len(tijden) / duur, fouten, \
+            eindtoeind.ms(eindtoeind.percentiel(tijden, 50)), \
+            eindtoeind.ms(eindtoeind.percentiel(tijden, 95)), \
+            eindtoeind.ms(eindtoeind.percentiel(tijden, 99)), \
+            "%.2f ms" % (clientCpu / logins * 1000), portaal, geheugen)
+        
+        if profielmap:
+            toonProfiel(profielmap, argumenten.profiel)
+    finally:
+        proces.terminate()
+        proces.wait()
+        shutil.rmtree(cache)
+        if profielmap:
+            shutil.rmtree(profielmap)
+
+if __name__ == "__main__":
+    main()
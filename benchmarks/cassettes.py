@@ -0,0 +1,184 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Speelt cassettes (cassette.py) af door de echte workers: offline,
+## zonder wachttijd, dus enkel mechanize, de parsers en de flow zelf. Per
+## cassette en per stroom die erin zit, tonen we p50/p95 en controleren we
+## het resultaat: een login met rc=100 moet tegoeden opleveren (zoniet zijn
+## de commentaarblokken 6 en 7 van netlogin vermoedelijk verschoven), een
+## logout een rc-code. Bij een mislukte controle is de exitcode 1, zodat
+## een cassette die geregeld van het echte portaal opgenomen wordt
+## (kotnetcli.py --record) een gewijzigde opmaak meldt voor de login zelf
+## stukgaat.
+##
+## Zonder cassettes nemen we er eerst één op van het nepportaal
+## (nepportaal.py): een volledige login en een logout.
+##
+## Gebruik:
+##      $ ./kotnetcli.py --plaintext --record login.cassette
+##      $ ./benchmarks/cassettes.py -n 500 login.cassette
+
+import argparse                         ## Parst argumenten
+import urlparse                         ## Velden van een opgenomen verzoek
+import tempfile                         ## Cachemap
+import shutil                           ## Opruimen
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import eindtoeind                       ## Nepportaal, percentielen
+
+def neemOp(pad):
+    ## Een cassette van een volledige login en een logout op het nepportaal.
+    proces, url = eindtoeind.startPortaal(0.0, 0.0, 0.0)
+    os.environ["KOTNETCLI_NETLOGIN"] = url
+    import cassette
+    import kotnetcli
+    import worker
+    try:
+        cassette.opnemer = cassette.Opnemer(pad)
+        worker.vergeetFormulierschema()
+        kotnetcli.login("s0123456", eindtoeind.WACHTWOORD)
+        kotnetcli.logout("s0123456", eindtoeind.WACHTWOORD, ip="127.0.0.1")
+        cassette.opnemer.sluit()
+    finally:
+        cassette.opnemer = None
+        proces.terminate()
+        proces.wait()
+
+def zoek(afspeler, methode, pad):
+    for uitwisseling in afspeler.uitwisselingen.get((methode, pad), []):
+        return uitwisseling
+    return None
+
+def schemaUit(uitwisseling):
+    ## Een formulierschema zoals worker.py het bewaart, uit een opgenomen
+    ## POST naar netlogin.pl: zo kan ook een cassette van een snelle login
+    ## afgespeeld worden.
+    import cassette
+    velden = [[naam, waarde] for naam, waarde in urlparse.parse_qsl( \
+    uitwisseling["verzoek"], keep_blank_values=True)]
+    wachtwoordveld = None
+    for naam, waarde in velden:
+        if cassette.WACHTWOORDVELDEN.match(naam):
+            wachtwoordveld = naam
+    return {"doel": uitwisseling["url"], "velden": velden, \
+    "gebruikersnaamveld": "uid", "wachtwoordveld": wachtwoordveld}
+
+def stromen(afspeler):
+    ## (naam, voorbereiding, oproep) voor elke stroom die de cassette dekt.
+    import kotnetcli
+    import worker
+    resultaat = []
+    if zoek(afspeler, "POST", "/cgi-bin/wayf.pl"):
+        resultaat.append(("login-volledig", worker.vergeetFormulierschema, \
+        lambda: kotnetcli.login("s0000000", "wachtwoord")))
+    opsturen = zoek(afspeler, "POST", "/cgi-bin/netlogin.pl")
+    if opsturen:
+        schema = schemaUit(opsturen)
+        resultaat.append(("login-snel", lambda: \
+        worker.bewaarFormulierschema(schema), \
+        lambda: kotnetcli.login("s0000000", "wachtwoord")))
+    if zoek(afspeler, "POST", "/cgi-bin/netlogout.pl"):
+        resultaat.append(("logout", lambda: None, \
+        lambda: kotnetcli.logout("s0000000", "wachtwoord", ip="192.0.2.1")))
+    return resultaat
+
+def controleer(naam, resultaat):
+    ## Geeft een foutmelding terug, of None als het resultaat klopt.
+    import extractor
+    if naam == "logout":
+        if resultaat.rccode not in (100, 207):
+            return "rc=%s" % resultaat.rccode
+        return None
+    if resultaat.rccode is None:
+        return "geen rc-code gevonden"
+    if resultaat.download is None or resultaat.upload is None:
+        return "rc=100 maar geen tegoeden (commentaarblokken %d en %d?)" % \
+        (extractor.DOWNLOADCOMMENTAAR, extractor.UPLOADCOMMENTAAR)
+    return None
+
+def speelAf(pad, herhalingen):
+    import cassette
+    import errors
+    cassette.speelAf(pad)
+    mislukt = False
+    try:
+        for naam, voorbereiding, oproep in stromen(cassette.afspeler):
+            tijden = []
+            fout = None
+            for i in range(herhalingen):
+                voorbereiding()
+                begin = time.time()
+                try:
+                    resultaat = oproep()
+                except errors.Geweigerd as geweigerd:
+                    ## Een opgenomen 202 of 206 is geen fout van de opmaak.
+                    resultaat = None
+                    if getattr(geweigerd, "rccode", None) is None:
+                        fout = str(geweigerd) or type(geweigerd).__name__
+                except Exception as e:
+                    resultaat = None
+                    fout = str(e) or type(e).__name__
+                tijden.append(time.time() - begin)
+                if fout is None and resultaat is not None:
+                    fout = controleer(naam, resultaat)
+                if fout is not None:
+                    break
+            tijden.sort()
+            mislukt = mislukt or fout is not None
+            print "%-30s %-15s %8s %8s  %s" % (os.path.basename(pad)[-30:], \
+            naam, eindtoeind.ms(eindtoeind.percentiel(tijden, 50)), \
+            eindtoeind.ms(eindtoeind.percentiel(tijden, 95)), fout or "ok")
+    finally:
+        cassette.afspeler = None
+    return not mislukt
+
+def main():
+    parser = argparse.ArgumentParser(description="Speel cassettes af en \
+    controleer wat de workers eruit halen")
+    parser.add_argument("cassettes", nargs="*", metavar="CASSETTE")
+    parser.add_argument("-n", "--herhalingen", type=int, default=200)
+    argumenten = parser.parse_args()
+    
+    cache = tempfile.mkdtemp()
+    os.environ["KOTNETCLI_CACHE"] = cache
+    try:
+        cassettes = argumenten.cassettes
+        if not cassettes:
+            cassettes = [os.path.join(cache, "nepportaal.cassette")]
+            neemOp(cassettes[0])
+        print "%-30s %-15s %8s %8s  %s" % ("cassette", "stroom", \
+        "p50 (ms)", "p95 (ms)", "controle")
+        goed = all([speelAf(pad, argumenten.herhalingen) for pad in \
+        cassettes])
+    finally:
+        shutil.rmtree(cache)
+    sys.exit(0 if goed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Meet het stabiele verbruik van --daemon: CPU-tijd per controle en het
+## geheugen van het proces, tegenover een cron-lus die voor elke controle
+## een nieuwe interpreter start. Een lokale HTTP-server speelt de probe-URL
+## en antwoordt altijd 200 (online), zodat elke controle één verzoek is.
+##
+## Gebruik:
+##      $ ./benchmarks/daemon.py -n 500
+
+import BaseHTTPServer                   ## Lokale stand-in voor de probe-URL
+import SocketServer                     ## Keep-alive vraagt een thread per
+                                        ## verbinding
+import subprocess                       ## De cron-lus
+import threading                        ## Server in de achtergrond
+import argparse                         ## Parst argumenten
+import resource                         ## CPU-tijd en geheugen
+import tempfile                         ## Cachemap voor de meting
+import shutil                           ## Opruimen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+class Probe(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", "13")
+        self.end_headers()
+        self.wfile.write("<html></html>")
+    def log_message(self, *args):
+        pass
+
+def cpu(wie):
+    gebruik = resource.getrusage(wie)
+    return gebruik.ru_utime + gebruik.ru_stime
+
+def resident():
+    ## Huidig (niet maximaal) residentgeheugen in MB, uit /proc.
+    with open("/proc/self/statm") as bestand:
+        pagina = int(bestand.read().split()[1])
+    return pagina * resource.getpagesize() / 1024.0 / 1024.0
+
+def daemonlus(url, herhalingen):
+    import communicator
+    import daemon
+    d = daemon.Daemon(communicator.QuietCommunicator(), "s0000000", \
+    "wachtwoord", controle="portaal", probeurl=url, stil=True)
+    d.stap()
+    voor = resident()
+    begin = cpu(resource.RUSAGE_SELF)
+    for i in range(herhalingen):
+        d.stap()
+    return (cpu(resource.RUSAGE_SELF) - begin) / herhalingen, voor, resident()
+
+def cronlus(url, herhalingen):
+    begin = cpu(resource.RUSAGE_CHILDREN)
+    code = "import sys; sys.path.insert(0, %r); import pinger; " \
+    "pinger.portaaldetectie(%r)" % (os.path.join(HIER, os.pardir), url)
+    for i in range(herhalingen):
+        subprocess.check_call([sys.executable, "-c", code])
+    return (cpu(resource.RUSAGE_CHILDREN) - begin) / herhalingen
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet het stabiele \
+    verbruik van --daemon tegenover een cron-lus")
+    parser.add_argument("-n", "--herhalingen", type=int, default=500)
+    argumenten = parser.parse_args()
+    
+    os.environ["KOTNETCLI_CACHE"] = tempfile.mkdtemp()
+    server = Server(("127.0.0.1", 0), Probe)
+    threading.Thread(target=server.serve_forever).start()
+    url = "http://127.0.0.1:%d/" % server.server_port
+    
+    try:
+        perControle, voor, na = daemonlus(url, argumenten.herhalingen)
+        cron = cronlus(url, max(1, argumenten.herhalingen // 10))
+        print "%-10s %14s %12s" % ("aanpak", "CPU/controle", "RSS (MB)")
+        print "%-10s %11.2f ms %5.1f -> %4.1f" % ("daemon", \
+        perControle * 1000, voor, na)
+        print "%-10s %11.2f ms %12s" % ("cron", cron * 1000, "-")
+    finally:
+        server.shutdown()
+        shutil.rmtree(os.environ["KOTNETCLI_CACHE"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Meet hoe snel een draaiende --serve een gecachete toestand teruggeeft,
+## over één blijvende verbinding en met een nieuwe verbinding per verzoek.
+## De server draait in dit proces met een vooraf ingevulde toestand; er
+## wordt geen netwerk aangesproken.
+##
+## Gebruik:
+##      $ ./benchmarks/dienst.py -n 5000
+
+import threading                        ## Server in de achtergrond
+import argparse                         ## Parst argumenten
+import tempfile                         ## Map voor de socket
+import shutil                           ## Opruimen
+import socket                           ## Client
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import dienst                           ## De server
+
+def percentielen(tijden):
+    tijden.sort()
+    return tijden[len(tijden) // 2], tijden[int(len(tijden) * 0.99)]
+
+def blijvend(pad, herhalingen):
+    verbinding = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    verbinding.connect(pad)
+    bestand = verbinding.makefile()
+    tijden = []
+    for i in range(herhalingen):
+        begin = time.time()
+        verbinding.sendall("status\n")
+        bestand.readline()
+        tijden.append(time.time() - begin)
+    verbinding.close()
+    return percentielen(tijden)
+
+def telkensNieuw(pad, herhalingen):
+    tijden = []
+    for i in range(herhalingen):
+        begin = time.time()
+        dienst.vraag("status", pad)
+        tijden.append(time.time() - begin)
+    return percentielen(tijden)
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet de latentie van \
+    gecachete antwoorden van --serve")
+    parser.add_argument("-n", "--herhalingen", type=int, default=5000)
+    argumenten = parser.parse_args()
+    
+    map = tempfile.mkdtemp()
+    pad = os.path.join(map, "dienst.sock")
+    d = dienst.Dienst("s0000000", "wachtwoord", ttl=3600)
+    d.bewaar(verbinding="online", rccode=100, download=80, upload=100)
+    server = dienst.maakServer(d, pad)
+    threading.Thread(target=server.serve_forever).start()
+    
+    try:
+        print "%-14s %10s %10s" % ("verbinding", "p50 (us)", "p99 (us)")
+        for naam, functie in [("blijvend", blijvend), \
+        ("telkens nieuw", telkensNieuw)]:
+            p50, p99 = functie(pad, argumenten.herhalingen)
+            print "%-14s %10.1f %10.1f" % (naam, p50 * 1e6, p99 * 1e6)
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(map)
+
+if __name__ == "__main__":
+    main()
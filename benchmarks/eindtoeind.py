@@ -0,0 +1,241 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Eind-tot-eindmetingen tegen het nepportaal (nepportaal.py), volledig
+## offline. Per scenario lopen `-n` oproepen van de bibliotheek (login(),
+## logout(), force_login()) verdeeld over `-c` threads; we tonen de
+## verdeling van de latentie, de doorvoer, het aantal mislukte oproepen en
+## hoeveel HTTP-verzoeken het portaal per oproep zag. Het portaal draait in
+## een eigen proces, zodat het niet om de GIL vecht met wat we meten.
+##
+## Scenario's:
+##      login           met het bewaarde formulierschema (één POST)
+##      login-volledig  zonder schema: netlogin, kuleuven, invoeren, opsturen
+##      logout          een bestaande sessie uitloggen
+##      force-login     twee sessies elders uitloggen en dan inloggen
+##
+## Met --json worden de resultaten bewaard; --vergelijk zet een vorige
+## run (bv. van een andere commit) ernaast.
+##
+## Gebruik:
+##      $ ./benchmarks/eindtoeind.py -n 200 --json voor.json
+##      $ git checkout andere-tak
+##      $ ./benchmarks/eindtoeind.py -n 200 --vergelijk voor.json
+
+import subprocess                       ## Het nepportaal
+import threading                        ## Gelijktijdige oproepen
+import argparse                         ## Parst argumenten
+import tempfile                         ## Cachemap
+import urllib2                          ## Sessies klaarzetten, tellers
+import urllib                           ## Diverse URL-manipulaties
+import shutil                           ## Opruimen
+import json                             ## Resultaten bewaren
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+SCENARIOS = ["login", "login-volledig", "logout", "force-login"]
+WACHTWOORD = "wachtwoord"
+ANDEREN = ["10.46.3.120", "10.46.8.5"]
+
+def startPortaal(latentie, spreiding, foutkans):
+    proces = subprocess.Popen([sys.executable, \
+    os.path.join(HIER, "nepportaal.py"), "--poort", "0", \
+    "--latentie", str(latentie), "--spreiding", str(spreiding), \
+    "--foutkans", str(foutkans)], stdout=subprocess.PIPE)
+    return proces, proces.stdout.readline().strip()
+
+def tellers(url):
+    return json.loads(urllib2.urlopen(url + "/nep/status").read())
+
+def sessie(url, gebruikersnaam, ip):
+    urllib2.urlopen(url + "/nep/sessie", urllib.urlencode({"uid": \
+    gebruikersnaam, "ip": ip})).read()
+
+def oproep(scenario, url, gebruikersnaam):
+    ## Zet klaar wat niet gemeten wordt en geeft de gemeten oproep terug.
+    import kotnetcli
+    import worker
+    if scenario == "login":
+        return lambda: kotnetcli.login(gebruikersnaam, WACHTWOORD)
+    if scenario == "login-volledig":
+        worker.vergeetFormulierschema()
+        return lambda: kotnetcli.login(gebruikersnaam, WACHTWOORD)
+    if scenario == "logout":
+        sessie(url, gebruikersnaam, "127.0.0.1")
+        return lambda: kotnetcli.logout(gebruikersnaam, WACHTWOORD, \
+        ip="127.0.0.1")
+    if scenario == "force-login":
+        kotnetcli.logout(gebruikersnaam, WACHTWOORD, ip="127.0.0.1")
+        for ip in ANDEREN:
+            sessie(url, gebruikersnaam, ip)
+        return lambda: kotnetcli.force_login(gebruikersnaam, WACHTWOORD)
+
+def percentiel(tijden, p):
+    if not tijden:
+        return None
+    return tijden[min(len(tijden) - 1, int(len(tijden) * p / 100.0))]
+
+def meet(scenario, url, herhalingen, gelijktijdig):
+    tijden = []
+    fouten = [0]
+    slot = threading.Lock()
+    
+    def werker(index, aantal):
+        gebruikersnaam = "s%07d" % index
+        for i in range(aantal):
+            try:
+                functie = oproep(scenario, url, gebruikersnaam)
+            except Exception:
+                ## Het klaarzetten zelf liep in een ingespoten fout.
+                with slot:
+                    fouten[0] += 1
+                continue
+            begin = time.time()
+            try:
+                functie()
+            except Exception:
+                with slot:
+                    fouten[0] += 1
+                continue
+            duur = time.time() - begin
+            with slot:
+                tijden.append(duur)
+    
+    ## Eén keer opwarmen: verbindingen en het formulierschema.
+    try:
+        oproep("login", url, "s9999999")()
+    except Exception:
+        pass
+    voor = tellers(url).get("verzoeken", 0)
+    threads = [threading.Thread(target=werker, args=(i, herhalingen // \
+    gelijktijdig + (i < herhalingen % gelijktijdig))) for i in \
+    range(gelijktijdig)]
+    begin = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duur = time.time() - begin
+    verzoeken = tellers(url).get("verzoeken", 0) - voor
+    
+    tijden.sort()
+    return {"n": herhalingen, "fouten": fouten[0], \
+    "p50": percentiel(tijden, 50), "p95": percentiel(tijden, 95), \
+    "p99": percentiel(tijden, 99), \
+    "gemiddeld": sum(tijden) / len(tijden) if tijden else None, \
+    "perseconde": len(tijden) / duur, \
+    "verzoeken": float(verzoeken) / herhalingen}
+
+def commit():
+    try:
+        with open(os.devnull, "w") as dev_null:
+            return subprocess.check_output(["git", "rev-parse", "--short", \
+            "HEAD"], cwd=HIER, stderr=dev_null).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def ms(waarde):
+    if waarde is None:
+        return "-"
+    return "%.2f" % (waarde * 1000)
+
+def verschil(nu, vroeger):
+    if not nu or not vroeger:
+        return ""
+    return " (%+.0f%%)" % ((nu - vroeger) / vroeger * 100)
+
+def toon(resultaten, vorige=None):
+    vorige = vorige or {}
+    print "%-15s %5s %6s %16s %16s %9s %16s %9s" % ("scenario", "n", \
+    "fouten", "p50 (ms)", "p95 (ms)", "p99 (ms)", "per seconde", \
+    "verzoeken")
+    for scenario in SCENARIOS:
+        if scenario not in resultaten:
+            continue
+        r = resultaten[scenario]
+        v = vorige.get(scenario, {})
+        print "%-15s %5d %6d %16s %16s %9s %16s %9.1f" % (scenario, r["n"], \
+        r["fouten"], ms(r["p50"]) + verschil(r["p50"], v.get("p50")), \
+        ms(r["p95"]) + verschil(r["p95"], v.get("p95")), ms(r["p99"]), \
+        "%.1f" % r["perseconde"] + verschil(r["perseconde"], \
+        v.get("perseconde")), r["verzoeken"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet login, logout en \
+    force-login tegen een lokaal nepportaal")
+    parser.add_argument("-n", "--herhalingen", type=int, default=200)
+    parser.add_argument("-c", "--gelijktijdig", type=int, default=1)
+    parser.add_argument("-s", "--scenario", action="append", \
+    choices=SCENARIOS, help="Enkel dit scenario (mag herhaald worden)")
+    parser.add_argument("--latentie", type=float, default=0.0, \
+    metavar="SECONDEN", help="Wachttijd van het portaal per verzoek")
+    parser.add_argument("--spreiding", type=float, default=0.0, \
+    metavar="SECONDEN", help="Willekeurige extra wachttijd per verzoek")
+    parser.add_argument("--foutkans", type=float, default=0.0, \
+    help="Kans dat een verzoek mislukt")
+    parser.add_argument("--json", metavar="PAD", help="Bewaar de \
+    resultaten")
+    parser.add_argument("--vergelijk", metavar="PAD", help="Zet de \
+    resultaten van een vorige --json ernaast")
+    argumenten = parser.parse_args()
+    
+    vorige = None
+    if argumenten.vergelijk:
+        with open(argumenten.vergelijk) as bestand:
+            vorige = json.load(bestand)
+    
+    cache = tempfile.mkdtemp()
+    proces, url = startPortaal(argumenten.latentie, argumenten.spreiding, \
+    argumenten.foutkans)
+    os.environ["KOTNETCLI_CACHE"] = cache
+    os.environ["KOTNETCLI_NETLOGIN"] = url
+    try:
+        resultaten = {}
+        for scenario in argumenten.scenario or SCENARIOS:
+            resultaten[scenario] = meet(scenario, url, \
+            argumenten.herhalingen, argumenten.gelijktijdig)
+    finally:
+        proces.terminate()
+        proces.wait()
+        shutil.rmtree(cache)
+    
+    uitvoer = {"commit": commit(), "resultaten": resultaten, \
+    "instellingen": {"herhalingen": argumenten.herhalingen, \
+    "gelijktijdig": argumenten.gelijktijdig, \
+    "latentie": argumenten.latentie, "spreiding": argumenten.spreiding, \
+    "foutkans": argumenten.foutkans}}
+    if vorige:
+        print "vergeleken met %s" % (vorige.get("commit") or \
+        argumenten.vergelijk)
+    toon(resultaten, vorige and vorige["resultaten"])
+    if argumenten.json:
+        with open(argumenten.json, "w") as bestand:
+            json.dump(uitvoer, bestand, indent=1, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
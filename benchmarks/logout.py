@@ -0,0 +1,120 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Vergelijkt de latentie van de eerste loguitstap (het formulier naar
+## wayf2.pl posten) zoals die vroeger ging, via een formulier.html in de cwd
+## en een file:-URL, met de huidige aanpak die rechtstreeks vanuit het
+## geheugen post. Een lokale HTTP-server speelt netlogin.
+##
+## Gebruik:
+##      $ ./benchmarks/logout.py -n 200
+
+import BaseHTTPServer                   ## Lokale stand-in voor netlogin
+import threading                        ## Server in de achtergrond
+import argparse                         ## Parst argumenten
+import urlparse                         ## Diverse URL-manipulaties
+import urllib                           ## Diverse URL-manipulaties
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import communicator                     ## QuietCommunicator
+import worker                           ## De huidige aanpak
+
+PAGINA = open(os.path.join(HIER, "pages", "logout_rc100.html")).read()
+
+class Wayf(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGINA)))
+        self.end_headers()
+        self.wfile.write(PAGINA)
+    def log_message(self, *args):
+        pass
+
+def vroeger(actie, gebruikersnaam, ip):
+    ## De oude code uit Kotnetloguit.__init__() en netlogin().
+    browser = worker.nieuweBrowser()
+    bestand = open("formulier.html", "w")
+    bestand.write("<html><body>\n")
+    bestand.write('<FORM METHOD=POST ACTION="%s">\n' % actie)
+    bestand.write('<INPUT type=hidden name="inout" value="logout">\n')
+    bestand.write('<INPUT type=hidden name="ip" value="%s">\n' % ip)
+    bestand.write('<INPUT type=hidden name="network" value="KotNet">\n')
+    bestand.write('<INPUT type=hidden name="uid" value="kuleuven/%s">\n' % \
+    gebruikersnaam)
+    bestand.write('<INPUT type=hidden name="lang" value="ned">\n')
+    bestand.write('<INPUT type=submit value="logout kuleuven/%s@%s">\n' % \
+    (gebruikersnaam, ip))
+    bestand.write('</FORM>\n')
+    bestand.write('</body></html>\n')
+    bestand.close()
+    lokatie = urlparse.urljoin("file:", \
+    urllib.pathname2url(os.path.join(os.getcwd(), "formulier.html")))
+    browser.open(lokatie, timeout=1.8)
+    browser.select_form(nr=0)
+    browser.submit()
+    os.remove(os.path.join(os.getcwd(), "formulier.html"))
+
+def nu(actie, gebruikersnaam, ip):
+    kl = worker.Kotnetloguit(communicator.QuietCommunicator(), \
+    gebruikersnaam, "wachtwoord", uitteloggenip=ip)
+    kl.netlogin()
+
+def meet(functie, actie, herhalingen):
+    tijden = []
+    for i in range(herhalingen):
+        begin = time.time()
+        functie(actie, "s0000000", "10.46.0.17")
+        tijden.append(time.time() - begin)
+    tijden.sort()
+    return tijden[len(tijden) // 2], tijden[int(len(tijden) * 0.95)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergelijkt de latentie \
+    van de loguitstap via formulier.html en rechtstreeks vanuit het geheugen")
+    parser.add_argument("-n", "--herhalingen", type=int, default=200)
+    argumenten = parser.parse_args()
+    
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), Wayf)
+    threading.Thread(target=server.serve_forever).start()
+    actie = "http://127.0.0.1:%d/cgi-bin/wayf2.pl" % server.server_port
+    worker.LOGUIT = actie
+    
+    try:
+        print "%-12s %10s %10s" % ("aanpak", "p50 (ms)", "p95 (ms)")
+        for naam, functie in [("formulier", vroeger), ("geheugen", nu)]:
+            p50, p95 = meet(functie, actie, argumenten.herhalingen)
+            print "%-12s %10.2f %10.2f" % (naam, p50 * 1000, p95 * 1000)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Een lokaal nep-netlogin waartegen Kotnetlogin, Kotnetloguit en
+## --force-login offline kunnen lopen:
+##
+##      GET  /                      startpagina, KU Leuven is formulier 1
+##      POST /cgi-bin/wayf.pl       loginformulier, willekeurig wachtwoordveld
+##      POST /cgi-bin/netlogin.pl   rc=100, 202 of 206 (met een
+##                                  loguitformulier per andere sessie)
+##      POST /cgi-bin/wayf2.pl      loguitformulier, willekeurig wachtwoordveld
+##      POST /cgi-bin/netlogout.pl  rc=100, 202 of 207
+##      POST /nep/sessie            uid en ip: nog een sessie elders openen
+##      POST /nep/veld              het wachtwoordveld meteen een nieuwe naam
+##                                  geven
+##      GET  /nep/status            tellers als JSON
+##
+## Een login vanaf een IP-adres lukt enkel als de gebruiker nergens anders
+## ingelogd is; anders volgt rc=206. Elk verzoek wacht `latentie` seconden
+## (plus een willekeurig deel tot `spreiding`) en mislukt met kans
+## `foutkans`: de helft van de keren een 500, de andere helft wordt de
+## verbinding zonder antwoord gesloten.
+##
+## Zoals netlogin aanvaardt het portaal enkel de huidige naam van het
+## wachtwoordveld; die verandert elke `veldduur` seconden. Een bewaard
+## formulierschema met een oudere naam krijgt rc=202.
+##
+## Gebruik, bv. om de gewone commandolijn offline te proberen:
+##      $ ./benchmarks/nepportaal.py --poort 8080 --latentie 0.02 &
+##      $ KOTNETCLI_NETLOGIN=http://127.0.0.1:8080 ./kotnetcli.py -g
+
+import BaseHTTPServer                   ## Het portaal zelf
+import SocketServer                     ## Een thread per verbinding
+import threading                        ## Slot rond de sessies
+import argparse                         ## Parst argumenten
+import urlparse                         ## Formulieren lezen
+import random                           ## Latentie, fouten, veldnamen
+import json                             ## /nep/status
+import time                             ## Latentie
+import sys                              ## Basislib
+import os                               ## Basislib
+import re                               ## Loguitformulieren in rc=206
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+WACHTWOORD = "wachtwoord"
+VELDDUUR = 3600                         ## seconden per naam van het
+                                        ## wachtwoordveld
+
+def pagina(naam):
+    with open(os.path.join(HIER, "pages", naam)) as bestand:
+        return bestand.read()
+
+START = """<html>
+<head>
+<!-- weblogin: netlogin -->
+<title>KU Leuven - netlogin</title>
+</head>
+<body>
+<form method="get" action="/">
+<select name="lang"><option value="ned">Nederlands</option>
+<option value="eng">English</option></select>
+<input type="submit" value="Taal">
+</form>
+<form method="post" action="/cgi-bin/wayf.pl">
+<input type="hidden" name="inst" value="kuleuven">
+<input type="hidden" name="lang" value="ned">
+<input type="submit" name="submit" value="KU Leuven">
+</form>
+</body>
+</html>
+"""
+
+FORMULIER = """<html>
+<head>
+<!-- weblogin: netlogin -->
+<title>KU Leuven - netlogin</title>
+</head>
+<body>
+<form method="get" action="/"><input type="submit" value="Terug"></form>
+<form method="post" action="%(doel)s">
+%(verborgen)s
+<input type="password" name="%(wachtwoordveld)s">
+<input type="submit" value="Verder">
+</form>
+</body>
+</html>
+"""
+
+LOGUITFORMULIER = """<tr><td class="inhoud"><form method="post" \
+action="/cgi-bin/wayf2.pl">
+<input type="hidden" name="inout" value="logout">
+<input type="hidden" name="ip" value="%(ip)s">
+<input type="hidden" name="network" value="KotNet">
+<input type="hidden" name="uid" value="kuleuven/%(uid)s">
+<input type="hidden" name="lang" value="ned">
+<input type="submit" value="logout kuleuven/%(uid)s@%(ip)s"></form></td></tr>
+"""
+LOGUITFORMULIEREN = re.compile(r'<tr><td class="inhoud"><form method="post".*?'
+    r'</form></td></tr>\n', re.DOTALL)
+
+class Portaal():
+    ## De toestand van het nepportaal; gedeeld door alle verzoeken.
+    def __init__(self, latentie=0.0, spreiding=0.0, foutkans=0.0, \
+    wachtwoord=WACHTWOORD, veldduur=VELDDUUR):
+        self.latentie = latentie
+        self.spreiding = spreiding
+        self.foutkans = foutkans
+        self.wachtwoord = wachtwoord
+        self.veldduur = veldduur
+        self.slot = threading.Lock()
+        self.sessies = {}               ## uid -> set van IP-adressen
+        self.veld = None                ## huidige naam van het wachtwoordveld
+        self.veldtot = 0
+        self.tellers = {}
+        self.paginas = dict((rc, pagina(naam)) for rc, naam in [ \
+        ("login100", "login_rc100.html"), ("login202", "login_rc202.html"), \
+        ("login206", "login_rc206.html"), ("loguit100", "logout_rc100.html"), \
+        ("loguit207", "logout_rc207.html")])
+    
+    def tel(self, naam):
+        with self.slot:
+            self.tellers[naam] = self.tellers.get(naam, 0) + 1
+    
+    def wachtwoordveld(self, nieuw=False):
+        ## De huidige naam van het wachtwoordveld; na `veldduur` seconden
+        ## (of met nieuw) een andere.
+        with self.slot:
+            nu = time.time()
+            if nieuw or self.veld is None or nu >= self.veldtot:
+                self.veld = "pwd%06x" % random.getrandbits(24)
+                self.veldtot = nu + self.veldduur
+            return self.veld
+    
+    def wachtwoordKlopt(self, velden):
+        ## Een oude veldnaam telt niet (zie Kotnetlogin.snelinloggen).
+        return velden.get(self.wachtwoordveld()) == self.wachtwoord
+    
+    def login(self, uid, ip):
+        ## Geeft de rc-code terug en de IP-adressen van de andere sessies.
+        with self.slot:
+            sessies = self.sessies.setdefault(uid, set())
+            anderen = sorted(sessies - set([ip]))
+            if anderen:
+                return 206, anderen
+            sessies.add(ip)
+            return 100, []
+    
+    def loguit(self, uid, ip):
+        with self.slot:
+            sessies = self.sessies.get(uid, set())
+            if ip not in sessies:
+                return 207
+            sessies.discard(ip)
+            return 100
+    
+    def sessie(self, uid, ip):
+        with self.slot:
+            self.sessies.setdefault(uid, set()).add(ip)
+    
+    def rc206(self, uid, anderen):
+        formulieren = "".join(LOGUITFORMULIER % {"uid": uid, "ip": ip} \
+        for ip in anderen)
+        delen = LOGUITFORMULIEREN.split(self.paginas["login206"])
+        return delen[0] + formulieren + "".join(delen[1:])
+
+class Verzoeken(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    
+    def antwoord(self, inhoud, status=200, soort="text/html"):
+        self.send_response(status)
+        self.send_header("Content-Type", soort)
+        self.send_header("Content-Length", str(len(inhoud)))
+        self.end_headers()
+        self.wfile.write(inhoud)
+    
+    def formulier(self):
+        lengte = int(self.headers.get("Content-Length", 0))
+        return dict(urlparse.parse_qsl(self.rfile.read(lengte), \
+        keep_blank_values=True))
+    
+    def vertraag(self):
+        ## Geeft False terug als dit verzoek moet mislukken.
+        portaal = self.server.portaal
+        portaal.tel("verzoeken")
+        time.sleep(portaal.latentie + random.uniform(0, portaal.spreiding))
+        if random.random() >= portaal.foutkans:
+            return True
+        portaal.tel("fouten")
+        if random.random() < 0.5:
+            self.antwoord("fout", status=500, soort="text/plain")
+        else:
+            self.close_connection = 1
+        return False
+    
+    def do_GET(self):
+        pad = urlparse.urlparse(self.path).path
+        if pad == "/nep/status":
+            portaal = self.server.portaal
+            with portaal.slot:
+                inhoud = json.dumps(portaal.tellers)
+            self.antwoord(inhoud, soort="application/json")
+            return
+        if not self.vertraag():
+            return
+        if pad == "/":
+            self.antwoord(START)
+        else:
+            self.antwoord("niet gevonden", status=404, soort="text/plain")
+    
+    def do_POST(self):
+        portaal = self.server.portaal
+        pad = urlparse.urlparse(self.path).path
+        velden = self.formulier()
+        ip = self.client_address[0]
+        if pad == "/nep/sessie":
+            portaal.sessie(velden["uid"], velden["ip"])
+            self.antwoord("ok", soort="text/plain")
+            return
+        if pad == "/nep/veld":
+            self.antwoord(portaal.wachtwoordveld(nieuw=True), \
+            soort="text/plain")
+            return
+        if not self.vertraag():
+            return
+        
+        if pad == "/cgi-bin/wayf.pl":
+            verborgen = "\n".join('<input type="hidden" name="%s" ' \
+            'value="%s">' % veld for veld in [("inst", "kuleuven"), \
+            ("lang", "ned"), ("submit", "Login")]) + \
+            '\n<input type="text" name="uid" value="">'
+            self.antwoord(FORMULIER % {"doel": "/cgi-bin/netlogin.pl", \
+            "verborgen": verborgen, \
+            "wachtwoordveld": portaal.wachtwoordveld()})
+        
+        elif pad == "/cgi-bin/netlogin.pl":
+            uid = velden.get("uid", "")
+            if not portaal.wachtwoordKlopt(velden):
+                portaal.tel("login202")
+                self.antwoord(portaal.paginas["login202"])
+                return
+            rccode, anderen = portaal.login(uid, ip)
+            portaal.tel("login%d" % rccode)
+            if rccode == 206:
+                self.antwoord(portaal.rc206(uid, anderen))
+            else:
+                self.antwoord(portaal.paginas["login100"])
+        
+        elif pad == "/cgi-bin/wayf2.pl":
+            verborgen = "\n".join('<input type="hidden" name="%s" ' \
+            'value="%s">' % (naam, velden.get(naam, "")) for naam in \
+            ("inout", "ip", "network", "uid", "lang"))
+            self.antwoord(FORMULIER % {"doel": "/cgi-bin/netlogout.pl", \
+            "verborgen": verborgen, \
+            "wachtwoordveld": portaal.wachtwoordveld()})
+        
+        elif pad == "/cgi-bin/netlogout.pl":
+            uid = velden.get("uid", "").split("/")[-1]
+            if not portaal.wachtwoordKlopt(velden):
+                portaal.tel("loguit202")
+                self.antwoord(portaal.paginas["login202"].replace( \
+                "weblogin: rc=202", "weblogout: rc=202"))
+                return
+            rccode = portaal.loguit(uid, velden.get("ip", ip))
+            portaal.tel("loguit%d" % rccode)
+            self.antwoord(portaal.paginas["loguit%d" % rccode])
+        
+        else:
+            self.antwoord("niet gevonden", status=404, soort="text/plain")
+    
+    def log_message(self, *args):
+        pass
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    ## De standaardwachtrij van 5 laat bij veel gelijktijdige clients
+    ## SYN's vallen; die komen pas na 1 of 3 seconden terug.
+    request_queue_size = 128
+
+def start(portaal=None, poort=0, adres="127.0.0.1"):
+    ## Start het nepportaal in een thread en geeft de server terug; de URL
+    ## is "http://%s:%d" % server.server_address.
+    server = Server((adres, poort), Verzoeken)
+    server.portaal = portaal or Portaal()
+    draad = threading.Thread(target=server.serve_forever)
+    draad.daemon = True
+    draad.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Een lokaal nep-netlogin")
+    parser.add_argument("--poort", type=int, default=8080, help="0 kiest \
+    een vrije poort")
+    parser.add_argument("--latentie", type=float, default=0.0, \
+    metavar="SECONDEN")
+    parser.add_argument("--spreiding", type=float, default=0.0, \
+    metavar="SECONDEN")
+    parser.add_argument("--foutkans", type=float, default=0.0)
+    parser.add_argument("--veldduur", type=float, default=VELDDUUR, \
+    metavar="SECONDEN", help="zo lang blijft de naam van het \
+    wachtwoordveld geldig")
+    argumenten = parser.parse_args()
+    
+    server = start(Portaal(argumenten.latentie, argumenten.spreiding, \
+    argumenten.foutkans, veldduur=argumenten.veldduur), argumenten.poort)
+    ## Op de eerste lijn: de URL, voor wie dit als subproces start.
+    print "http://%s:%d" % server.server_address
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
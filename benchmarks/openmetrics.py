@@ -0,0 +1,80 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Meet wat de metrieken (openmetrics.py) kosten. Op het pad van de login
+## zijn dat de events via MetricsCommunicator en één meetLogin(); we
+## vergelijken een volledige reeks events met en zonder. Daarnaast: hoe lang
+## het omzetten naar tekst duurt, wat enkel bij een scrape gebeurt.
+##
+## Gebruik:
+##      $ ./benchmarks/openmetrics.py -n 100000
+
+import argparse                         ## Parst argumenten
+import timeit                           ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import communicator                     ## QuietCommunicator
+import extractor                        ## Tegoeden
+import openmetrics                      ## Wat we meten
+
+STAPPEN = ["Netlogin", "Kuleuven", "Invoeren", "Opsturen"]
+TEGOEDEN = extractor.Tegoeden(100, 4000, 5000, 80, 900, 1000, 90)
+
+def login(co, metrieken):
+    for stap in STAPPEN:
+        getattr(co, "event%sStart" % stap)()
+        getattr(co, "event%sSuccess" % stap)()
+    co.eventTegoedenBekend(80, 90)
+    if metrieken:
+        openmetrics.meetLogin("login", 100, TEGOEDEN)
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet de kost van de \
+    metrieken op het pad van de login")
+    parser.add_argument("-n", "--herhalingen", type=int, default=100000)
+    argumenten = parser.parse_args()
+    n = argumenten.herhalingen
+    
+    stil = communicator.QuietCommunicator()
+    gemeten = openmetrics.MetricsCommunicator(stil)
+    zonder = min(timeit.repeat(lambda: login(stil, False), number=n, \
+    repeat=3)) / n
+    met = min(timeit.repeat(lambda: login(gemeten, True), number=n, \
+    repeat=3)) / n
+    scrape = min(timeit.repeat(openmetrics.register.tekst, number=1000, \
+    repeat=3)) / 1000
+    
+    print "%-28s %10s" % ("", "µs")
+    print "%-28s %10.2f" % ("login, QuietCommunicator", zonder * 1e6)
+    print "%-28s %10.2f" % ("login, MetricsCommunicator", met * 1e6)
+    print "%-28s %10.2f" % ("extra per login", (met - zonder) * 1e6)
+    print "%-28s %10.2f" % ("scrape (%d lijnen)" % \
+    openmetrics.register.tekst().count("\n"), scrape * 1e6)
+
+if __name__ == "__main__":
+    main()
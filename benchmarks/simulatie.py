@@ -0,0 +1,174 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Twee metingen met de simulatieworkers (simulatie.py), zonder netwerk:
+##
+## 1. communicators: wat kost een login aan events voor elke communicator,
+##    met stappen die niets duren (uitvoer naar /dev/null);
+## 2. daemon: hoe gedragen de peilingen, de backoff en de tegoeden van
+##    --daemon zich bij een gegeven kans op sessieverlies en mislukte
+##    logins. De tijd is gesimuleerd: elke stap() telt de wachttijd die de
+##    daemon teruggeeft bij een klok op, zodat dagen in seconden voorbij
+##    gaan.
+##
+## Gebruik:
+##      $ ./benchmarks/simulatie.py -n 2000 --foutkans 0,0.2,0.5,0.8
+
+import argparse                         ## Parst argumenten
+import tempfile                         ## Cachemap
+import shutil                           ## Opruimen
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import simulatie                        ## Scenario's
+
+def communicators():
+    import communicator
+    import openmetrics
+    import tijdmeting
+    return [("quiet", communicator.QuietCommunicator),
+            ("summary", communicator.SummaryCommunicator),
+            ("plaintext", communicator.PlaintextCommunicator),
+            ("colorama", communicator.ColoramaCommunicator),
+            ("timings", lambda: tijdmeting.TimingCommunicator( \
+            communicator.QuietCommunicator())),
+            ("metrics", lambda: openmetrics.MetricsCommunicator( \
+            communicator.QuietCommunicator()))]
+
+def meetCommunicator(maak, herhalingen):
+    import worker
+    scenario = simulatie.Scenario(latentie={"*": "vast:0"}, zaad=1)
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        ## Eén communicator voor alle logins: colorama.init() pakt stdout
+        ## bij elke oproep opnieuw in.
+        co = maak()
+        begin = time.time()
+        for i in range(herhalingen):
+            kl = worker.Simulatielogin(co, "s0000000", "wachtwoord", \
+            scenario=scenario)
+            kl.netlogin()
+            kl.kuleuven()
+            kl.gegevensinvoeren()
+            kl.gegevensopsturen()
+            kl.tegoeden()
+        duur = time.time() - begin
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return duur / herhalingen
+
+def meetDaemon(foutkans, verlieskans, herhalingen, verbruik):
+    import communicator
+    import daemon
+    klok = [0.0]
+    scenario = simulatie.Scenario(latentie={"*": "vast:0"}, \
+    fouten={"opsturen": foutkans}, \
+    verbinding={"online": 1 - verlieskans, "inloggen": verlieskans}, \
+    tegoeden={"download": 5120, "upload": 5120, "verbruik": verbruik, \
+    "uploadverbruik": verbruik / 10.0, "spreiding": verbruik / 4.0}, \
+    zaad=1, klok=lambda: klok[0])
+    d = daemon.Daemon(communicator.QuietCommunicator(), "s0000000", \
+    "wachtwoord", stil=True, scenario=scenario)
+    
+    logins = []
+    origineel = d.login
+    def login(opNetlogin):
+        logins.append(origineel(opNetlogin))
+        return logins[-1]
+    d.login = login
+    
+    storingen = []                      ## seconden zonder sessie
+    storing = None
+    begin = time.time()
+    for i in range(herhalingen):
+        aantal = len(logins)
+        wacht = d.stap()
+        klok[0] += wacht
+        if len(logins) == aantal:
+            continue
+        if logins[-1]:
+            if storing is not None:
+                storingen.append(storing)
+            storing = None
+        else:
+            storing = (storing or 0) + wacht
+    cpu = time.time() - begin
+    if storing is not None:
+        storingen.append(storing)
+    storingen.sort()
+    return {"logins": len(logins), \
+    "mislukt": sum(1 for geslaagd in logins if not geslaagd), \
+    "storingen": len(storingen), \
+    "p50": storingen[len(storingen) // 2] if storingen else 0, \
+    "max": storingen[-1] if storingen else 0, \
+    "offline": sum(storingen) / klok[0] if klok[0] else 0, \
+    "uren": klok[0] / 3600, \
+    "download": scenario.traject.download, \
+    "cpu": cpu / herhalingen}
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet communicators en de \
+    daemon met gesimuleerde logins")
+    parser.add_argument("-n", "--herhalingen", type=int, default=2000)
+    parser.add_argument("--foutkans", default="0,0.2,0.5,0.8", \
+    help="Kansen op een mislukte login, gescheiden door komma's")
+    parser.add_argument("--verlieskans", type=float, default=0.05, \
+    help="Kans dat een peiling de sessie kwijt is")
+    parser.add_argument("--verbruik", type=float, default=20, \
+    metavar="MB", help="Downloadverbruik per gesimuleerd uur")
+    argumenten = parser.parse_args()
+    
+    cache = tempfile.mkdtemp()
+    os.environ["KOTNETCLI_CACHE"] = cache
+    try:
+        print "%-12s %12s" % ("communicator", "µs/login")
+        for naam, maak in communicators():
+            print "%-12s %12.1f" % (naam, meetCommunicator(maak, \
+            argumenten.herhalingen) * 1e6)
+        
+        print
+        print "daemon, %d controles, sessieverlies %.0f%% per peiling" % \
+        (argumenten.herhalingen, argumenten.verlieskans * 100)
+        print "%8s %7s %8s %9s %9s %9s %8s %8s %10s %9s" % ("foutkans", \
+        "logins", "mislukt", "storingen", "p50 (s)", "max (s)", \
+        "offline", "uren", "download", "µs/stap")
+        for foutkans in [float(kans) for kans in \
+        argumenten.foutkans.split(",")]:
+            r = meetDaemon(foutkans, argumenten.verlieskans, \
+            argumenten.herhalingen, argumenten.verbruik)
+            print "%8.2f %7d %8d %9d %9.0f %9.0f %7.2f%% %8.1f %7.0f MB " \
+            "%9.0f" % (foutkans, r["logins"], r["mislukt"], r["storingen"], \
+            r["p50"], r["max"], r["offline"] * 100, r["uren"], \
+            r["download"], r["cpu"] * 1e6)
+    finally:
+        shutil.rmtree(cache)
+
+if __name__ == "__main__":
+    main()
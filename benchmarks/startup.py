@@ -0,0 +1,79 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+## Meet de koude opstarttijd van kotnetcli.py voor elke combinatie van
+## vlaggen. Elke meting start een vers proces; we rapporteren het minimum en
+## de mediaan over een aantal herhalingen. Let op: de dummy-workers slapen
+## zelf al 0.1s per stap; dat zit mee in de gemeten tijd.
+##
+## Gebruik:
+##      $ ./benchmarks/startup.py
+##      $ ./benchmarks/startup.py -n 20 -- -1 -q
+
+import subprocess                       ## Om kotnetcli.py op te starten
+import argparse                         ## Parst argumenten
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+KOTNETCLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir, "kotnetcli.py")
+
+## curses en dialog hebben een echte terminal nodig en zitten daarom niet
+## in de standaardreeks.
+WORKERS = ["-1", "-0"]
+COMMUNICATORS = ["-q", "-s", "-t", "-c", "-b"]
+
+def meet(vlaggen, herhalingen):
+    tijden = []
+    with open(os.devnull, "w") as dev_null:
+        for i in range(herhalingen):
+            begin = time.time()
+            subprocess.call([sys.executable, KOTNETCLI] + vlaggen, \
+            stdout=dev_null, stderr=dev_null)
+            tijden.append(time.time() - begin)
+    tijden.sort()
+    return tijden[0], tijden[len(tijden) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet de opstarttijd van \
+    kotnetcli per combinatie van vlaggen")
+    parser.add_argument("-n", "--herhalingen", type=int, default=10)
+    parser.add_argument("vlaggen", nargs="*", help="Meet enkel deze \
+    combinatie in plaats van alle standaardcombinaties")
+    argumenten = parser.parse_args()
+
+    if argumenten.vlaggen:
+        combinaties = [argumenten.vlaggen]
+    else:
+        combinaties = [["--version"]] + \
+        [[w, c] for w in WORKERS for c in COMMUNICATORS]
+
+    print "%-20s %10s %10s" % ("vlaggen", "min (ms)", "med (ms)")
+    for vlaggen in combinaties:
+        minimum, mediaan = meet(vlaggen, argumenten.herhalingen)
+        print "%-20s %10.1f %10.1f" % (" ".join(vlaggen), \
+        minimum * 1000, mediaan * 1000)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Vergelijkt de oude BeautifulSoup-aanpak van Kotnetlogin.tegoeden() met de
+## stroomsgewijze extractor op de pagina's in benchmarks/pages/. Die pagina's
+## volgen de opbouw van netlogin (rc-code en tegoeden in de HTML-comments).
+## Tijd wordt in dit proces gemeten; het piekgeheugen per aanpak in een
+## apart proces, zodat de ene meting de andere niet beïnvloedt.
+##
+## Gebruik:
+##      $ ./benchmarks/tegoeden.py
+##      $ ./benchmarks/tegoeden.py -n 2000 benchmarks/pages/login_rc100.html
+
+import StringIO                         ## Respons nabootsen
+import subprocess                       ## Voor de geheugenmeting
+import resource                         ## Piekgeheugen (ru_maxrss)
+import argparse                         ## Parst argumenten
+import glob                             ## Pagina's zoeken
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+import re                               ## Basislib voor reguliere expressies
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import extractor                        ## De nieuwe aanpak
+
+def prefix(pagina):
+    if "logout" in os.path.basename(pagina):
+        return "weblogout"
+    return "weblogin"
+
+def bs4pad(html, prefix, bewaard=None):
+    ## Dit is de oude code uit worker.Kotnetlogin.tegoeden().
+    from bs4 import BeautifulSoup, Comment
+    soup = BeautifulSoup(html, "html.parser")
+    if bewaard is not None:
+        bewaard.append(soup)
+    comments = soup.findAll(text=lambda text:isinstance(text, Comment))
+    rccode = None
+    for c in comments:
+        p = re.compile(prefix + ": rc=\d+")
+        m = p.search(c)
+        if m:
+            rccode = int(m.group().strip(prefix + ": rc="))
+    if rccode == 100 and prefix == "weblogin":
+        p = re.compile("\d+")
+        m = p.findall(comments[6])
+        download = int(round(float(m[0]) / float(m[1]) * 100, 0))
+        p = re.compile("\d+")
+        m = p.findall(comments[7])
+        upload = int(round(float(m[0]) / float(m[1]) * 100, 0))
+        return rccode, download, upload
+    return rccode, None, None
+
+def extractorpad(html, prefix, bewaard=None):
+    ## Zelfde werk als extractor.lees(), maar met toegang tot de toestand.
+    respons = StringIO.StringIO(html)
+    e = extractor.Extractor(prefix, tegoeden=(prefix == "weblogin"))
+    while True:
+        stuk = respons.read(extractor.STUKGROOTTE)
+        if not stuk or e.voed(stuk):
+            break
+    if bewaard is not None:
+        bewaard.append(e)
+    r = e.resultaat()
+    return r.rccode, r.downloadpercentage, r.uploadpercentage
+
+AANPAKKEN = [("bs4", bs4pad), ("extractor", extractorpad)]
+
+def tijd(functie, html, prefix, herhalingen):
+    begin = time.time()
+    for i in range(herhalingen):
+        functie(html, prefix)
+    return (time.time() - begin) / herhalingen
+
+def piekgeheugen(aanpak, pagina, herhalingen):
+    ## Start een kind dat eerst alles importeert (nulmeting) en dan de
+    ## aanpak draait; het verschil in ru_maxrss is wat het parsen kost.
+    uitvoer = subprocess.check_output([sys.executable, \
+    os.path.abspath(__file__), "--kind", aanpak, "-n", str(herhalingen), \
+    pagina])
+    return float(uitvoer.strip())
+
+def kind(aanpak, pagina, herhalingen):
+    ## ru_maxrss is te grof voor één pagina van enkele KiB. We houden
+    ## daarom de werktoestand van veel parses tegelijk in leven (zoals
+    ## tegoeden() de soep vasthoudt tot het klaar is) en delen door het
+    ## aantal.
+    html = open(pagina).read()
+    functie = dict(AANPAKKEN)[aanpak]
+    import bs4                          ## Nulmeting inclusief imports
+    bewaard = []
+    voor = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for i in range(herhalingen):
+        functie(html, prefix(pagina), bewaard)
+    na = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print float(na - voor) / herhalingen
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergelijkt bs4 en de \
+    extractor voor het uitlezen van rc-code en tegoeden")
+    parser.add_argument("-n", "--herhalingen", type=int, default=500)
+    parser.add_argument("--kind", help=argparse.SUPPRESS)
+    parser.add_argument("paginas", nargs="*")
+    argumenten = parser.parse_args()
+    
+    paginas = argumenten.paginas or \
+    sorted(glob.glob(os.path.join(HIER, "pages", "*.html")))
+    
+    if argumenten.kind:
+        kind(argumenten.kind, paginas[0], argumenten.herhalingen)
+        return
+    
+    print "%-20s %-10s %12s %14s" % ("pagina", "aanpak", "tijd (us)", \
+    "geheugen (KiB)")
+    for pagina in paginas:
+        html = open(pagina).read()
+        for naam, functie in AANPAKKEN:
+            ## Beide aanpakken moeten hetzelfde antwoord geven.
+            assert functie(html, prefix(pagina)) == \
+            bs4pad(html, prefix(pagina))
+            print "%-20s %-10s %12.1f %14.1f" % ( \
+            os.path.basename(pagina), naam, \
+            tijd(functie, html, prefix(pagina), argumenten.herhalingen) \
+            * 1e6, piekgeheugen(naam, pagina, argumenten.herhalingen))
+
+if __name__ == "__main__":
+    main()
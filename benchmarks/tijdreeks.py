@@ -0,0 +1,107 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Meet vragen over een lange reeks van tegoeden (tijdreeks.py): een jaar
+## aan metingen, één per minuut, en dan de metingen van één dag opvragen.
+## We vergelijken met alles inlezen en filteren, telkens in een vers
+## proces zodat het maximale geheugen (ru_maxrss) per aanpak klopt.
+##
+## Gebruik:
+##      $ ./benchmarks/tijdreeks.py -d 365
+
+import subprocess                       ## Elke aanpak in een eigen proces
+import argparse                         ## Parst argumenten
+import resource                         ## Geheugen
+import tempfile                         ## Map voor de reeks
+import shutil                           ## Opruimen
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import tijdreeks                        ## De reeks
+
+BEGIN = 1420070400                      ## 1 januari 2015
+DAG = 86400
+
+def vul(pad, dagen):
+    ## Schrijft in één keer; voegtoe() opent het bestand per meting.
+    with open(pad, "wb") as bestand:
+        bestand.write(tijdreeks.KOP.pack(tijdreeks.MAGIE, tijdreeks.VERSIE, \
+        tijdreeks.RECORD.size))
+        for minuut in xrange(dagen * 24 * 60):
+            procent = 100 - (minuut // 60) % 100
+            bestand.write(tijdreeks.RECORD.pack(BEGIN + minuut * 60, \
+            procent * 51, 5120, procent, 100))
+
+def mmapVraag(pad, van, tot):
+    with tijdreeks.Reeks(pad) as reeks:
+        return sum(1 for meting in reeks.bereik(van, tot))
+
+def allesVraag(pad, van, tot):
+    with open(pad, "rb") as bestand:
+        data = bestand.read()
+    metingen = [tijdreeks.Meting(*tijdreeks.RECORD.unpack_from(data, i)) \
+    for i in xrange(tijdreeks.KOP.size, len(data), tijdreeks.RECORD.size)]
+    return len([m for m in metingen if van <= m.tijd < tot])
+
+def meetproces(aanpak, pad, dag):
+    van = BEGIN + dag * DAG
+    begin = time.time()
+    aantal = {"mmap": mmapVraag, "alles": allesVraag}[aanpak](pad, van, \
+    van + DAG)
+    duur = time.time() - begin
+    print "%-8s %8d %10.2f %10.1f" % (aanpak, aantal, duur * 1000, \
+    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet bereikvragen over \
+    een lange reeks van tegoeden")
+    parser.add_argument("-d", "--dagen", type=int, default=365)
+    parser.add_argument("--meetproces", nargs=3, help="Intern")
+    argumenten = parser.parse_args()
+    
+    if argumenten.meetproces:
+        aanpak, pad, dag = argumenten.meetproces
+        meetproces(aanpak, pad, int(dag))
+        return
+    
+    map = tempfile.mkdtemp()
+    try:
+        pad = os.path.join(map, tijdreeks.REEKS)
+        vul(pad, argumenten.dagen)
+        print "%d metingen, %.1f MB" % (argumenten.dagen * 24 * 60, \
+        os.path.getsize(pad) / 1024.0 / 1024.0)
+        print "%-8s %8s %10s %10s" % ("aanpak", "metingen", "tijd (ms)", \
+        "RSS (MB)")
+        for aanpak in ("mmap", "alles"):
+            subprocess.check_call([sys.executable, os.path.abspath(__file__), \
+            "--meetproces", aanpak, pad, str(argumenten.dagen // 2)])
+    finally:
+        shutil.rmtree(map)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Meet of kotnetcli een TLS-sessie van een vorige oproep hervat. Een lokale
+## TLS-server met een zelfondertekend certificaat (aangemaakt met het
+## openssl-commando) speelt netlogin; elke meting is een vers proces dat één
+## https-verzoek doet via worker.nieuweBrowser(). Zonder cache krijgt elk
+## proces een lege cachemap, met cache delen ze er één.
+##
+## Gebruik:
+##      $ ./benchmarks/tls.py -n 20
+
+import BaseHTTPServer                   ## Lokale stand-in voor netlogin
+import subprocess                       ## Meetprocessen en openssl
+import threading                        ## Server in de achtergrond
+import argparse                         ## Parst argumenten
+import tempfile                         ## Certificaat en cachemappen
+import shutil                           ## Opruimen
+import json                             ## Uitkomst van een meetproces
+import ssl                              ## Serverkant van TLS
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+class Netlogin(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", "13")
+        self.end_headers()
+        self.wfile.write("<html></html>")
+    def log_message(self, *args):
+        pass
+
+def certificaat(map):
+    sleutel = os.path.join(map, "sleutel.pem")
+    cert = os.path.join(map, "cert.pem")
+    with open(os.devnull, "w") as dev_null:
+        subprocess.check_call(["openssl", "req", "-x509", "-newkey", \
+        "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost", \
+        "-addext", "subjectAltName=DNS:localhost", "-keyout", sleutel, \
+        "-out", cert], stdout=dev_null, stderr=dev_null)
+    return sleutel, cert
+
+def meetproces(url):
+    ## Draait in het meetproces zelf.
+    import worker
+    import session
+    worker.nieuweBrowser().open(url, timeout=5).read()
+    print json.dumps(session.statistieken())
+
+def meet(url, cert, cachemap, herhalingen):
+    tijden = []
+    hervat = 0
+    for i in range(herhalingen):
+        omgeving = dict(os.environ, SSL_CERT_FILE=cert, \
+        KOTNETCLI_CACHE=cachemap or tempfile.mkdtemp())
+        uitvoer = subprocess.check_output([sys.executable, \
+        os.path.abspath(__file__), "--meetproces", url], env=omgeving)
+        statistieken = json.loads(uitvoer)
+        tijden.append(statistieken["handdruktijd"])
+        hervat += statistieken["tlshervat"]
+        if cachemap is None:
+            shutil.rmtree(omgeving["KOTNETCLI_CACHE"])
+    tijden.sort()
+    return tijden[len(tijden) // 2], tijden[int(len(tijden) * 0.95)], hervat
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet het hervatten van \
+    TLS-sessies tussen twee oproepen van kotnetcli")
+    parser.add_argument("-n", "--herhalingen", type=int, default=20)
+    parser.add_argument("--meetproces", metavar="URL", help="Intern: doe \
+    één verzoek en geef de statistieken van de pool terug")
+    argumenten = parser.parse_args()
+    
+    if argumenten.meetproces:
+        meetproces(argumenten.meetproces)
+        return
+    
+    map = tempfile.mkdtemp()
+    try:
+        sleutel, cert = certificaat(map)
+        server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), Netlogin)
+        context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+        context.load_cert_chain(cert, sleutel)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever).start()
+        url = "https://localhost:%d/" % server.server_port
+        
+        try:
+            print "%-12s %10s %10s %8s" % ("cache", "p50 (ms)", "p95 (ms)", \
+            "hervat")
+            for naam, cachemap in [("zonder", None), \
+            ("met", os.path.join(map, "cache"))]:
+                p50, p95, hervat = meet(url, cert, cachemap, \
+                argumenten.herhalingen)
+                print "%-12s %10.2f %10.2f %5d/%d" % (naam, p50 * 1000, \
+                p95 * 1000, hervat, argumenten.herhalingen)
+        finally:
+            server.shutdown()
+    finally:
+        shutil.rmtree(map)
+
+if __name__ == "__main__":
+    main()
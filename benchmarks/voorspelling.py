@@ -0,0 +1,121 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Meet --forecast (voorspelling.py) over een lange reeks van tegoeden: een
+## jaar aan metingen, één per minuut. Telkens komt er één meting bij en
+## vragen we een nieuwe schatting, zoals --monitor en een periodieke
+## --forecast dat zouden doen. We vergelijken de bewaarde sommen met het
+## venster telkens opnieuw inlezen en de rechte van nul af berekenen, en
+## controleren dat beide hetzelfde verbruik geven.
+##
+## Gebruik:
+##      $ ./benchmarks/voorspelling.py -d 365 -n 200
+
+import argparse                         ## Parst argumenten
+import tempfile                         ## Map voor de reeks en de sommen
+import shutil                           ## Opruimen
+import time                             ## Voor de metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+BEGIN = 1420070400                      ## 1 januari 2015
+
+def vul(pad, dagen):
+    import tijdreeks
+    with open(pad, "wb") as bestand:
+        bestand.write(tijdreeks.KOP.pack(tijdreeks.MAGIE, tijdreeks.VERSIE, \
+        tijdreeks.RECORD.size))
+        for minuut in xrange(dagen * 24 * 60):
+            bestand.write(tijdreeks.RECORD.pack(BEGIN + minuut * 60, \
+            50000 - minuut % 10000 * 5, 8000 - minuut % 10000 // 2, 0, 0))
+
+def opnieuw(reeks, vensters):
+    ## Alles van nul af: het venster inlezen en de rechte berekenen.
+    verbruik = []
+    for uren in vensters:
+        metingen = list(reeks.bereik(reeks[-1].tijd - uren * 3600))
+        n = float(len(metingen))
+        xs = [m.tijd - reeks[0].tijd for m in metingen]
+        gx = sum(xs) / n
+        noemer = sum((x - gx) ** 2 for x in xs)
+        for veld in ("download", "upload"):
+            ys = [getattr(m, veld) for m in metingen]
+            gy = sum(ys) / n
+            verbruik.append(-3600 * sum((x - gx) * (y - gy) \
+            for x, y in zip(xs, ys)) / noemer)
+    return verbruik
+
+def tegoeden(i):
+    import extractor
+    return extractor.Tegoeden(100, 40000 - i * 5, 50000, 0, 7000 - i // 2, \
+    8000, 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet --forecast over \
+    een lange reeks van tegoeden")
+    parser.add_argument("-d", "--dagen", type=int, default=365)
+    parser.add_argument("-n", "--oproepen", type=int, default=200)
+    argumenten = parser.parse_args()
+    
+    map = tempfile.mkdtemp()
+    os.environ["KOTNETCLI_CACHE"] = map
+    import tijdreeks
+    import voorspelling
+    try:
+        pad = os.path.join(map, tijdreeks.REEKS)
+        vul(pad, argumenten.dagen)
+        laatste = BEGIN + argumenten.dagen * 86400
+        
+        duur = {"bewaard": 0.0, "opnieuw": 0.0}
+        verschil = 0.0
+        for i in xrange(argumenten.oproepen):
+            tijdreeks.voegtoe(tegoeden(i), laatste + i * 60, pad)
+            with tijdreeks.Reeks(pad) as reeks:
+                begin = time.time()
+                schattingen = voorspelling.schat(reeks)
+                duur["bewaard"] += time.time() - begin
+                begin = time.time()
+                verwacht = opnieuw(reeks, voorspelling.VENSTERS)
+                duur["opnieuw"] += time.time() - begin
+            gekregen = [v for s in schattingen for v in (s.download, \
+            s.upload)]
+            verschil = max([verschil] + [abs(a - b) for a, b in \
+            zip(gekregen, verwacht)])
+        
+        print "%d metingen, vensters %s uur, %d oproepen" % \
+        (argumenten.dagen * 1440 + argumenten.oproepen, ",".join(str(v) \
+        for v in voorspelling.VENSTERS), argumenten.oproepen)
+        print "%-8s %12s" % ("aanpak", "ms/oproep")
+        for aanpak in ("bewaard", "opnieuw"):
+            print "%-8s %12.3f" % (aanpak, duur[aanpak] * 1000 / \
+            argumenten.oproepen)
+        print "grootste verschil in verbruik: %.2g MB/u" % verschil
+    finally:
+        shutil.rmtree(map)
+
+if __name__ == "__main__":
+    main()
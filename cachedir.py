@@ -0,0 +1,65 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import tempfile                         ## Unieke tijdelijke bestanden
+import os                               ## Basislib
+
+## Alles wat kotnetcli tussen twee oproepen onthoudt (formulierschema,
+## toestand, ...) komt in één map per gebruiker terecht. Met de omgevings-
+## variabele KOTNETCLI_CACHE kan die map verlegd worden.
+
+def cachedir():
+    if "KOTNETCLI_CACHE" in os.environ:
+        pad = os.environ["KOTNETCLI_CACHE"]
+    elif os.name == "nt":
+        pad = os.path.join(os.environ.get("APPDATA", \
+        os.path.expanduser("~")), "kotnetcli")
+    else:
+        pad = os.path.join(os.environ.get("XDG_CACHE_HOME", \
+        os.path.join(os.path.expanduser("~"), ".cache")), "kotnetcli")
+    
+    if not os.path.isdir(pad):
+        os.makedirs(pad, 0700)
+    return pad
+
+def cachebestand(naam):
+    return os.path.join(cachedir(), naam)
+
+def schrijfbestand(naam, inhoud):
+    ## Schrijft eerst naar een tijdelijk bestand en hernoemt dan, zodat een
+    ## gelijktijdige lezer nooit een half bestand ziet. mkstemp geeft elke
+    ## schrijver (ook elke thread) een eigen tijdelijk bestand, enkel
+    ## leesbaar voor de eigenaar.
+    pad = cachebestand(naam)
+    fd, tijdelijk = tempfile.mkstemp(dir=os.path.dirname(pad), \
+    prefix=naam + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as bestand:
+            bestand.write(inhoud)
+        if os.name == "nt" and os.path.exists(pad):
+            os.remove(pad)
+        os.rename(tijdelijk, pad)
+    except:
+        os.remove(tijdelijk)
+        raise
@@ -0,0 +1,218 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+import collections                      ## Uitwisselingen per verzoek
+import threading                        ## Afspelen vanuit meerdere threads
+import urlparse                         ## Pad van een URL, formuliervelden
+import urllib                           ## Geheimen in URL-codering
+import tempfile                         ## Atomair wegschrijven
+import atexit                           ## Opname wegschrijven bij het einde
+import gzip                             ## Compacte cassettes
+import json                             ## Inhoud van een cassette
+import re                               ## IP-adressen
+import os                               ## Basislib
+
+## Met --record neemt kotnetcli elke HTTP-uitwisseling van de workers op
+## (zie session.py): methode, URL, de geposte velden, status, kopregels en
+## de volledige HTML. Bij het afsluiten gaat alles naar een cassette, een
+## gzip-bestand met JSON:
+##
+##      {"versie": 1, "uitwisselingen": [{"methode": "POST",
+##       "url": "https://netlogin.kuleuven.be/cgi-bin/netlogin.pl",
+##       "verzoek": "uid=kuleuven%2Fs0000000&pwd1234=wachtwoord",
+##       "status": 200, "reden": "OK", "koppen": [...], "inhoud": "..."}]}
+##
+## Wat niet in een cassette hoort, wordt eerst weggepoetst: de gebruikers-
+## naam en het wachtwoord (overal, ook in de HTML), cookies, en IP-
+## adressen in verzoeken en antwoorden (telkens hetzelfde adres uit
+## 192.0.2.0/24, zodat een loguitformulier nog klopt). Welke gebruikers-
+## naam en welk wachtwoord dat zijn, melden de workers zelf (geheim());
+## het portaal geeft het wachtwoordveld een willekeurige naam, dus op de
+## veldnaam alleen kunnen we niet rekenen. Velden met een herkenbare naam
+## (uid, pwd...) poetsen we daarbovenop ook weg.
+##
+## Met --replay komen de antwoorden uit een cassette in plaats van van het
+## netwerk: per methode en pad (zonder host, zodat ook een cassette van
+## het nepportaal past) in de volgorde van de opname, en daarna opnieuw van
+## voor af aan. Zo lopen de workers offline en zonder wachttijd door echte
+## portaal-HTML.
+
+VERSIE = 1
+GEBRUIKER = "s0000000"
+WACHTWOORD = "wachtwoord"
+GEBRUIKERSVELDEN = ("uid",)
+WACHTWOORDVELDEN = re.compile("^(pwd|pass|wachtwoord)", re.I)
+WEGLATEN = ("cookie", "set-cookie")     ## Kopregels die we niet bewaren
+IPADRES = re.compile(r"\b(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})\b")
+
+opnemer = None
+afspeler = None
+
+class Opnemer():
+    def __init__(self, pad):
+        self.pad = pad
+        self.uitwisselingen = []
+        self.geheimen = {}              ## geheim -> vervanging
+    
+    def geheim(self, gebruikersnaam, wachtwoord):
+        ## De echte gebruikersnaam en het echte wachtwoord van een worker;
+        ## die verdwijnen overal uit de cassette.
+        for waarde, vervanging in ((gebruikersnaam, GEBRUIKER), \
+        (wachtwoord, WACHTWOORD)):
+            if isinstance(waarde, unicode):
+                waarde = waarde.encode("utf-8")
+            if waarde:
+                self.geheimen[waarde] = vervanging
+    
+    def neemOp(self, req, status, reden, koppen, inhoud):
+        ## list.append is atomair; poetsen gebeurt pas bij het wegschrijven.
+        self.uitwisselingen.append({"methode": req.get_method(), \
+        "url": req.get_full_url(), "verzoek": req.data or "", \
+        "status": status, "reden": reden, "koppen": koppen, \
+        "inhoud": inhoud})
+    
+    def sluit(self):
+        bewaar(self.pad, poets(self.uitwisselingen, self.geheimen))
+
+def geheim(gebruikersnaam, wachtwoord):
+    ## Voor de workers: meldt de gegevens aan de opname, als die loopt.
+    if opnemer is not None:
+        opnemer.geheim(gebruikersnaam, wachtwoord)
+
+def geheimen(uitwisselingen, gekend=None):
+    ## (geheim, vervanging) voor de gemelde gegevens en voor alle
+    ## gebruikersnamen en wachtwoorden in velden met een herkenbare naam;
+    ## langste eerst.
+    gevonden = dict(gekend or {})
+    for uitwisseling in uitwisselingen:
+        for naam, waarde in urlparse.parse_qsl(uitwisseling["verzoek"], \
+        keep_blank_values=True):
+            if not waarde:
+                continue
+            if naam in GEBRUIKERSVELDEN:
+                ## "kuleuven/s0123456": enkel het nummer is geheim.
+                gevonden[waarde.split("/")[-1]] = GEBRUIKER
+            elif WACHTWOORDVELDEN.match(naam):
+                gevonden[waarde] = WACHTWOORD
+    return sorted(gevonden.items(), key=lambda paar: -len(paar[0]))
+
+def poets(uitwisselingen, gekend=None):
+    vervangingen = geheimen(uitwisselingen, gekend)
+    adressen = {}
+    
+    def adres(m):
+        ip = m.group(0)
+        if m.group(1) == "127" or any(int(deel) > 255 for deel in m.groups()):
+            return ip
+        return adressen.setdefault(ip, "192.0.2.%d" % (len(adressen) + 1))
+    
+    def tekst(waarde):
+        for geheim, vervanging in vervangingen:
+            ## Ook de URL-gecodeerde vormen, zoals in een gepost formulier.
+            for vorm in (geheim, urllib.quote_plus(geheim), \
+            urllib.quote(geheim, "")):
+                waarde = waarde.replace(vorm, vervanging)
+        return IPADRES.sub(adres, waarde)
+    
+    gepoetst = []
+    for uitwisseling in uitwisselingen:
+        gepoetst.append(dict(uitwisseling, url=tekst(uitwisseling["url"]), \
+        verzoek=tekst(uitwisseling["verzoek"]), \
+        koppen=[(naam, tekst(waarde)) for naam, waarde in \
+        uitwisseling["koppen"] if naam.lower() not in WEGLATEN], \
+        inhoud=tekst(uitwisseling["inhoud"])))
+    return gepoetst
+
+def bewaar(pad, uitwisselingen):
+    ## HTML komt als bytes binnen; latin-1 zet elke byte om naar één teken
+    ## en terug, wat de codering van de pagina ook is.
+    cassette = {"versie": VERSIE, "uitwisselingen": [dict(uitwisseling, \
+    verzoek=uitwisseling["verzoek"].decode("latin-1"), \
+    inhoud=uitwisseling["inhoud"].decode("latin-1")) \
+    for uitwisseling in uitwisselingen]}
+    map = os.path.dirname(os.path.abspath(pad))
+    fd, tijdelijk = tempfile.mkstemp(dir=map, prefix=".cassette")
+    try:
+        with os.fdopen(fd, "wb") as bestand:
+            with gzip.GzipFile(fileobj=bestand, mode="wb") as gz:
+                json.dump(cassette, gz, sort_keys=True)
+        os.rename(tijdelijk, pad)
+    except:
+        os.unlink(tijdelijk)
+        raise
+
+def laad(pad):
+    with gzip.open(pad, "rb") as bestand:
+        cassette = json.load(bestand)
+    if cassette.get("versie") != VERSIE:
+        raise ValueError("%s: onbekende versie van cassette" % pad)
+    uitwisselingen = []
+    for uitwisseling in cassette["uitwisselingen"]:
+        uitwisseling["verzoek"] = uitwisseling["verzoek"].encode("latin-1")
+        uitwisseling["inhoud"] = uitwisseling["inhoud"].encode("latin-1")
+        uitwisseling["koppen"] = [(str(naam), str(waarde)) for naam, \
+        waarde in uitwisseling["koppen"]]
+        uitwisselingen.append(uitwisseling)
+    return uitwisselingen
+
+def sleutel(methode, url):
+    delen = urlparse.urlsplit(url)
+    return methode, delen.path + ("?" + delen.query if delen.query else "")
+
+class Afspeler():
+    def __init__(self, uitwisselingen):
+        self.slot = threading.Lock()
+        self.uitwisselingen = collections.OrderedDict()
+        for uitwisseling in uitwisselingen:
+            self.uitwisselingen.setdefault(sleutel(uitwisseling["methode"], \
+            uitwisseling["url"]), []).append(uitwisseling)
+        self.volgende = dict((s, 0) for s in self.uitwisselingen)
+    
+    def antwoord(self, methode, url):
+        ## (status, reden, koppen, inhoud) van de volgende opgenomen
+        ## uitwisseling voor dit verzoek, of None als de cassette er geen
+        ## heeft.
+        s = sleutel(methode, url)
+        with self.slot:
+            opgenomen = self.uitwisselingen.get(s)
+            if not opgenomen:
+                return None
+            uitwisseling = opgenomen[self.volgende[s] % len(opgenomen)]
+            self.volgende[s] += 1
+        return uitwisseling["status"], uitwisseling["reden"], \
+        uitwisseling["koppen"], uitwisseling["inhoud"]
+    
+    def paden(self):
+        return [pad for methode, pad in self.uitwisselingen]
+
+def neemOp(pad):
+    ## Zet de opname aan; de cassette wordt bij het afsluiten geschreven.
+    global opnemer
+    opnemer = Opnemer(pad)
+    atexit.register(opnemer.sluit)
+
+def speelAf(pad):
+    global afspeler
+    afspeler = Afspeler(laad(pad))
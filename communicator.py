@@ -26,29 +26,37 @@ import time                             ## Voor timeout om venster te sluiten
 import sys                              ## Basislib
 import os                               ## Basislib
 
-from colorama import (                  ## Om de tekst kleur te geven
-    Fore,                               ## 
-    Style,                              ## 
-    init as colorama_init)              ## 
-    
-if os.name == "posix":
-    try:            
-        import curses                       ## Voor tekenen op scherm.
+## De zware bibliotheken (colorama, curses, notify2, dialog) worden pas
+## geladen wanneer een communicator die ze nodig heeft, aangemaakt wordt.
+## Zo betaalt --quiet of --summary niet voor imports die het nooit gebruikt.
+
+def laad_colorama():
+    global Fore, Style, colorama_init
+    from colorama import (              ## Om de tekst kleur te geven
+        Fore,                           ## 
+        Style,                          ## 
+        init as colorama_init)          ## 
+
+def laad_curses():
+    global curses
+    try:
+        import curses                   ## Voor tekenen op scherm.
     except ImportError:
         print "Couldn't import the curses library."
-        pass
-    try:            
-        import notify2                      ## OS-specifieke notificaties
+
+def laad_notify2():
+    global notify2
+    try:
+        import notify2                  ## OS-specifieke notificaties
     except ImportError:
         print "Couldn't import the notify2 library."
-        pass
-    try:            
-        from dialog import Dialog           ## Voor tekenen op scherm.
+
+def laad_dialog():
+    global Dialog
+    try:
+        from dialog import Dialog       ## Voor tekenen op scherm.
     except ImportError:
         print "Couldn't import the dialog library."
-        pass
-if os.name == "nt":
-    print "Windows system detected. Will not import curses, notify and dialog"
 
 class QuietCommunicator():
     def __init__(self):
@@ -61,6 +69,16 @@ class QuietCommunicator():
     def eventPingAlreadyOnline(self):
         pass
 
+    ## Rechtstreeks posten met het bewaarde formulierschema (zie
+    ## Kotnetlogin.snelinloggen). Na een succes volgen de vier stappen
+    ## meteen; na een mislukking lopen ze echt.
+    def eventSnelloginStart(self):
+        pass
+    def eventSnelloginSuccess(self):
+        pass
+    def eventSnelloginFailure(self):
+        pass
+
     def eventNetloginStart(self):
         pass
     def eventNetloginSuccess(self):
@@ -92,11 +110,15 @@ class QuietCommunicator():
     def eventTegoedenBekend(self, downloadpercentage, uploadpercentage):
         pass
     
+    def eventRccodeBekend(self, rccode):
+        pass
+    
     def beeindig_sessie(self, error_code=0):
         pass
 
 class BubbleCommunicator(QuietCommunicator):
     def __init__(self):
+        laad_notify2()
         notify2.init("kotnetcli")
     def eventTegoedenBekend(self, downloadpercentage, uploadpercentage):
         n = notify2.Notification("kotnetcli", \
@@ -114,6 +136,7 @@ class DialogCommunicator(QuietCommunicator):
         self.DONE        = 0
         self.FAIL        = 1
         
+        laad_dialog()
         self.d = Dialog(dialog="dialog")
         self.d.set_background_title("kotnetcli")
         self.netlogin = self.WAIT
@@ -200,6 +223,7 @@ class SummaryCommunicator(QuietCommunicator):
 
 class ColoramaCommunicator(QuietCommunicator):
     def __init__(self):
+        laad_colorama()
         colorama_init()
         if os.name == "posix":
             ## Hide the terminal cursor using ANSI escape codes
@@ -323,6 +347,7 @@ class ColoramaCommunicator(QuietCommunicator):
 
 class PlaintextCommunicator(ColoramaCommunicator):
     def __init__(self):
+        laad_colorama()
         Style.BRIGHT = ""
         Style.RESET = ""
         Fore.GREEN = ""
@@ -331,6 +356,7 @@ class PlaintextCommunicator(ColoramaCommunicator):
 
 class CursesCommunicator():
     def __init__(self):
+        laad_curses()
         self.scherm = curses.initscr()
         
         curses.curs_set(0)                  ## cursor invisible
@@ -382,6 +408,13 @@ class CursesCommunicator():
     def eventPingAlreadyOnline(self):
         self.kprint(6, 0, "U bent al online.", \
         self.tekstKleurGeelOpmaakVet)
+    
+    def eventSnelloginStart(self):
+        pass
+    def eventSnelloginSuccess(self):
+        pass
+    def eventSnelloginFailure(self):
+        pass
         
     def eventNetloginStart(self):
         self.kprint(0, 23, "WAIT", self.tekstKleurGeelOpmaakVet)
@@ -411,6 +444,9 @@ class CursesCommunicator():
     def eventOpsturenFailure(self):
         self.kprint(3, 23, "FAIL", self.tekstKleurRoodOpmaakVet)
     
+    def eventRccodeBekend(self, rccode):
+        pass
+    
     def eventTegoedenBekend(self, downloadpercentage, uploadpercentage):
         balkgetal_download = int(round(float(downloadpercentage) / 10.0))
         
@@ -21,11 +21,14 @@
 ## You should have received a copy of the GNU General Public License
 ## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
 
-import keyring                          ## Voor ophalen wachtwoord
 import getpass                          ## Voor invoer wachtwoord zonder print
 
+## keyring overloopt bij het importeren alle backends; dat is traag. We laden
+## het dus pas wanneer de keyring ook echt aangesproken wordt.
+
 class Credentials():
     def getset(self):
+        import keyring                  ## Voor ophalen wachtwoord
         if (keyring.get_password("kotnetcli", "gebruikersnaam") == None) or\
         (keyring.get_password("kotnetcli", "wachtwoord") == None):
             gebruikersnaam = raw_input("Voer uw s-nummer/r-nummer in... ")
@@ -39,6 +42,7 @@ class Credentials():
         return gebruikersnaam, wachtwoord
     
     def forget(self):
+        import keyring                  ## Voor ophalen wachtwoord
         try:                
             keyring.delete_password("kotnetcli", "gebruikersnaam")
             keyring.delete_password("kotnetcli", "wachtwoord")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import random                           ## Jitter op de backoff
+import time                             ## Wachten tussen controles
+import sys                              ## Basislib
+
+import errors                           ## Mislukte stappen
+import openmetrics                      ## Metrieken voor monitoring
+import pinger                           ## Verbinding controleren
+import statecache                       ## Uitkomst delen met andere oproepen
+import worker                           ## Eigenlijke loginmodule
+
+## Houdt een machine dag en nacht ingelogd vanuit één proces, in plaats van
+## een cron-lus die telkens een nieuwe interpreter start. Elke controle is
+## een goedkope peiling (ICMP/TCP, of één HTTP-verzoek met --portal-check).
+## Zolang we online blijven, verdubbelt het interval tot MAXINTERVAL; na een
+## verandering begint het terug bij MININTERVAL. Valt de sessie weg, dan
+## loggen we opnieuw in; mislukt dat, dan wachten we exponentieel langer met
+## volledige jitter (een willekeurige tijd tussen 0 en de grens), zodat een
+## zaal vol machines na een storing niet tegelijk op netlogin duikt.
+## Een verkeerd wachtwoord (rc-code 202) wordt niet beter door het opnieuw
+## te proberen: dan stopt de daemon met errors.VerkeerdWachtwoord.
+##
+## De browser, de verbindingspool (session.py), de TLS-sessie en het
+## formulierschema blijven tussen de controles warm.
+##
+## Alles wat de daemon doet, komt in openmetrics.register terecht: de duur
+## van elke stap, logins per rc-code, de tegoeden, de peilingen en de
+## herhaalde pogingen. Met `tekstbestand` wordt dat na elke controle ook
+## naar een bestand geschreven (zie openmetrics.py).
+##
+## Met een simulatie.Scenario komen de peilingen en logins uit het
+## scenario in plaats van van het netwerk, om de backoff en de metrieken
+## onder fouten door te meten (zie benchmarks/simulatie.py).
+
+MININTERVAL = 10
+MAXINTERVAL = 300
+BACKOFFBASIS = 5
+MAXBACKOFF = 900
+
+class Daemon():
+    def __init__(self, co, gebruikersnaam, wachtwoord, controle="ping", \
+    probeurl=pinger.PROBEURL, mininterval=MININTERVAL, \
+    maxinterval=MAXINTERVAL, stil=False, tekstbestand=None, scenario=None):
+        self.co = openmetrics.MetricsCommunicator(co, "login")
+        self.gebruikersnaam = gebruikersnaam
+        self.wachtwoord = wachtwoord
+        self.controle = controle
+        self.probeurl = probeurl
+        self.mininterval = mininterval
+        self.maxinterval = maxinterval
+        self.stil = stil
+        self.tekstbestand = tekstbestand
+        self.scenario = scenario
+        
+        self.browser = worker.nieuweBrowser()
+        self.interval = mininterval
+        self.fouten = 0
+        self.uitkomst = None
+    
+    def controleer(self):
+        ## Geeft de uitkomst terug en of de browser al op netlogin staat.
+        begin = openmetrics.tijdmeting.monotoon()
+        if self.scenario is not None:
+            uitkomst, browser = self.scenario.verbinding(), None
+        elif self.controle == "portaal":
+            uitkomst, browser = pinger.portaaldetectie(self.probeurl, \
+            browser=self.browser)
+        else:
+            uitkomst, browser = pinger.verbinding(), None
+        openmetrics.meetPeiling(self.controle, uitkomst, \
+        openmetrics.tijdmeting.monotoon() - begin)
+        return uitkomst, browser is not None
+    
+    def login(self, opNetlogin):
+        ## Geeft True terug als we ingelogd zijn. Bij rc-code 202 volgt
+        ## errors.VerkeerdWachtwoord.
+        begin = openmetrics.tijdmeting.monotoon()
+        if self.scenario is None:
+            kl = worker.Kotnetlogin(self.co, self.gebruikersnaam, \
+            self.wachtwoord, afsluiten=False, browser=self.browser)
+        else:
+            kl = worker.Simulatielogin(self.co, self.gebruikersnaam, \
+            self.wachtwoord, afsluiten=False, scenario=self.scenario)
+        kl.netloginGeladen = opNetlogin
+        try:
+            if not kl.snelinloggen():
+                kl.netlogin()
+                kl.kuleuven()
+                kl.gegevensinvoeren()
+                kl.gegevensopsturen()
+            kl.tegoeden()
+        except errors.StapMislukt:
+            openmetrics.meetLogin("login", None, \
+            duur=openmetrics.tijdmeting.monotoon() - begin)
+            return False
+        
+        openmetrics.meetLogin("login", kl.rccode, kl.resultaat, \
+        openmetrics.tijdmeting.monotoon() - begin)
+        if kl.rccode == 100:
+            statecache.bewaar(verbinding=pinger.ONLINE, rccode=kl.rccode, \
+            download=kl.downloadpercentage, upload=kl.uploadpercentage, \
+            gebruiker=self.gebruikersnaam, stroom="login")
+            return True
+        statecache.bewaar(verbinding=pinger.INLOGGEN, rccode=kl.rccode, \
+        gebruiker=self.gebruikersnaam, stroom="login")
+        if kl.rccode == 202:
+            raise errors.weigering(kl.rccode)
+        return False
+    
+    def backoff(self):
+        grens = min(MAXBACKOFF, BACKOFFBASIS * 2 ** self.fouten)
+        return random.uniform(0, grens)
+    
+    def stap(self):
+        ## Eén controle (en zo nodig een login). Geeft het aantal seconden
+        ## tot de volgende controle terug.
+        try:
+            return self.controleerEnLogin()
+        finally:
+            openmetrics.register.zet("kotnetcli_consecutive_failures", \
+            self.fouten)
+            if self.tekstbestand:
+                try:
+                    openmetrics.schrijfTekstbestand(self.tekstbestand)
+                except (IOError, OSError) as e:
+                    self.melding("metrieken niet geschreven: %s" % e)
+    
+    def controleerEnLogin(self):
+        ## Een mechanize.Browser onthoudt elke pagina in zijn geschiedenis;
+        ## in een proces dat nooit stopt, moet die weg.
+        self.browser.clear_history()
+        uitkomst, opNetlogin = self.controleer()
+        veranderd = uitkomst != self.uitkomst
+        self.uitkomst = uitkomst
+        
+        if uitkomst == pinger.INLOGGEN:
+            self.melding("sessie weg, opnieuw inloggen")
+            try:
+                ingelogd = self.login(opNetlogin)
+            except errors.VerkeerdWachtwoord:
+                self.melding("wachtwoord geweigerd (rc-code 202), daemon stopt")
+                raise
+            if ingelogd:
+                self.fouten = 0
+                self.interval = self.mininterval
+                self.uitkomst = pinger.ONLINE
+                return self.interval
+            self.fouten += 1
+            openmetrics.register.tel("kotnetcli_login_retries")
+            wachttijd = self.backoff()
+            self.melding("login mislukt (%d), opnieuw over %.0f s" % \
+            (self.fouten, wachttijd))
+            return wachttijd
+        
+        statecache.bewaarVerbinding(uitkomst)
+        if veranderd:
+            self.melding(uitkomst)
+            self.interval = self.mininterval
+        elif uitkomst == pinger.ONLINE:
+            self.interval = min(self.interval * 2, self.maxinterval)
+        return self.interval
+    
+    def melding(self, tekst):
+        if self.stil:
+            return
+        print "[%s] %s" % (time.strftime("%H:%M:%S"), tekst)
+        sys.stdout.flush()
+    
+    def draai(self):
+        while True:
+            time.sleep(self.stap())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import SocketServer                     ## Unix-socketserver met threads
+import threading                        ## Samenvoegen van verzoeken
+import socket                           ## Client en peercredentials
+import struct                           ## SO_PEERCRED ontleden
+import errno                            ## Achtergebleven socket herkennen
+import json                             ## Antwoorden
+import time                             ## Leeftijd van de toestand
+import sys                              ## Basislib
+import os                               ## Basislib
+
+import cachedir                         ## Standaardplaats van de socket
+import errors                           ## Fouten van de bibliotheek
+import pinger                           ## Uitkomsten van de controle
+import kotnetcli                        ## login(), logout() en status()
+
+## Op gedeelde machines vragen meerdere gebruikers en scripts geregeld de
+## toestand en de tegoeden op; elk van hen sprak tot nu toe zelf netlogin
+## aan. Met --serve houdt één proces de sessie en de tegoeden bij en
+## beantwoordt het verzoeken over een Unix-socket. Het protocol is één regel
+## per verzoek en één JSON-regel per antwoord, over dezelfde verbinding zo
+## vaak als nodig:
+##
+##      status      toestand van de verbinding
+##      quota       tegoeden (logt in als die nog niet gekend zijn)
+##      login       logt in
+##      logout      logt uit
+##
+## Binnen de TTL komt het antwoord rechtstreeks uit het geheugen. Identieke
+## verzoeken die tegelijk binnenkomen, wachten op hetzelfde resultaat in
+## plaats van elk netlogin aan te spreken.
+##
+## De socket ligt standaard in de cachemap van de gebruiker (0700, zie
+## cachedir.py) en krijgt de rechten van de umask: enkel de eigenaar kan hem
+## openen. Een socket die iedereen kan openen in een gedeelde map zoals /tmp
+## vraagt om een andere gebruiker die de naam eerst inpikt, en zou elke
+## gebruiker de sessie van de eigenaar laten starten. Wie de tegoeden toch
+## met anderen wil delen, kiest met --socket zelf een map en de rechten.
+## Ook dan mogen andere gebruikers (herkend via SO_PEERCRED, op Linux) enkel
+## status vragen en quota uit het geheugen; login, logout en een quota
+## waarvoor ingelogd zou moeten worden, zijn voor de eigenaar.
+
+SOCKET = "dienst.sock"
+TTL = 60
+VERZOEKEN = ["status", "quota", "login", "logout"]
+SO_PEERCRED = getattr(socket, "SO_PEERCRED", 17)
+
+class Vlucht():
+    def __init__(self):
+        self.klaar = threading.Event()
+        self.resultaat = None
+        self.fout = None
+
+class Dienst():
+    def __init__(self, gebruikersnaam, wachtwoord, controle="ping", \
+    probeurl=None, ttl=TTL):
+        self.gebruikersnaam = gebruikersnaam
+        self.wachtwoord = wachtwoord
+        self.controle = controle
+        self.probeurl = probeurl
+        self.ttl = ttl
+        
+        self.slot = threading.Lock()
+        self.sessieslot = threading.Lock()
+        self.vluchten = {}              ## verzoek -> Vlucht
+        self.toestand = {}
+        self.antwoord = None            ## self.toestand als JSON-regel
+    
+    def samen(self, naam, functie):
+        ## Voert functie() uit, tenzij hetzelfde verzoek al loopt; dan
+        ## wachten we op dat resultaat.
+        with self.slot:
+            vlucht = self.vluchten.get(naam)
+            leider = vlucht is None
+            if leider:
+                vlucht = self.vluchten[naam] = Vlucht()
+        
+        if leider:
+            try:
+                vlucht.resultaat = functie()
+            except Exception as e:
+                vlucht.fout = e
+            finally:
+                with self.slot:
+                    del self.vluchten[naam]
+                vlucht.klaar.set()
+        else:
+            vlucht.klaar.wait()
+        
+        if vlucht.fout is not None:
+            raise vlucht.fout
+        return vlucht.resultaat
+    
+    def bewaar(self, **velden):
+        velden["tijd"] = time.time()
+        antwoord = json.dumps(velden, sort_keys=True)
+        with self.slot:
+            self.toestand = velden
+            self.antwoord = antwoord
+        return antwoord
+    
+    def vers(self, voorwaarde=lambda toestand: True):
+        ## Geeft de bewaarde JSON-regel terug als die jonger is dan de TTL
+        ## en aan de voorwaarde voldoet.
+        with self.slot:
+            toestand, antwoord = self.toestand, self.antwoord
+        if antwoord is not None and time.time() - toestand["tijd"] < \
+        self.ttl and voorwaarde(toestand):
+            return antwoord
+        return None
+    
+    def status(self):
+        antwoord = self.vers()
+        if antwoord is not None:
+            return antwoord
+        def controleer():
+            uitkomst = kotnetcli.status(self.controle, \
+            self.probeurl).verbinding
+            with self.slot:
+                vorige = self.toestand
+            if uitkomst == pinger.ONLINE and vorige.get("rccode") == 100:
+                ## Nog steeds online: de tegoeden van de login blijven gelden.
+                return self.bewaar(verbinding=uitkomst, rccode=100, \
+                download=vorige["download"], upload=vorige["upload"])
+            return self.bewaar(verbinding=uitkomst)
+        return self.samen("status", controleer)
+    
+    def quota(self):
+        antwoord = self.vers(lambda toestand: toestand.get("rccode") == 100)
+        if antwoord is not None:
+            return antwoord
+        return self.login()
+    
+    def login(self):
+        def login():
+            with self.sessieslot:
+                tegoeden = kotnetcli.login(self.gebruikersnaam, \
+                self.wachtwoord)
+            return self.bewaar(verbinding=pinger.ONLINE, rccode=100, \
+            download=tegoeden.downloadpercentage, \
+            upload=tegoeden.uploadpercentage)
+        return self.samen("login", login)
+    
+    def logout(self):
+        def logout():
+            with self.sessieslot:
+                kotnetcli.logout(self.gebruikersnaam, self.wachtwoord)
+            return self.bewaar(verbinding=pinger.INLOGGEN)
+        return self.samen("logout", logout)
+    
+    def beantwoord(self, verzoek, uid=None):
+        if verzoek not in VERZOEKEN:
+            return json.dumps({"fout": "onbekend verzoek"})
+        if uid not in (None, 0, os.getuid()):
+            if verzoek in ("login", "logout"):
+                return json.dumps({"fout": "niet toegelaten"})
+            if verzoek == "quota":
+                return self.vers(lambda toestand: \
+                toestand.get("rccode") == 100) or \
+                json.dumps({"fout": "geen tegoeden gekend"})
+        try:
+            return getattr(self, verzoek)()
+        except errors.Geweigerd as e:
+            return json.dumps({"fout": type(e).__name__, "rccode": e.rccode})
+        except errors.StapMislukt as e:
+            return json.dumps({"fout": type(e).__name__, "stap": e.stap})
+        except Exception as e:
+            return json.dumps({"fout": str(e)})
+
+def peeruid(verbinding):
+    ## uid van het proces aan de andere kant, of None als het OS dat niet
+    ## kan zeggen.
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        gegevens = verbinding.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, \
+        struct.calcsize("3i"))
+        return struct.unpack("3i", gegevens)[1]
+    except socket.error:
+        return None
+
+class Verzoeken(SocketServer.StreamRequestHandler):
+    def handle(self):
+        uid = peeruid(self.connection)
+        while True:
+            ## readline() en niet "for lijn in rfile": die leest vooruit en
+            ## blokkeert tot de buffer vol is.
+            lijn = self.rfile.readline()
+            if not lijn:
+                return
+            self.wfile.write(self.server.dienst.beantwoord(lijn.strip(), \
+            uid) + "\n")
+
+class Server(SocketServer.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+def socketpad(pad=None):
+    return pad or cachedir.cachebestand(SOCKET)
+
+def maakServer(dienst, pad=None):
+    pad = socketpad(pad)
+    if os.path.exists(pad):
+        ## Een achtergebleven socket van een gestopte server ruimen we op;
+        ## luistert er nog iemand, dan stoppen we.
+        try:
+            vraag("status", pad)
+            raise RuntimeError("er luistert al een server op %s" % pad)
+        except socket.error as e:
+            if e.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+                raise
+            os.remove(pad)
+    
+    server = Server(pad, Verzoeken)
+    server.dienst = dienst
+    return server
+
+def serveer(dienst, pad=None):
+    server = maakServer(dienst, pad)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(server.server_address)
+
+def vraag(verzoek, pad=None):
+    ## Stuurt één verzoek naar een draaiende server en geeft het antwoord
+    ## als dict terug.
+    verbinding = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        verbinding.connect(socketpad(pad))
+        verbinding.sendall(verzoek + "\n")
+        antwoord = verbinding.makefile().readline()
+    finally:
+        verbinding.close()
+    return json.loads(antwoord)
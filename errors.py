@@ -0,0 +1,61 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Fouten die de bibliotheek (kotnetcli.login() en co.) opgooit in plaats
+## van het proces te stoppen. De commandolijn vangt ze op, toont een
+## melding en stopt met code 1.
+
+class KotnetFout(Exception):
+    pass
+
+class StapMislukt(KotnetFout):
+    ## Een stap van de worker (netlogin, kuleuven, invoeren, opsturen) liep
+    ## mis, meestal door een netwerkfout of een onverwachte pagina.
+    def __init__(self, stap):
+        KotnetFout.__init__(self, "stap %s mislukt" % stap)
+        self.stap = stap
+
+class Geweigerd(KotnetFout):
+    ## Netlogin antwoordde, maar met een andere rc-code dan verwacht.
+    def __init__(self, rccode, html=None):
+        KotnetFout.__init__(self, "rc-code %s" % rccode)
+        self.rccode = rccode
+        self.html = html
+
+class VerkeerdWachtwoord(Geweigerd):
+    ## rc=202
+    pass
+
+class AlIngelogd(Geweigerd):
+    ## rc=206: al ingelogd op een ander IP-adres.
+    pass
+
+class OnbekendeRccode(Geweigerd):
+    pass
+
+def weigering(rccode, html=None):
+    ## De passende Geweigerd-fout voor een rc-code.
+    klasse = {202: VerkeerdWachtwoord, 206: AlIngelogd}.get(rccode, \
+    OnbekendeRccode)
+    return klasse(rccode, html)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import re                               ## Basislib voor reguliere expressies
+import collections                      ## Voor namedtuple
+
+import httptrace                        ## Parse-stap voor --trace
+
+## netlogin verstopt de status van een login in HTML-commentaar:
+##
+##      <!-- weblogin: rc=100 -->
+##
+## en de tegoeden in het zevende en achtste commentaarblok (index 6 en 7),
+## telkens als "<resterend> ... <totaal>". In plaats van de hele pagina in
+## een BeautifulSoup-boom te gieten, lopen we één keer over de stukken die
+## binnenkomen en stoppen we zodra de rc-code en beide tegoeden gekend zijn.
+
+Tegoeden = collections.namedtuple("Tegoeden", ["rccode",
+    "download", "downloadtotaal", "downloadpercentage",
+    "upload", "uploadtotaal", "uploadpercentage"])
+
+GETAL = re.compile("\d+")
+DOWNLOADCOMMENTAAR = 6
+UPLOADCOMMENTAAR = 7
+STUKGROOTTE = 4096
+
+def percentage(resterend, totaal):
+    return int(round(float(resterend) / float(totaal) * 100, 0))
+
+class Extractor():
+    def __init__(self, prefix="weblogin", tegoeden=True):
+        self.rcpatroon = re.compile(prefix + ": rc=(\d+)")
+        self.tegoedenNodig = tegoeden
+        
+        self.buffer = ""
+        self.aantalcommentaren = 0
+        self.rccode = None
+        self.download = None            ## (resterend, totaal)
+        self.upload = None
+    
+    def klaar(self):
+        if self.rccode is None:
+            return False
+        ## Enkel een geslaagde login (rc=100) heeft tegoeden.
+        if not self.tegoedenNodig or self.rccode != 100:
+            return True
+        return self.download is not None and self.upload is not None
+    
+    def voed(self, stuk):
+        ## Verwerkt een stuk HTML. Geeft True terug zodra alles gekend is;
+        ## de rest van de pagina hoeft dan niet meer gelezen te worden.
+        self.buffer += stuk
+        while True:
+            begin = self.buffer.find("<!--")
+            if begin == -1:
+                ## "<!-" kan op de grens van twee stukken liggen.
+                self.buffer = self.buffer[-3:]
+                return self.klaar()
+            einde = self.buffer.find("-->", begin + 4)
+            if einde == -1:
+                self.buffer = self.buffer[begin:]
+                return self.klaar()
+            
+            self.commentaar(self.buffer[begin + 4:einde])
+            self.buffer = self.buffer[einde + 3:]
+            if self.klaar():
+                return True
+    
+    def commentaar(self, tekst):
+        index = self.aantalcommentaren
+        self.aantalcommentaren += 1
+        
+        if self.rccode is None:
+            m = self.rcpatroon.search(tekst)
+            if m:
+                self.rccode = int(m.group(1))
+        
+        if index == DOWNLOADCOMMENTAAR:
+            self.download = self.getallen(tekst)
+        elif index == UPLOADCOMMENTAAR:
+            self.upload = self.getallen(tekst)
+    
+    def getallen(self, tekst):
+        m = GETAL.findall(tekst)
+        if len(m) < 2 or int(m[1]) == 0:
+            return None
+        return int(m[0]), int(m[1])
+    
+    def resultaat(self):
+        download = self.download or (None, None)
+        upload = self.upload or (None, None)
+        return Tegoeden(self.rccode,
+            download[0], download[1],
+            percentage(*download) if self.download else None,
+            upload[0], upload[1],
+            percentage(*upload) if self.upload else None)
+
+def lees(respons, prefix="weblogin", tegoeden=True, stukgrootte=STUKGROOTTE):
+    ## Leest een (mechanize-)respons in stukken tot alles gekend is.
+    extractor = Extractor(prefix, tegoeden)
+    with httptrace.stap("extractor", prefix=prefix):
+        while True:
+            stuk = respons.read(stukgrootte)
+            if not stuk or extractor.voed(stuk):
+                break
+        return extractor.resultaat()
+
+def verwerk(html, prefix="weblogin", tegoeden=True):
+    extractor = Extractor(prefix, tegoeden)
+    extractor.voed(html)
+    return extractor.resultaat()
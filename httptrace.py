@@ -0,0 +1,185 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import collections                      ## Wachtrij van de schrijver
+import threading                        ## Schrijver in de achtergrond
+import socket                           ## Zelf verbinden, per fase
+import atexit                           ## Laatste lijnen wegschrijven
+import json                             ## Eén JSON-object per lijn
+import time                             ## Tijdstip van een lijn
+import sys                              ## stderr
+
+import tijdmeting                       ## Monotone klok
+
+## Met --trace schrijft kotnetcli één JSON-lijn per HTTP-verzoek van de
+## workers (zie session.py) en per parse-stap, bv.
+##
+##      {"soort": "http", "methode": "POST", "url": "https://...",
+##       "status": 200, "bytes_uit": 812, "bytes_in": 5120,
+##       "hergebruikt": false, "dns": 1.2, "verbinden": 3.4, "tls": 21.0,
+##       "ttfb": 40.2, "overdracht": 0.3, "totaal": 66.1, "tijd": ...}
+##
+## met alle duren in milliseconden. Een hergebruikte verbinding heeft geen
+## dns, verbinden of tls. De lijnen gaan eerst in een wachtrij; een thread
+## in de achtergrond zet ze om naar JSON en schrijft ze weg, zodat de login
+## zelf enkel een dict aanmaakt. Zonder --trace is schrijver None en kost
+## dit alles één vergelijking per verzoek.
+
+INTERVAL = 0.5                          ## Seconden tussen twee schrijfbeurten
+
+schrijver = None
+klok = tijdmeting.monotoon
+
+class Schrijver():
+    def __init__(self, bestand, interval=INTERVAL):
+        self.bestand = bestand
+        self.interval = interval
+        self.wachtrij = collections.deque()
+        self.slot = threading.Lock()
+        self.gestopt = threading.Event()
+        draad = threading.Thread(target=self.draai)
+        draad.daemon = True
+        draad.start()
+    
+    def schrijf(self, lijn):
+        ## deque.append is atomair: geen slot nodig op het snelle pad.
+        lijn["tijd"] = time.time()
+        self.wachtrij.append(lijn)
+    
+    def leeg(self):
+        with self.slot:
+            lijnen = []
+            while True:
+                try:
+                    lijnen.append(json.dumps(self.wachtrij.popleft(), \
+                    sort_keys=True))
+                except IndexError:
+                    break
+            if lijnen and not self.bestand.closed:
+                self.bestand.write("\n".join(lijnen) + "\n")
+                self.bestand.flush()
+    
+    def draai(self):
+        while not self.gestopt.wait(self.interval):
+            self.leeg()
+    
+    def sluit(self):
+        self.gestopt.set()
+        self.leeg()
+        if self.bestand is not sys.stderr:
+            self.bestand.close()
+
+def aan(pad):
+    ## Zet de trace aan naar pad ("-" voor stderr).
+    global schrijver
+    if pad == "-":
+        bestand = sys.stderr
+    else:
+        bestand = open(pad, "a")
+    schrijver = Schrijver(bestand)
+    atexit.register(schrijver.sluit)
+
+def ms(duur):
+    return round(duur * 1000, 3)
+
+def verbind(h):
+    ## Doet wat HTTPConnection.connect() en HTTPSConnection.connect() doen
+    ## (zonder proxytunnel), maar meet DNS, TCP en TLS apart. Geeft de
+    ## duren in milliseconden terug.
+    fasen = {}
+    begin = klok()
+    adressen = socket.getaddrinfo(h.host, h.port, 0, socket.SOCK_STREAM)
+    fasen["dns"] = ms(klok() - begin)
+    
+    begin = klok()
+    sock = None
+    fout = socket.error("getaddrinfo gaf geen adressen")
+    for familie, soort, protocol, naam, adres in adressen:
+        try:
+            sock = socket.socket(familie, soort, protocol)
+            if h.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(h.timeout)
+            if h.source_address:
+                sock.bind(h.source_address)
+            sock.connect(adres)
+            break
+        except socket.error as e:
+            fout = e
+            if sock is not None:
+                sock.close()
+                sock = None
+    if sock is None:
+        raise fout
+    fasen["verbinden"] = ms(klok() - begin)
+    
+    context = getattr(h, "_context", None)
+    if context is not None:
+        begin = klok()
+        sock = context.wrap_socket(sock, server_hostname=h.host)
+        fasen["tls"] = ms(klok() - begin)
+    h.sock = sock
+    return fasen
+
+def telVerzonden(h):
+    ## Vanaf nu telt h.verzonden de bytes die h verstuurt.
+    if "send" not in h.__dict__:
+        origineel = h.send
+        def send(data):
+            if isinstance(data, basestring):
+                h.verzonden += len(data)
+            origineel(data)
+        h.send = send
+    h.verzonden = 0
+
+class Stap():
+    def __init__(self, naam, velden):
+        self.naam = naam
+        self.velden = velden
+    
+    def __enter__(self):
+        self.begin = klok()
+        return self
+    
+    def __exit__(self, soort, fout, traceback):
+        lijn = {"soort": "parse", "stap": self.naam, \
+        "duur": ms(klok() - self.begin)}
+        lijn.update(self.velden)
+        if fout is not None:
+            lijn["fout"] = str(fout) or soort.__name__
+        schrijver.schrijf(lijn)
+
+class Niets():
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, soort, fout, traceback):
+        pass
+
+NIETS = Niets()
+
+def stap(naam, **velden):
+    ## with httptrace.stap("formulier"): ... schrijft één parse-lijn.
+    if schrijver is None:
+        return NIETS
+    return Stap(naam, velden)
@@ -22,19 +22,21 @@
 ## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
 
 import subprocess                       ## Om systeemcommando's uit te voeren
+import collections                      ## Voor namedtuple
 import argparse                         ## Parst argumenten
 import platform                         ## Om te kunnen compileren op Windows
 import sys                              ## Basislib
 import os                               ## Basislib
 
-import communicator                     ## Voor output op maat
-from credentials import Credentials     ## Opvragen van nummer en wachtwoord
-import worker                           ## Eigenlijke loginmodule
-from pinger import ping                 ## Checken of we op KUL-net zitten
+## communicator, credentials, worker en pinger worden pas geïmporteerd nadat
+## argumentenParser() gelopen heeft. Zo laden we enkel wat de gekozen vlaggen
+## ook echt nodig hebben (zie benchmarks/startup.py).
 
 version = "1.3.0-dev"
 
 def main(co, gebruikersnaam, wachtwoord, actie="inloggen"):
+    import worker                       ## Eigenlijke loginmodule
+    from pinger import ping             ## Checken of we op KUL-net zitten
     if actie == "inloggen":
         #ping(co)
         kl = worker.Kotnetlogin(co, gebruikersnaam, wachtwoord)
@@ -52,56 +54,339 @@ def main(co, gebruikersnaam, wachtwoord, actie="inloggen"):
     kl.gegevensopsturen()
     kl.tegoeden()
 
-def mainLoginprocedure(co, gebruikersnaam, wachtwoord, dummy=False):
-    kl = worker.Kotnetlogin(co, gebruikersnaam, wachtwoord)
-    if dummy == True:
-        kl = worker.Dummylogin(co, gebruikersnaam, wachtwoord)
-        ## kl remains Kotnetlogin if dummy mode is not activated.
+############## Bibliotheek ##############
+## login(), logout(), force_login() en status() kunnen ook vanuit een ander
+## programma gebruikt worden (import kotnetcli). Ze stoppen het proces nooit:
+## een mislukte stap of een weigering van netlogin wordt een uitzondering
+## uit errors.py. Zonder communicator tonen ze niets.
+
+Status = collections.namedtuple("Status", \
+["verbinding", "rccode", "download", "upload"])
+
+def stilleCommunicator(co):
+    if co is None:
+        import communicator
+        co = communicator.QuietCommunicator()
+    return co
+
+def resultaatVan(kl):
+    ## Geeft de tegoeden van een login terug of gooit de passende fout op.
+    import errors
+    if kl.rccode == 100:
+        return kl.resultaat
+    elif kl.rccode in (202, 206):
+        raise errors.weigering(kl.rccode)
+    ## Een simulatieworker heeft geen browser en dus geen pagina.
+    html = kl.browser.response().read() if hasattr(kl, "browser") else None
+    raise errors.weigering(kl.rccode, html)
+
+def login(gebruikersnaam, wachtwoord, co=None, browser=None, bron=None):
+    ## Logt in en geeft de tegoeden terug (een extractor.Tegoeden).
+    import worker                       ## Eigenlijke loginmodule
+    kl = worker.Kotnetlogin(stilleCommunicator(co), gebruikersnaam, \
+    wachtwoord, browser=browser, bron=bron)
+
+    ## Eerst proberen we rechtstreeks te posten met het bewaarde
+    ## formulierschema; lukt dat niet, dan doorlopen we alle stappen.
+    if not kl.snelinloggen():
+        kl.netlogin()
+        kl.kuleuven()
+        kl.gegevensinvoeren()
+        kl.gegevensopsturen()
+    kl.tegoeden()
+    bewaarToestand(kl, "login")
+    return resultaatVan(kl)
+
+def force_login(gebruikersnaam, wachtwoord, co=None, browser=None):
+    ## Zoals login(), maar logt eerst alle andere IP-adressen uit.
+    import worker                       ## Eigenlijke loginmodule
+    kl = worker.Kotnetlogin(stilleCommunicator(co), gebruikersnaam, \
+    wachtwoord, afsluiten=False, browser=browser)
+
+    ## Alles gebeurt in één sessie: inloggen, bij rc=206 alle andere
+    ## sessies tegelijk uitloggen en daarna hetzelfde loginformulier nog
+    ## één keer opsturen.
+    if not kl.snelinloggen():
+        kl.netlogin()
+        kl.kuleuven()
+        kl.gegevensinvoeren()
+        kl.gegevensopsturen()
+    if kl.tegoeden() == False:
+        ## Andere apparaten uitloggen
+        worker.loguitParallel(gebruikersnaam, wachtwoord, \
+        kl.uitteloggenipsophalen())
+
+        ## Conventionele login
+        kl.opnieuwOpsturen()
+        kl.tegoeden()
+    bewaarToestand(kl, "force_login")
+    return resultaatVan(kl)
+
+def logout(gebruikersnaam, wachtwoord, co=None, interface=None, ip=None):
+    ## Logt dit IP-adres (of het opgegeven) uit. rccode 207 in het
+    ## resultaat betekent dat we al uitgelogd waren.
+    import worker                       ## Eigenlijke loginmodule
+    import statecache
+    import pinger
+    import errors
+    kl = worker.Kotnetloguit(stilleCommunicator(co), gebruikersnaam, \
+    wachtwoord, uitteloggenip=ip, interface=interface)
 
     kl.netlogin()
     kl.kuleuven()
     kl.gegevensinvoeren()
     kl.gegevensopsturen()
     kl.tegoeden()
+    statecache.bewaarVerbinding(pinger.INLOGGEN)
+    if kl.rccode not in (100, 207):
+        raise errors.OnbekendeRccode(kl.rccode, kl.browser.response().read())
+    return kl.resultaat._replace(rccode=kl.rccode)
+
+def status(controle="ping", probeurl=None, ttl=0):
+    ## Geeft de toestand van de verbinding terug. Met ttl > 0 mag een
+    ## bewaarde toestand van hoogstens ttl seconden oud gebruikt worden;
+    ## enkel dan zijn ook de tegoeden gekend.
+    import statecache
+    import pinger
+    if ttl > 0:
+        toestand = statecache.lees(ttl)
+        if toestand is not None and "verbinding" in toestand:
+            return Status(toestand["verbinding"], toestand.get("rccode"), \
+            toestand.get("download"), toestand.get("upload"))
+
+    if controle == "portaal":
+        uitkomst = pinger.portaaldetectie(probeurl or pinger.PROBEURL)[0]
+    else:
+        uitkomst = pinger.verbinding()
+    statecache.bewaarVerbinding(uitkomst)
+    return Status(uitkomst, None, None, None)
 
-def mainLoguitprocedure(co, gebruikersnaam, wachtwoord, dummy=False):
-    kl = worker.Kotnetloguit(co, gebruikersnaam, wachtwoord)
-    if dummy == True:
-        kl = worker.Dummyloguit(co, gebruikersnaam, wachtwoord)
+############## Commandolijn ##############
 
+def mainLoginprocedure(co, gebruikersnaam, wachtwoord, dummy=False, \
+browser=None, scenario=None):
+    if dummy == False:
+        return login(gebruikersnaam, wachtwoord, co=co, browser=browser)
+
+    import worker                       ## Eigenlijke loginmodule
+    kl = worker.Dummylogin(co, gebruikersnaam, wachtwoord, scenario=scenario)
     kl.netlogin()
     kl.kuleuven()
     kl.gegevensinvoeren()
     kl.gegevensopsturen()
     kl.tegoeden()
-
-def mainForceerLoginprocedure(co, gebruikersnaam, wachtwoord, dummy=False):
-    kl = worker.Kotnetlogin(co, gebruikersnaam, wachtwoord, afsluiten=False)
-
-    ## IP van uit te loggen apparaat opzoeken
+    return resultaatVan(kl)
+
+def bewaarToestand(kl, stroom):
+    ## Onthoudt de uitkomst van een login voor volgende oproepen (zie
+    ## statecache.py), samen met de gebruiker en de stroom (login of
+    ## force_login) waarvoor ze geldt.
+    import statecache
+    import pinger
+    if kl.rccode == 100:
+        import tijdreeks
+        statecache.bewaar(verbinding=pinger.ONLINE, rccode=kl.rccode, \
+        download=kl.downloadpercentage, upload=kl.uploadpercentage, \
+        gebruiker=kl.gebruikersnaam, stroom=stroom)
+        try:
+            tijdreeks.voegtoe(kl.resultaat)
+        except (IOError, OSError):
+            pass
+    else:
+        statecache.bewaar(verbinding=pinger.INLOGGEN, rccode=kl.rccode, \
+        gebruiker=kl.gebruikersnaam, stroom=stroom)
+
+def gedeeldeLogin(co, stroom, procedure, gebruikersnaam, wachtwoord, \
+**kwargs):
+    ## Gelijktijdige kotnetcli's delen één login: wie het slot niet krijgt,
+    ## wacht en krijgt dezelfde uitkomst als de login die al bezig was, ook
+    ## als die geweigerd werd of misliep. Dat geldt enkel voor dezelfde
+    ## gebruiker en dezelfde stroom (zie singleflight.py).
+    import singleflight
+    import errors
+    slot = singleflight.Slot(gebruiker=gebruikersnaam, stroom=stroom)
+    gedeeld = slot.verkrijg()
+    if gedeeld is not None:
+        co.eventRccodeBekend(gedeeld.get("rccode"))
+        if gedeeld.get("rccode") == 100:
+            co.eventTegoedenBekend(gedeeld["download"], gedeeld["upload"])
+        co.beeindig_sessie()
+        if gedeeld.get("stap") is not None:
+            raise errors.StapMislukt(gedeeld["stap"])
+        if gedeeld.get("rccode") != 100:
+            raise errors.weigering(gedeeld.get("rccode"))
+        return
+
+    try:
+        tegoeden = procedure(co, gebruikersnaam, wachtwoord, **kwargs)
+    except errors.StapMislukt as e:
+        slot.publiceer(stap=e.stap)
+        raise
+    except errors.Geweigerd as e:
+        slot.publiceer(rccode=e.rccode)
+        raise
+    else:
+        slot.publiceer(rccode=tegoeden.rccode, \
+        download=tegoeden.downloadpercentage, \
+        upload=tegoeden.uploadpercentage)
+    finally:
+        slot.vrijgeven()
+
+def mainLoguitprocedure(co, gebruikersnaam, wachtwoord, dummy=False, \
+interface=None, scenario=None):
+    if dummy == False:
+        if logout(gebruikersnaam, wachtwoord, co=co, \
+        interface=interface).rccode == 207:
+            print "U had uzelf reeds succesvol uitgelogd."
+        return
+
+    import worker                       ## Eigenlijke loginmodule
+    kl = worker.Dummyloguit(co, gebruikersnaam, wachtwoord, scenario=scenario)
     kl.netlogin()
     kl.kuleuven()
     kl.gegevensinvoeren()
     kl.gegevensopsturen()
-    if kl.tegoeden() == False:
-        uitteloggenip = kl.uitteloggenipophalen()
-        print uitteloggenip
-
-        ## Ander apparaat uitloggen
-        kl = worker.Kotnetloguit(co, gebruikersnaam, wachtwoord, uitteloggenip=uitteloggenip)
-        kl.netlogin()
-        kl.kuleuven()
-        kl.gegevensinvoeren()
-        kl.gegevensopsturen()
-        kl.tegoeden()
-
-        ## Conventionele login
-        kl = worker.Kotnetlogin(co, gebruikersnaam, wachtwoord)
-        kl.netlogin()
-        kl.kuleuven()
-        kl.gegevensinvoeren()
-        kl.gegevensopsturen()
-        kl.tegoeden()
+    kl.tegoeden()
+    if kl.rccode == 207:
+        print "U had uzelf reeds succesvol uitgelogd."
+    elif kl.rccode != 100:
+        import errors
+        raise errors.OnbekendeRccode(kl.rccode)
+
+def mainForceerLoginprocedure(co, gebruikersnaam, wachtwoord, dummy=False, \
+browser=None):
+    return force_login(gebruikersnaam, wachtwoord, co=co, browser=browser)
+
+def mainMonitorprocedure(gebruikersnaam, wachtwoord, interval, stil=False):
+    ## Vraagt elke `interval` seconden de tegoeden op; login() voegt elke
+    ## meting aan de reeks toe (zie tijdreeks.py).
+    import errors
+    import time
+    while True:
+        try:
+            tegoeden = login(gebruikersnaam, wachtwoord)
+            melding = "download %d%%, upload %d%%" % \
+            (tegoeden.downloadpercentage, tegoeden.uploadpercentage)
+        except errors.KotnetFout as e:
+            melding = str(e)
+        if not stil:
+            print "[%s] %s" % (time.strftime("%Y-%m-%d %H:%M:%S"), melding)
+            sys.stdout.flush()
+        time.sleep(interval)
+
+def toonGeschiedenis(van=None, tot=None, stap=None):
+    import tijdreeks
+    import time
+    with tijdreeks.Reeks() as reeks:
+        metingen = reeks.bereik(van, tot)
+        if stap:
+            metingen = tijdreeks.per(metingen, stap)
+        for meting in metingen:
+            print "%s  download %5d MB %3d%%  upload %5d MB %3d%%" % \
+            (time.strftime("%Y-%m-%d %H:%M", time.localtime(meting.tijd)), \
+            meting.download, meting.downloadpercentage, meting.upload, \
+            meting.uploadpercentage)
+
+def toonVoorspelling(vensters, horizon):
+    import tijdreeks
+    import voorspelling
+    import time
+    def tijdstip(moment):
+        if moment is None:
+            return "raakt niet op"
+        return time.strftime("%a %Y-%m-%d %H:%M", time.localtime(moment))
+    
+    with tijdreeks.Reeks() as reeks:
+        if len(reeks) == 0:
+            print "Nog geen tegoeden opgemeten (zie --monitor)."
+            return
+        laatste = reeks[-1]
+        schattingen = voorspelling.schat(reeks, vensters)
+    
+    for naam, over, percentage in (("download", laatste.download, \
+    laatste.downloadpercentage), ("upload", laatste.upload, \
+    laatste.uploadpercentage)):
+        print "%s: %d MB over (%d%%) op %s" % (naam, over, percentage, \
+        time.strftime("%Y-%m-%d %H:%M", time.localtime(laatste.tijd)))
+        for schatting in schattingen:
+            verbruik = getattr(schatting, naam)
+            if verbruik is None:
+                print "  %4d u: te weinig metingen (%d)" % \
+                (schatting.venster, schatting.metingen)
+                continue
+            print "  %4d u: %8.1f MB/u, %s" % (schatting.venster, verbruik, \
+            tijdstip(voorspelling.opTijdstip(laatste, over, verbruik)))
+        print "  budget: %.1f MB/u om %g u toe te komen" % \
+        (voorspelling.budget(over, horizon), horizon)
+
+def scenario(pad):
+    ## Het scenario voor de dummy-workers (zie simulatie.py), of None voor
+    ## het standaardgedrag.
+    if pad is None:
+        return None
+    import simulatie
+    return simulatie.laad(pad)
+
+def uren(tekst):
+    ## argparse-type voor --window: uren, gescheiden door komma's.
+    try:
+        vensters = [int(deel) for deel in tekst.split(",") if deel.strip()]
+    except ValueError:
+        vensters = []
+    if not vensters or min(vensters) <= 0:
+        raise argparse.ArgumentTypeError("geen lijst van uren: %s" % tekst)
+    return vensters
+
+def datum(tekst):
+    ## argparse-type voor --from en --to: een datum met optioneel een uur.
+    import datetime
+    import time
+    for formaat in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(datetime.datetime.strptime(tekst, \
+            formaat).timetuple())
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError("geen datum: %s" % tekst)
+
+def positief(soort):
+    ## argparse-type voor --pool en --rate: een getal groter dan nul.
+    def omzetten(tekst):
+        try:
+            waarde = soort(tekst)
+        except ValueError:
+            waarde = 0
+        if not 0 < waarde < float("inf"):
+            raise argparse.ArgumentTypeError("geen positief getal: %s" % \
+            tekst)
+        return waarde
+    return omzetten
+
+def commandolijn():
+    ## Zet de fouten van de bibliotheek om in een melding en exitcode 1.
+    import errors
+    try:
+        aanstuurderObvArgumenten(argumentenParser())
+    except errors.StapMislukt:
+        ## De communicator heeft de mislukte stap al getoond.
+        exit(1)
+    except errors.VerkeerdWachtwoord:
+        print "Uw logingegevens kloppen niet. Gebruik kotnetcli " + \
+        "--forget om deze te resetten."
+        exit(1)
+    except errors.AlIngelogd:
+        print "U bent al ingelogd op een ander IP-adres. Gebruik " + \
+        "kotnetcli --force-login om u toch in te loggen."
+        exit(1)
+    except errors.OnbekendeRccode as e:
+        if e.html is not None:
+            print e.html
+        print "\nrc-code onbekend. Stuur bovenstaande informatie naar"
+        print "gijs.timmers@student.kuleuven.be om ondersteuning te krijgen."
+        exit(1)
+    except errors.KotnetFout as e:
+        print e
+        exit(1)
 
 ## An argument parse action that prints license information
 ##  on stdout and exits
@@ -136,6 +421,7 @@ def argumentenParser():
     workergroep = parser.add_mutually_exclusive_group()
     credentialsgroep = parser.add_mutually_exclusive_group()
     communicatorgroep = parser.add_mutually_exclusive_group()
+    controlegroep = parser.add_mutually_exclusive_group()
 
     ## Then, we create three dests: worker, credentials and communicator.
     ## The value to each of these dests depends on the flags the user applies.
@@ -164,6 +450,37 @@ def argumentenParser():
     help="Performs a dry-run logging out",\
     action="store_const", dest="worker", const="dummy_logout")
 
+    workergroep.add_argument("-D", "--daemon",\
+    help="Stays running and logs you in again whenever the session drops",\
+    action="store_const", dest="worker", const="daemon")
+
+    workergroep.add_argument("-S", "--serve",\
+    help="Answers status, quota, login and logout requests from other \
+    processes over a Unix socket",\
+    action="store_const", dest="worker", const="dienst")
+
+    workergroep.add_argument("-a", "--ask",\
+    help="Asks a running --serve process and prints its JSON answer",\
+    dest="vraag", choices=["status", "quota", "login", "logout"])
+
+    workergroep.add_argument("-M", "--monitor",\
+    help="Stays running and records your quota every --interval seconds",\
+    action="store_const", dest="worker", const="monitor")
+
+    workergroep.add_argument("-H", "--history",\
+    help="Prints the recorded quota (see --from, --to and --every)",\
+    action="store_true", dest="geschiedenis")
+
+    workergroep.add_argument("-F", "--forecast",\
+    help="Estimates from the recorded quota when it will run out (see \
+    --window and --horizon)",\
+    action="store_true", dest="voorspelling")
+
+    workergroep.add_argument("-B", "--batch",\
+    help="Logs in every account listed in BESTAND (lines of \
+    username,password[,source IP or interface])",\
+    dest="batch", metavar="BESTAND")
+
     credentialsgroep.add_argument("-k", "--keyring",\
     help="Makes kotnetcli pick up your credentials from the keyring (default)",\
     action="store_const", dest="credentials", const="keyring", \
@@ -213,11 +530,161 @@ def argumentenParser():
     help="Hides all output",\
     action="store_const", dest="communicator", const="quiet")
 
+    ## Optioneel eerst nagaan of we wel moeten inloggen. Zonder vlag loggen
+    ## we meteen in.
+    controlegroep.add_argument("-p", "--ping",\
+    help="Checks the connection by probing netlogin and toledo first",\
+    action="store_const", dest="controle", const="ping", default="geen")
+
+    controlegroep.add_argument("-w", "--portal-check",\
+    help="Checks the connection with a single HTTP request first",\
+    action="store_const", dest="controle", const="portaal")
+
+    parser.add_argument("--probe-url",\
+    help="URL used by --portal-check (default: http://toledo.kuleuven.be/)",\
+    dest="probeurl", metavar="URL")
+
+    parser.add_argument("--interface",\
+    help="Logs out the address of this network interface (default: the \
+    interface on the route to netlogin)",\
+    dest="interface", metavar="INTERFACE")
+
+    parser.add_argument("--pool",\
+    help="Number of simultaneous logins in --batch mode (default: 4)",\
+    type=positief(int), dest="pool", default=4, metavar="N")
+
+    parser.add_argument("--rate",\
+    help="Maximum logins started per second in --batch mode (default: 5)",\
+    type=positief(float), dest="tempo", default=5.0, metavar="PER_SECONDE")
+
+    ## Het resultaat van de vorige oproep wordt even bijgehouden.
+    parser.add_argument("-r", "--refresh",\
+    help="Ignores the cached connection state and asks the network again",\
+    action="store_true", dest="refresh")
+
+    parser.add_argument("--cache-ttl",\
+    help="Seconds during which the cached state is used (default: 60)",\
+    type=int, dest="cachettl", default=60, metavar="SECONDEN")
+
+    parser.add_argument("--socket",\
+    help="Unix socket used by --serve and --ask (default: dienst.sock in \
+    the cache directory)",\
+    dest="socket", metavar="PAD")
+
+    parser.add_argument("--interval",\
+    help="Seconds between two quota samples in --monitor mode (default: \
+    300)",\
+    type=int, dest="interval", default=300, metavar="SECONDEN")
+
+    parser.add_argument("--from",\
+    help="First moment shown by --history (YYYY-MM-DD [HH:MM])",\
+    type=datum, dest="van", metavar="DATUM")
+
+    parser.add_argument("--to",\
+    help="Moment up to which --history shows samples (YYYY-MM-DD [HH:MM])",\
+    type=datum, dest="tot", metavar="DATUM")
+
+    parser.add_argument("--every",\
+    help="Shows only the last sample of every period of this many seconds \
+    in --history",\
+    type=int, dest="stap", metavar="SECONDEN")
+
+    parser.add_argument("--window",\
+    help="Comma-separated windows in hours over which --forecast fits the \
+    consumption (default: 6,24,168)",\
+    type=uren, dest="vensters", metavar="UREN", default=[6, 24, 168])
+
+    parser.add_argument("--horizon",\
+    help="Number of hours the quota has to last for the budget shown by \
+    --forecast (default: 24)",\
+    type=float, dest="horizon", metavar="UREN", default=24)
+
+    parser.add_argument("--max-interval",\
+    help="Longest time between two checks in --daemon mode (default: 300)",\
+    type=int, dest="maxinterval", default=300, metavar="SECONDEN")
+
+    parser.add_argument("--metrics-port",\
+    help="Serves OpenMetrics on http://127.0.0.1:POORT/metrics in --daemon \
+    mode",\
+    type=int, dest="metriekpoort", metavar="POORT")
+
+    parser.add_argument("--metrics-file",\
+    help="Rewrites this file for the node_exporter textfile collector after \
+    every check in --daemon mode",\
+    dest="metriekbestand", metavar="PAD")
+
+    parser.add_argument("--trace",\
+    help="Appends one JSON line per HTTP exchange and parse step to PAD \
+    (- for stderr)",\
+    dest="trace", metavar="PAD")
+
+    parser.add_argument("--record",\
+    help="Records every HTTP exchange, with credentials, cookies and IP \
+    addresses scrubbed, into the cassette PAD",\
+    dest="opname", metavar="PAD")
+
+    parser.add_argument("--replay",\
+    help="Answers every HTTP request from the cassette PAD instead of the \
+    network",\
+    dest="afspelen", metavar="PAD")
+
+    parser.add_argument("--simulation",\
+    help="Runs --dummy-login and --dummy-logout with the latencies, \
+    failures, rc codes and quota of the scenario in PAD",\
+    dest="simulatie", metavar="PAD")
+
+    parser.add_argument("--timings",\
+    help="Times every step of a login, forced login or logout and prints \
+    them next to the p50/p95/p99 of earlier runs",\
+    action="store_true", dest="timings")
+
     argumenten = parser.parse_args()
     return(argumenten)
 
 def aanstuurderObvArgumenten(argumenten):
+    if argumenten.trace:
+        import httptrace
+        httptrace.aan(argumenten.trace)
+    if argumenten.opname or argumenten.afspelen:
+        import cassette
+        if argumenten.afspelen:
+            cassette.speelAf(argumenten.afspelen)
+        if argumenten.opname:
+            cassette.neemOp(argumenten.opname)
+
+    ############## 0. batch mode: credentials come from a file ##############
+    if argumenten.batch:
+        print "ik wil een hele klas inloggen"
+        import batch
+        batch.toon(batch.batch(batch.leesAccounts(argumenten.batch), \
+        argumenten.pool, argumenten.tempo))
+        exit(0)
+
+    ############## 0b. ask a running server instead ##############
+    if argumenten.vraag:
+        import dienst
+        import socket
+        import json
+        try:
+            print json.dumps(dienst.vraag(argumenten.vraag, argumenten.socket))
+        except socket.error:
+            print "Geen kotnetcli --serve bereikbaar op %s." % \
+            dienst.socketpad(argumenten.socket)
+            exit(1)
+        exit(0)
+
+    ############## 0c. show the recorded quota ##############
+    if argumenten.geschiedenis:
+        toonGeschiedenis(argumenten.van, argumenten.tot, argumenten.stap)
+        exit(0)
+
+    ############## 0d. forecast the quota ##############
+    if argumenten.voorspelling:
+        toonVoorspelling(argumenten.vensters, argumenten.horizon)
+        exit(0)
+
     ############## 1. parse credential-related flags ##############
+    from credentials import Credentials ## Opvragen van nummer en wachtwoord
     cr = Credentials()
     #print argumenten.__dict__
     if argumenten.worker == "dummy_login" or argumenten.worker == "dummy_logout":
@@ -239,6 +706,7 @@ def aanstuurderObvArgumenten(argumenten):
             gebruikersnaam, wachtwoord = cr.guest()
 
     ############## 2. switch on communicator-related flags ##############
+    import communicator                 ## Voor output op maat
     if argumenten.communicator == "curses":
         print "ik wil vloeken"
         if os.name == "posix":
@@ -280,25 +748,102 @@ def aanstuurderObvArgumenten(argumenten):
         print "ik wil zwijgen"
         co = communicator.QuietCommunicator()
 
-    ############## 3. switch on login-type flags ##############
+    ############## 3. switch on connection-check flags ##############
+    browser = None
+    if argumenten.worker in ("login", "force_login"):
+        import statecache
+        toestand = {}
+        if not argumenten.refresh:
+            toestand = statecache.lees(argumenten.cachettl) or {}
+
+        ## Enkel een gewone login van dezelfde gebruiker mag uit de cache
+        ## antwoorden: --force-login moet echt inloggen, en --guest-mode of
+        ## een andere account mag de tegoeden van deze niet te zien krijgen.
+        if argumenten.worker == "login" and \
+        toestand.get("rccode") == 100 and \
+        toestand.get("gebruiker") == gebruikersnaam and \
+        toestand.get("stroom") == "login":
+            print "ik weet het nog"
+            co.eventTegoedenBekend(toestand["download"], toestand["upload"])
+            co.beeindig_sessie()
+            exit(0)
+
+        if argumenten.controle != "geen":
+            import pinger
+            uitkomst = toestand.get("verbinding")
+            if uitkomst is None and argumenten.controle == "ping":
+                print "ik wil eerst pingen"
+                uitkomst = pinger.verbinding()
+                statecache.bewaarVerbinding(uitkomst)
+
+            elif uitkomst is None and argumenten.controle == "portaal":
+                print "ik wil eerst aankloppen"
+                uitkomst, browser = pinger.portaaldetectie( \
+                argumenten.probeurl or pinger.PROBEURL)
+                statecache.bewaarVerbinding(uitkomst)
+
+            if not pinger.meld(co, uitkomst):
+                exit(1)
+
+    ############## 4. switch on login-type flags ##############
+    if argumenten.timings and \
+    argumenten.worker in ("login", "force_login", "logout"):
+        ## Ook als de login mislukt of exit() oproept, willen we de tijden.
+        import atexit
+        import tijdmeting
+        co = tijdmeting.TimingCommunicator(co, argumenten.worker)
+        atexit.register(co.toon)
+
     if argumenten.worker == "login":
         print "ik wil inloggen"
-        mainLoginprocedure(co, gebruikersnaam, wachtwoord)
+        gedeeldeLogin(co, "login", mainLoginprocedure, gebruikersnaam, \
+        wachtwoord, browser=browser)
 
     elif argumenten.worker == "force_login":
         print "ik moet en zal inloggen"
-        mainForceerLoginprocedure(co, gebruikersnaam, wachtwoord)
+        gedeeldeLogin(co, "force_login", mainForceerLoginprocedure, \
+        gebruikersnaam, wachtwoord, browser=browser)
 
     elif argumenten.worker == "logout":
         print "ik wil uitloggen"
-        mainLoguitprocedure(co, gebruikersnaam, wachtwoord)
+        mainLoguitprocedure(co, gebruikersnaam, wachtwoord, \
+        interface=argumenten.interface)
+
+    elif argumenten.worker == "daemon":
+        print "ik wil altijd online blijven"
+        import daemon
+        import pinger
+        if argumenten.metriekpoort:
+            import openmetrics
+            openmetrics.serveer(argumenten.metriekpoort)
+        daemon.Daemon(co, gebruikersnaam, wachtwoord, \
+        controle=argumenten.controle, \
+        probeurl=argumenten.probeurl or pinger.PROBEURL, \
+        maxinterval=argumenten.maxinterval, \
+        stil=argumenten.communicator == "quiet", \
+        tekstbestand=argumenten.metriekbestand).draai()
+
+    elif argumenten.worker == "dienst":
+        print "ik wil de anderen helpen"
+        import dienst
+        dienst.serveer(dienst.Dienst(gebruikersnaam, wachtwoord, \
+        controle=argumenten.controle, probeurl=argumenten.probeurl, \
+        ttl=argumenten.cachettl), argumenten.socket)
+
+    elif argumenten.worker == "monitor":
+        print "ik wil mijn tegoeden in het oog houden"
+        mainMonitorprocedure(gebruikersnaam, wachtwoord, \
+        argumenten.interval, stil=argumenten.communicator == "quiet")
 
     elif argumenten.worker == "dummy_login":
         print "ik wil inloggen voor spek en bonen"
-        mainLoginprocedure(co, gebruikersnaam, wachtwoord, dummy=True)
+        mainLoginprocedure(co, gebruikersnaam, wachtwoord, dummy=True, \
+        scenario=scenario(argumenten.simulatie))
 
     elif argumenten.worker == "dummy_logout":
         print "ik wil uitloggen voor spek en bonen"
-        mainLoguitprocedure(co, gebruikersnaam, wachtwoord, dummy=True)
+        mainLoguitprocedure(co, gebruikersnaam, wachtwoord, dummy=True, \
+        scenario=scenario(argumenten.simulatie))
 
-aanstuurderObvArgumenten(argumentenParser())
+if __name__ == "__main__":
+    commandolijn()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import urlparse                         ## Host van netlogin
+import socket                           ## Adressen omzetten
+import struct                           ## /proc en ioctl ontleden
+import errno                            ## Onbekende interface
+import os                               ## Basislib
+
+import errors                           ## Onbekende interface
+
+## Om uit te loggen moet netlogin weten welk IP-adres uitgelogd wordt. Vroeger
+## zochten we dat door een UDP-socket naar gmail.com te verbinden; dat kost
+## een DNS-opzoeking naar buiten en kiest op een machine met meerdere
+## interfaces niet altijd het juiste adres. Op Linux lezen we nu de routetabel
+## in /proc/net/route, kiezen we de interface van de route naar netlogin en
+## vragen we het adres van die interface op (SIOCGIFADDR).
+##
+## Het adres wordt bij elke oproep opnieuw gelezen: een DHCP-lease of een
+## andere route kan het intussen veranderd hebben (zeker in --daemon en
+## --serve), en één ioctl kost minder dan een verkeerde loguit. Netlogin is
+## dezelfde host als die van de workers (KOTNETCLI_NETLOGIN, zie worker.py).
+
+ROUTETABEL = "/proc/net/route"
+SIOCGIFADDR = 0x8915
+RTF_UP = 0x0001
+
+def hexnaarint(tekst):
+    ## /proc/net/route geeft adressen in de bytevolgorde van de machine.
+    return struct.unpack("!I", struct.pack("=I", int(tekst, 16)))[0]
+
+def ipnaarint(ip):
+    return struct.unpack("!I", socket.inet_aton(ip))[0]
+
+def routes():
+    ## Geeft (interface, bestemming, masker, metric) voor elke actieve route.
+    with open(ROUTETABEL) as bestand:
+        bestand.readline()
+        for lijn in bestand:
+            velden = lijn.split()
+            if len(velden) < 8 or not int(velden[3], 16) & RTF_UP:
+                continue
+            yield velden[0], hexnaarint(velden[1]), hexnaarint(velden[7]), \
+            int(velden[6])
+
+def interfaceNaar(ip):
+    ## Langste prefix wint, bij gelijke lengte de laagste metric.
+    doel = ipnaarint(ip)
+    beste = None
+    for interface, bestemming, masker, metric in routes():
+        if doel & masker != bestemming:
+            continue
+        sleutel = (bin(masker).count("1"), -metric)
+        if beste is None or sleutel > beste[0]:
+            beste = (sleutel, interface)
+    if beste is None:
+        return None
+    return beste[1]
+
+def interfaceadres(interface):
+    import fcntl                        ## Enkel op posix beschikbaar
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        antwoord = fcntl.ioctl(s.fileno(), SIOCGIFADDR, \
+        struct.pack("256s", interface[:15]))
+    except IOError as e:
+        if e.errno == errno.ENODEV:
+            raise errors.KotnetFout("interface %s bestaat niet" % interface)
+        if e.errno == errno.EADDRNOTAVAIL:
+            raise errors.KotnetFout("interface %s heeft geen IPv4-adres" % \
+            interface)
+        raise
+    finally:
+        s.close()
+    return socket.inet_ntoa(antwoord[20:24])
+
+def netloginhost():
+    import worker                       ## Laadt localip zelf al bij de start
+    return urlparse.urlparse(worker.NETLOGIN).hostname
+
+def viaSocket(doel):
+    ## Terugvaloptie buiten Linux: de kernel kiest het bronadres voor een
+    ## verbinding naar netlogin. Een UDP-connect stuurt niets over het net.
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect((doel, 80))
+        return s.getsockname()[0]
+    finally:
+        s.close()
+
+def lokaalip(interface=None, doel=None):
+    ## Geeft het IP-adres van de gegeven interface, of van de interface
+    ## waarlangs netlogin bereikt wordt.
+    if doel is None:
+        doel = netloginhost()
+    if interface is None and os.path.exists(ROUTETABEL):
+        try:
+            ip = socket.gethostbyname(doel)
+            ## Lokale routes (zoals naar een nepportaal op 127.0.0.1)
+            ## staan niet in /proc/net/route.
+            if ip.startswith("127."):
+                return viaSocket(ip)
+            interface = interfaceNaar(ip)
+        except socket.error:
+            ## Geen DNS: dan maar de standaardroute.
+            interface = interfaceNaar("0.0.0.0")
+    
+    if interface is None:
+        return viaSocket(doel)
+    
+    return interfaceadres(interface)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import threading                        ## Slot rond de waarden
+import bisect                           ## Emmer van een histogram
+import os                               ## Tekstbestand vervangen
+
+import tijdmeting                       ## Stappen meten
+
+## Houdt tellers, meters en histogrammen bij in het geheugen en zet ze pas
+## om naar tekst wanneer iemand erom vraagt: over HTTP (serveer()) of in
+## een bestand voor de textfile collector van node_exporter
+## (schrijfTekstbestand()). Een meting zelf is een optelling onder een slot,
+## zodat de login er niets van merkt.
+##
+## Over HTTP krijgt wie application/openmetrics-text aanvaardt het
+## OpenMetrics-formaat, de rest (en het tekstbestand) het klassieke
+## Prometheus-tekstformaat 0.0.4. Het verschil zit enkel in de naam van een
+## teller op de TYPE-lijn en de afsluitende "# EOF".
+
+GRENZEN = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+## naam: (soort, uitleg)
+METRIEKEN = {
+    "kotnetcli_stage_duration_seconds": ("histogram", \
+    "Duration of one stage of a login or logout"),
+    "kotnetcli_login_attempts": ("counter", \
+    "Logins and logouts by rc code (none: a stage failed first)"),
+    "kotnetcli_quota_ratio": ("gauge", \
+    "Remaining quota as a fraction of the total"),
+    "kotnetcli_quota_remaining_bytes": ("gauge", \
+    "Remaining quota in bytes"),
+    "kotnetcli_probe_results": ("counter", \
+    "Connection checks by method and result"),
+    "kotnetcli_probe_duration_seconds": ("histogram", \
+    "Duration of one connection check"),
+    "kotnetcli_login_retries": ("counter", \
+    "Failed logins that were retried after a backoff"),
+    "kotnetcli_consecutive_failures": ("gauge", \
+    "Failed logins since the last successful one"),
+}
+
+OPENMETRICS = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+def rclabel(rccode):
+    if rccode is None:
+        return "none"
+    if rccode in (100, 202, 206, 207):
+        return str(rccode)
+    return "unknown"
+
+class Register():
+    def __init__(self):
+        self.slot = threading.Lock()
+        self.waarden = {}               ## (naam, labels) -> getal
+        self.histogrammen = {}          ## (naam, labels) -> [emmers, som]
+    
+    def tel(self, naam, labels=(), hoeveel=1):
+        with self.slot:
+            self.waarden[naam, labels] = self.waarden.get((naam, labels), \
+            0) + hoeveel
+    
+    def zet(self, naam, waarde, labels=()):
+        with self.slot:
+            self.waarden[naam, labels] = waarde
+    
+    def observeer(self, naam, waarde, labels=()):
+        ## Emmer i telt de waarden tot GRENZEN[i]; de laatste is +Inf.
+        index = bisect.bisect_left(GRENZEN, waarde)
+        with self.slot:
+            histogram = self.histogrammen.get((naam, labels))
+            if histogram is None:
+                histogram = self.histogrammen[naam, labels] = \
+                [[0] * (len(GRENZEN) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += waarde
+    
+    def tekst(self, openmetrics=False):
+        with self.slot:
+            waarden = dict(self.waarden)
+            histogrammen = dict((sleutel, (list(emmers), som)) \
+            for sleutel, (emmers, som) in self.histogrammen.items())
+        
+        lijnen = []
+        for naam in sorted(METRIEKEN):
+            soort, uitleg = METRIEKEN[naam]
+            if soort == "histogram":
+                reeks = sorted((labels, waarde) for (n, labels), waarde \
+                in histogrammen.items() if n == naam)
+            else:
+                reeks = sorted((labels, waarde) for (n, labels), waarde \
+                in waarden.items() if n == naam)
+            if not reeks:
+                continue
+            
+            familie = naam
+            if soort == "counter" and not openmetrics:
+                familie = naam + "_total"
+            lijnen.append("# HELP %s %s" % (familie, uitleg))
+            lijnen.append("# TYPE %s %s" % (familie, soort))
+            for labels, waarde in reeks:
+                if soort == "histogram":
+                    emmers, som = waarde
+                    totaal = 0
+                    for grens, aantal in zip(GRENZEN + ["+Inf"], emmers):
+                        totaal += aantal
+                        lijnen.append(lijn(naam + "_bucket", labels + \
+                        (("le", str(grens)),), totaal))
+                    lijnen.append(lijn(naam + "_count", labels, totaal))
+                    lijnen.append(lijn(naam + "_sum", labels, som))
+                elif soort == "counter":
+                    lijnen.append(lijn(naam + "_total", labels, waarde))
+                else:
+                    lijnen.append(lijn(naam, labels, waarde))
+        if openmetrics:
+            lijnen.append("# EOF")
+        return "\n".join(lijnen) + "\n"
+
+def lijn(naam, labels, waarde):
+    if labels:
+        naam += "{%s}" % ",".join('%s="%s"' % (sleutel, \
+        str(label).replace("\\", "\\\\").replace('"', '\\"').replace("\n", \
+        "\\n")) for sleutel, label in labels)
+    return "%s %s" % (naam, repr(float(waarde)) if isinstance(waarde, \
+    float) else waarde)
+
+## Het register van dit proces: wie iets meet, gebruikt dit.
+register = Register()
+
+class MetricsCommunicator(tijdmeting.TimingCommunicator):
+    ## Zoals TimingCommunicator, maar elke stap gaat meteen naar het
+    ## register in plaats van in een lijst die enkel groeit.
+    def __init__(self, co, stroom="login", register=register):
+        tijdmeting.TimingCommunicator.__init__(self, co, stroom)
+        self.register = register
+    
+    def meet(self, stap, uitkomst, duur):
+        self.register.observeer("kotnetcli_stage_duration_seconds", duur, \
+        (("flow", self.stroom), ("stage", stap), ("outcome", uitkomst)))
+
+def meetLogin(stroom, rccode, tegoeden=None, duur=None, register=register):
+    ## Telt een login of logout; bij rc=100 ook de tegoeden (een
+    ## extractor.Tegoeden). Met duur ook de hele stroom als stap "totaal",
+    ## met dezelfde uitkomst als in tijdmeting.py.
+    register.tel("kotnetcli_login_attempts", (("flow", stroom), \
+    ("rc", rclabel(rccode))))
+    if duur is not None:
+        register.observeer("kotnetcli_stage_duration_seconds", duur, \
+        (("flow", stroom), ("stage", "totaal"), ("outcome", \
+        tijdmeting.uitkomstVan(stroom, rccode))))
+    if rccode == 100 and tegoeden is not None:
+        for richting in ("download", "upload"):
+            register.zet("kotnetcli_quota_ratio", \
+            getattr(tegoeden, richting + "percentage") / 100.0, \
+            (("direction", richting),))
+            register.zet("kotnetcli_quota_remaining_bytes", \
+            getattr(tegoeden, richting) * 1024 * 1024, \
+            (("direction", richting),))
+
+def meetPeiling(methode, uitkomst, duur, register=register):
+    register.tel("kotnetcli_probe_results", (("method", methode), \
+    ("result", uitkomst)))
+    register.observeer("kotnetcli_probe_duration_seconds", duur, \
+    (("method", methode),))
+
+def schrijfTekstbestand(pad, register=register):
+    ## Schrijft naast het doel en hernoemt, zodat node_exporter nooit een
+    ## half bestand leest.
+    tijdelijk = "%s.%d.tmp" % (pad, os.getpid())
+    with open(tijdelijk, "w") as bestand:
+        bestand.write(register.tekst())
+    os.chmod(tijdelijk, 0644)
+    if os.name == "nt" and os.path.exists(pad):
+        os.remove(pad)
+    os.rename(tijdelijk, pad)
+
+def serveer(poort, adres="127.0.0.1", register=register):
+    ## Start een HTTP-server in de achtergrond die /metrics beantwoordt en
+    ## geeft die terug.
+    import BaseHTTPServer
+    import SocketServer
+    
+    class Verzoeken(BaseHTTPServer.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            openmetrics = "application/openmetrics-text" in \
+            self.headers.get("Accept", "")
+            inhoud = register.tekst(openmetrics)
+            self.send_response(200)
+            self.send_header("Content-Type", OPENMETRICS if openmetrics \
+            else PROMETHEUS)
+            self.send_header("Content-Length", str(len(inhoud)))
+            self.end_headers()
+            self.wfile.write(inhoud)
+        
+        def log_message(self, *args):
+            pass
+    
+    class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+    
+    server = Server((adres, poort), Verzoeken)
+    draad = threading.Thread(target=server.serve_forever)
+    draad.daemon = True
+    draad.start()
+    return server
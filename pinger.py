@@ -21,47 +21,287 @@
 ## You should have received a copy of the GNU General Public License
 ## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
 
+
 import os
 import sys
-import subprocess
-
-def ping(co):    
-    if os.name == "posix":
-        with open(os.devnull, 'w') as dev_null:
-            if subprocess.call(["ping", "-c", "1", "-w", "1", "netlogin.kuleuven.be"], \
-            stdout=dev_null, stderr=dev_null) == 0:
-                ## 0 staat voor een exit code van True van het ping-commando.
-                if subprocess.call(["ping", "-c", "1", "-w", "1", "toledo.kuleuven.be"], \
-                stdout=dev_null, stderr=dev_null) == 0:
-                    ## we zijn al online
-                    co.eventPingAlreadyOnline()
-                    co.beeindig_sessie()
-                    sys.exit(1)
-                else:
-                    ## we moeten nog inloggen
-                    co.eventPingSuccess()
-            else:
-                ## geen netwerkverbinding
-                co.eventPingFailure()
-                co.beeindig_sessie()
-                sys.exit(1)
+import time
+import errno
+import threading
+import select
+import socket
+import struct
+import urlparse
+
+## In plaats van twee keer na elkaar /bin/ping op te starten, peilen we beide
+## hosts tegelijk vanuit dit proces. Elke peiling is een niet-blokkerende
+## socket: ofwel een ICMP echo via een onbevoorrechte datagram-socket (Linux,
+## net.ipv4.ping_group_range), ofwel een TCP-connect. Kan de ICMP-socket niet
+## aangemaakt worden, dan valt de peiling terug op TCP. Eén select()-lus
+## wacht op alle peilingen en stopt zodra de uitkomst vastligt; de peilingen
+## die dan nog lopen, worden afgebroken.
+##
+## De adressen worden vooraf opgezocht, voor de select()-lus, elk in een
+## eigen thread: getaddrinfo() blokkeert en kent geen timeout. De deadline
+## van een peiling loopt al tijdens de opzoeking; wie dan nog geen adres
+## heeft, is mislukt, en een hangende resolver houdt de controle dus nooit
+## langer op dan de timeout. Een host mag ook een letterlijk IP-adres zijn;
+## dan is er geen opzoeking.
+
+ICMP = "icmp"
+TCP = "tcp"
+
+NETLOGIN = "netlogin.kuleuven.be"
+TOLEDO = "toledo.kuleuven.be"
+
+## Uitkomsten van ping()
+OFFLINE = "offline"                     ## niet op het KU Leuven-netwerk
+INLOGGEN = "inloggen"                   ## op het netwerk, nog niet online
+ONLINE = "online"                       ## al online
+
+## Een alternatief voor ICMP: één HTTP-verzoek naar een probe-URL. Krijgen
+## we die pagina rechtstreeks (2xx), dan zijn we online; worden we naar
+## netlogin omgeleid, dan moeten we inloggen; is er geen route, dan zitten we
+## niet op het netwerk. De browser staat in dat geval al op de netlogin-
+## pagina en kan meteen aan worker.Kotnetlogin doorgegeven worden.
+PROBEURL = "http://toledo.kuleuven.be/"
+
+## Fouten bij het aanmaken van een ICMP-socket waarna we op TCP terugvallen.
+## Windows geeft WSAEPROTONOSUPPORT (10043) en WSAESOCKTNOSUPPORT (10044),
+## die niet in errno staan.
+GEENICMP = (errno.EACCES, errno.EPERM, errno.EPROTONOSUPPORT, \
+errno.ESOCKTNOSUPPORT, errno.EAFNOSUPPORT, errno.EINVAL, 10043, 10044)
+
+def checksum(data):
+    if len(data) % 2:
+        data += "\0"
+    som = sum(struct.unpack("!%dH" % (len(data) // 2), data))
+    som = (som >> 16) + (som & 0xffff)
+    som += som >> 16
+    return ~som & 0xffff
+
+class Peiling():
+    def __init__(self, host, soort=ICMP, poort=443, timeout=1.0):
+        self.host = host
+        self.soort = soort
+        self.poort = poort
+        self.timeout = timeout
+        
+        self.sock = None
+        self.adres = None
+        self.resultaat = None           ## None zolang niet beslist
+        self.deadline = None
+        self.volgnummer = os.getpid() & 0xffff
+    
+    def start(self):
+        if self.soort == ICMP:
+            try:
+                self.startIcmp(self.adres)
+                return
+            except socket.error as e:
+                if e.errno not in GEENICMP:
+                    self.resultaat = False
+                    return
+                ## Geen onbevoorrechte ICMP hier: dan maar TCP.
+                self.sluit()
+                self.soort = TCP
+        
+        try:
+            self.startTcp(self.adres)
+        except socket.error:
+            self.resultaat = False
+    
+    def startIcmp(self, adres):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, \
+        socket.getprotobyname("icmp"))
+        self.sock.setblocking(0)
+        ## type 8 (echo request), code 0; de kernel vult de identifier in.
+        kop = struct.pack("!BBHHH", 8, 0, 0, 0, self.volgnummer)
+        data = "kotnetcli"
+        kop = struct.pack("!BBHHH", 8, 0, checksum(kop + data), 0, \
+        self.volgnummer)
+        self.sock.sendto(kop + data, (adres[0], 0))
+        self.schrijven = False
+    
+    def startTcp(self, adres):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(0)
+        fout = self.sock.connect_ex(adres)
+        if fout not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, \
+        errno.EALREADY):
+            self.resultaat = False
+        self.schrijven = True
+    
+    def fileno(self):
+        return self.sock.fileno()
+    
+    def verwerk(self):
+        ## Wordt opgeroepen wanneer select() de socket klaar meldt.
+        if self.soort == TCP:
+            fout = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            self.resultaat = (fout == 0)
+            return
+        
+        try:
+            antwoord = self.sock.recv(1024)
+        except socket.error:
+            self.resultaat = False
+            return
+        ## Datagram-ICMP geeft ons het ICMP-pakket zonder IP-header.
+        if len(antwoord) >= 8:
+            soort, code, som, ident, volgnummer = \
+            struct.unpack("!BBHHH", antwoord[:8])
+            if soort == 0 and volgnummer == self.volgnummer:
+                self.resultaat = True
     
-    elif os.name == "nt":
-        with open("NUL", 'w') as dev_null:
-            if subprocess.call(["ping", "-n", "1", "-w", "1", "netlogin.kuleuven.be"], \
-            stdout=dev_null, stderr=dev_null) == 0:
-                ## 0 staat voor een exit code van True van het ping-commando.
-                if subprocess.call(["ping", "-c", "1", "-w", "1", "toledo.kuleuven.be"], \
-                stdout=dev_null, stderr=dev_null) == 0:
-                    ## we zijn al online
-                    co.eventPingAlreadyOnline()
-                    co.beeindig_sessie()
-                    sys.exit(1)
-                else:
-                    ## we moeten nog inloggen
-                    co.eventPingSuccess()
-            else:
-                ## geen netwerkverbinding
-                co.eventPingFailure()
-                co.beeindig_sessie()
-                sys.exit(1)
+    def verlopen(self, nu):
+        if self.resultaat is None and nu >= self.deadline:
+            self.resultaat = False
+    
+    def sluit(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+def oplossen(peilingen):
+    ## Start voor elke peiling een opzoeking in een daemon-thread en geeft
+    ## (peiling, thread) terug. De adressen komen in een aparte dict: een
+    ## thread die pas na zijn deadline klaar is, raakt de peiling niet meer.
+    adressen = {}
+    
+    def zoek(p):
+        try:
+            adressen[p] = socket.getaddrinfo(p.host, p.poort, \
+            socket.AF_INET, socket.SOCK_STREAM)[0][4]
+        except socket.error:
+            adressen[p] = None
+    
+    draden = []
+    for p in peilingen:
+        draad = threading.Thread(target=zoek, args=(p,))
+        draad.daemon = True
+        draad.start()
+        draden.append(draad)
+    
+    for p, draad in zip(peilingen, draden):
+        draad.join(max(0, p.deadline - time.time()))
+        p.adres = adressen.get(p)
+        if p.adres is None:
+            ## Geen adres, of niet op tijd.
+            p.resultaat = False
+        yield p
+
+def peil(peilingen, beslis):
+    ## Voert alle peilingen gelijktijdig uit. beslis(peilingen) geeft de
+    ## uitkomst terug zodra die vastligt, of None om verder te wachten.
+    try:
+        begin = time.time()
+        for p in peilingen:
+            p.deadline = begin + p.timeout
+        for p in oplossen(peilingen):
+            uitkomst = beslis(peilingen)
+            if uitkomst is not None:
+                return uitkomst
+        
+        nu = time.time()
+        for p in peilingen:
+            p.verlopen(nu)
+            if p.resultaat is None:
+                p.start()
+            uitkomst = beslis(peilingen)
+            if uitkomst is not None:
+                return uitkomst
+        
+        while True:
+            bezig = [p for p in peilingen if p.resultaat is None]
+            if not bezig:
+                return beslis(peilingen)
+            
+            nu = time.time()
+            wachttijd = max(0, min(p.deadline for p in bezig) - nu)
+            lezen = [p for p in bezig if not p.schrijven]
+            schrijven = [p for p in bezig if p.schrijven]
+            try:
+                klaar = select.select(lezen, schrijven, [], wachttijd)
+            except select.error as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+            for p in klaar[0] + klaar[1]:
+                p.verwerk()
+            
+            nu = time.time()
+            for p in bezig:
+                p.verlopen(nu)
+            
+            uitkomst = beslis(peilingen)
+            if uitkomst is not None:
+                return uitkomst
+    finally:
+        ## Wat nog loopt, wordt hier afgebroken.
+        for p in peilingen:
+            p.sluit()
+
+def beslisKotnet(peilingen):
+    netlogin, toledo = peilingen
+    if netlogin.resultaat is False:
+        ## Geen netlogin: toledo hoeven we niet meer af te wachten.
+        return OFFLINE
+    if netlogin.resultaat is None or toledo.resultaat is None:
+        return None
+    if toledo.resultaat:
+        return ONLINE
+    return INLOGGEN
+
+def verbinding(soort=ICMP, timeout=1.0):
+    return peil([Peiling(NETLOGIN, soort, timeout=timeout), \
+    Peiling(TOLEDO, soort, timeout=timeout)], beslisKotnet)
+
+def meld(co, uitkomst):
+    ## Meldt een uitkomst van verbinding() of portaaldetectie() aan de
+    ## communicator. Geeft True terug als er ingelogd moet worden.
+    if uitkomst == ONLINE:
+        ## we zijn al online
+        co.eventPingAlreadyOnline()
+        co.beeindig_sessie()
+        return False
+    elif uitkomst == INLOGGEN:
+        ## we moeten nog inloggen
+        co.eventPingSuccess()
+        return True
+    else:
+        ## geen netwerkverbinding
+        co.eventPingFailure()
+        co.beeindig_sessie()
+        return False
+
+def ping(co, soort=ICMP, timeout=1.0):
+    return meld(co, verbinding(soort, timeout))
+
+def portaaldetectie(probeurl=PROBEURL, portaalhost=NETLOGIN, browser=None, \
+timeout=1.8):
+    import worker                       ## Voor nieuweBrowser()
+    import mechanize                    ## Voor HTTPError
+    if browser is None:
+        browser = worker.nieuweBrowser()
+    
+    try:
+        respons = browser.open(probeurl, timeout=timeout)
+        respons.read()
+        host = urlparse.urlparse(respons.geturl()).hostname
+    except mechanize.HTTPError:
+        ## Er antwoordt wel een server, maar niet met 2xx: of we online zijn
+        ## is onzeker. Een loginpoging (met een verse netloginpagina) maakt
+        ## dat wel duidelijk.
+        return INLOGGEN, None
+    except Exception:
+        return OFFLINE, None
+    
+    if host == portaalhost:
+        return INLOGGEN, browser
+    return ONLINE, None
+
+def portaal(co, probeurl=PROBEURL):
+    ## Zoals ping(), maar op basis van portaaldetectie(). Geeft ook de
+    ## browser terug die al op netlogin staat (of None).
+    uitkomst, browser = portaaldetectie(probeurl)
+    return meld(co, uitkomst), browser
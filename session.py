@@ -0,0 +1,308 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import threading                        ## De pool wordt tussen threads gedeeld
+import httplib                          ## Verbindingen zelf
+import socket                           ## Foutafhandeling en timeouts
+import select                           ## Gesloten vrije verbindingen
+import errno                            ## Welke fouten mogen opnieuw
+import time                             ## Handdruktijd en leeftijd
+import functools                        ## TLS-context meegeven
+import os                               ## Proces-id na een fork
+
+import cassette                         ## --record en --replay
+import httptrace                        ## --trace
+import tlssessies                       ## Hervatten van TLS-sessies
+
+## Zonder pool opent mechanize voor elk verzoek een nieuwe TCP- en TLS-
+## verbinding en stuurt het "Connection: close" mee. Hier houden we per
+## (schema, host, poort, bronadres) de vrije verbindingen bij zodat alle
+## browsers in hetzelfde proces ze kunnen hergebruiken: een login, de
+## logouts van --force-login en alle accounts van --batch betalen dan maar
+## één handdruk per portaalhost (per verbinding die tegelijk in gebruik is).
+##
+## Een antwoord wordt altijd volledig ingelezen voor de verbinding terug in
+## de pool gaat; mechanize krijgt een antwoord uit het geheugen.
+
+MAXVRIJ = 4                             ## Vrije verbindingen per sleutel
+VRIJTIJD = 30                           ## Seconden voor een vrije verbinding
+                                        ## vermoedelijk door de server
+                                        ## gesloten is
+VEILIG = ("GET", "HEAD")                ## Methodes die we opnieuw mogen sturen
+
+def gesloten(verbinding):
+    ## Een vrije keep-alive-verbinding hoort niets te lezen te hebben; is de
+    ## socket leesbaar, dan heeft de server hem gesloten (of stuurt hij iets
+    ## onverwachts). Zulke verbindingen gebruiken we niet meer.
+    if verbinding.sock is None:
+        return True
+    try:
+        return bool(select.select([verbinding.sock], [], [], 0)[0])
+    except (select.error, socket.error, ValueError):
+        return True
+
+class Pool():
+    def __init__(self):
+        self.slot = threading.Lock()
+        self.pid = os.getpid()
+        self.vrij = {}                  ## sleutel -> [(verbinding, tijd)]
+        self.geopend = 0
+        self.hergebruikt = 0
+        self.handdruktijd = 0.0
+
+    def neem(self, sleutel):
+        ## Geeft een vrije verbinding terug, of None als er geen is.
+        nu = time.time()
+        with self.slot:
+            if os.getpid() != self.pid:
+                self.nafork()
+            vrij = self.vrij.get(sleutel, [])
+            while vrij:
+                verbinding, tijd = vrij.pop()
+                if nu - tijd < VRIJTIJD and not gesloten(verbinding):
+                    return verbinding
+                verbinding.close()
+        return None
+
+    def nafork(self):
+        ## Na een fork delen ouder en kind dezelfde sockets; verzoeken van
+        ## beide kanten zouden door elkaar lopen. Het kind sluit zijn kopie
+        ## en begint met een lege pool.
+        for vrij in self.vrij.values():
+            for verbinding, tijd in vrij:
+                verbinding.close()
+        self.vrij = {}
+        self.pid = os.getpid()
+
+    def geefterug(self, sleutel, verbinding):
+        with self.slot:
+            vrij = self.vrij.setdefault(sleutel, [])
+            if len(vrij) < MAXVRIJ:
+                vrij.append((verbinding, time.time()))
+                return
+        verbinding.close()
+
+    def hergebruik(self):
+        ## Telt een verzoek dat over een vrije verbinding goed aankwam.
+        with self.slot:
+            self.hergebruikt += 1
+
+    def open(self, verbinding):
+        ## Verbindt een nieuwe verbinding en telt de handdruk (TCP en,
+        ## voor https, TLS) mee in de statistieken. Met --trace geeft dit
+        ## de duur van elke fase terug.
+        fasen = None
+        begin = time.time()
+        if httptrace.schrijver is None:
+            verbinding.connect()
+        else:
+            fasen = httptrace.verbind(verbinding)
+        duur = time.time() - begin
+        with self.slot:
+            self.geopend += 1
+            self.handdruktijd += duur
+        return fasen
+
+    def sluit(self):
+        with self.slot:
+            for vrij in self.vrij.values():
+                for verbinding, tijd in vrij:
+                    verbinding.close()
+            self.vrij = {}
+
+    def statistieken(self):
+        with self.slot:
+            return {"geopend": self.geopend,
+                    "hergebruikt": self.hergebruikt,
+                    "handdruktijd": self.handdruktijd,
+                    "vrij": sum(len(v) for v in self.vrij.values())}
+
+pool = Pool()                           ## Eén pool per proces
+
+def statistieken():
+    statistieken = pool.statistieken()
+    tls = tlssessies.statistieken()
+    statistieken["tlsvolledig"] = tls["volledig"]
+    statistieken["tlshervat"] = tls["hervat"]
+    return statistieken
+
+def kopregels(bericht):
+    ## (naam, waarde) voor elke kopregel, in volgorde. Dubbele kopregels
+    ## zoals Set-Cookie blijven apart staan; vervolgregels worden aan de
+    ## vorige regel geplakt.
+    regels = []
+    for lijn in bericht.headers:
+        if lijn[:1] in " \t" and regels:
+            naam, waarde = regels[-1]
+            regels[-1] = (naam, waarde + " " + lijn.strip())
+        elif ":" in lijn:
+            naam, waarde = lijn.split(":", 1)
+            regels.append((naam.strip(), waarde.strip()))
+    return regels
+
+def timeoutVan(req):
+    timeout = getattr(req, "timeout", None)
+    if timeout is None or not isinstance(timeout, (int, long, float)):
+        return socket.getdefaulttimeout()
+    return timeout
+
+def handlers(bron=None):
+    ## Handlers die voor de standaardhandlers van mechanize aan de beurt
+    ## komen. Met bron vertrekken alle verbindingen van dat lokale IP-adres.
+    import mechanize
+    from mechanize._response import make_response
+
+    def verbinding(klasse, host, req):
+        if bron is None:
+            return klasse(host, timeout=timeoutVan(req))
+        return klasse(host, timeout=timeoutVan(req), source_address=(bron, 0))
+
+    def schrijf(h, req):
+        koppen = dict((str(naam.title()), str(waarde)) for naam, waarde in \
+        req.headers.items() + req.unredirected_hdrs.items())
+        h.request(req.get_method(), req.get_selector(), req.data, koppen)
+
+    def verstuur(h, req):
+        schrijf(h, req)
+        return h.getresponse()
+
+    def nietGezien(fout):
+        ## Sloot de server de verbinding voor er een statusregel kwam? Een
+        ## timeout telt nooit: dan kan de server nog bezig zijn.
+        if isinstance(fout, socket.timeout):
+            return False
+        if isinstance(fout, httplib.BadStatusLine):
+            return fout.line in ("", "''")
+        if isinstance(fout, socket.error):
+            return fout.errno in (errno.ECONNRESET, errno.EPIPE, \
+            errno.ECONNABORTED)
+        return False
+
+    def hergebruik(h, req):
+        ## Stuurt req over een vrije verbinding. Geeft None terug als het
+        ## verzoek veilig opnieuw mag over een verse verbinding: enkel voor
+        ## GET en HEAD, en enkel als de server de verbinding sloot voor hij
+        ## antwoordde. Een POST (zoals het loginformulier) sturen we nooit
+        ## twee keer: elke extra poging kan tellen voor een blokkering na te
+        ## veel verkeerde wachtwoorden.
+        try:
+            schrijf(h, req)
+            return h.getresponse()
+        except (httplib.HTTPException, socket.error) as fout:
+            if req.get_method() not in VEILIG or not nietGezien(fout):
+                raise
+            h.close()
+            return None
+
+    def doOpen(schema, klasse, req):
+        if cassette.afspeler is not None:
+            opgenomen = cassette.afspeler.antwoord(req.get_method(), \
+            req.get_full_url())
+            if opgenomen is None:
+                raise mechanize.URLError("niet in de cassette: %s %s" % \
+                (req.get_method(), req.get_full_url()))
+            status, reden, koppen, inhoud = opgenomen
+            return make_response(inhoud, koppen, req.get_full_url(), \
+            status, reden)
+        if getattr(req, "_tunnel_host", None):
+            ## Via een proxytunnel: laat mechanize het zelf doen.
+            return None
+        host = req.get_host()
+        if not host:
+            raise mechanize.URLError("no host given")
+        sleutel = (schema, host, bron)
+        spoor = None
+        if httptrace.schrijver is not None:
+            spoor = {"soort": "http", "methode": req.get_method(), \
+            "url": req.get_full_url()}
+            begin = httptrace.klok()
+
+        h = pool.neem(sleutel)
+        hergebruikt = h is not None
+        try:
+            if hergebruikt:
+                h.timeout = timeoutVan(req)
+                if h.sock is not None:
+                    h.sock.settimeout(h.timeout)
+                if spoor is not None:
+                    httptrace.telVerzonden(h)
+                    verzonden = httptrace.klok()
+                r = hergebruik(h, req)
+                if r is None:
+                    hergebruikt = False
+                else:
+                    pool.hergebruik()
+            if not hergebruikt:
+                h = verbinding(klasse, host, req)
+                fasen = pool.open(h)
+                if spoor is not None:
+                    spoor.update(fasen)
+                    httptrace.telVerzonden(h)
+                    verzonden = httptrace.klok()
+                r = verstuur(h, req)
+            if spoor is not None:
+                ontvangen = httptrace.klok()
+            inhoud = r.read()
+        except (httplib.HTTPException, socket.error) as fout:
+            if h is not None:
+                h.close()
+            if spoor is not None:
+                spoor.update(fout=str(fout) or type(fout).__name__, \
+                hergebruikt=hergebruikt, \
+                totaal=httptrace.ms(httptrace.klok() - begin))
+                httptrace.schrijver.schrijf(spoor)
+            raise mechanize.URLError(fout)
+
+        if spoor is not None:
+            einde = httptrace.klok()
+            spoor.update(status=r.status, hergebruikt=hergebruikt, \
+            bytes_uit=h.verzonden, \
+            bytes_in=sum(len(lijn) for lijn in r.msg.headers) + len(inhoud), \
+            ttfb=httptrace.ms(ontvangen - verzonden), \
+            overdracht=httptrace.ms(einde - ontvangen), \
+            totaal=httptrace.ms(einde - begin))
+            httptrace.schrijver.schrijf(spoor)
+
+        if r.will_close:
+            h.close()
+        else:
+            pool.geefterug(sleutel, h)
+        koppen = kopregels(r.msg)
+        if cassette.opnemer is not None:
+            cassette.opnemer.neemOp(req, r.status, r.reason, koppen, inhoud)
+        return make_response(inhoud, koppen, req.get_full_url(), r.status, \
+        r.reason)
+
+    class PoolHTTPHandler(mechanize.HTTPHandler):
+        handler_order = mechanize.HTTPHandler.handler_order - 1
+        def http_open(self, req):
+            return doOpen("http", httplib.HTTPConnection, req)
+
+    class PoolHTTPSHandler(mechanize.HTTPSHandler):
+        handler_order = mechanize.HTTPSHandler.handler_order - 1
+        def https_open(self, req):
+            return doOpen("https", functools.partial( \
+            httplib.HTTPSConnection, context=tlssessies.context()), req)
+
+    return [PoolHTTPHandler(), PoolHTTPSHandler()]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+import threading                        ## Traject gedeeld door threads
+import random                           ## Latentie, fouten, rc-codes
+import socket                           ## Gesimuleerde timeouts
+import json                             ## Scenariobestand
+import math                             ## Verdelingen
+import time                             ## Wachten en het traject
+
+import errors                           ## Fouten van de stappen
+import extractor                        ## Tegoeden zoals een echte login
+import pinger                           ## Uitkomsten van een peiling
+
+## Een scenario beschrijft hoe het gesimuleerde netlogin zich gedraagt
+## (zie worker.Simulatielogin en worker.Simulatieloguit): hoe lang elke
+## stap duurt, welke stappen mislukken of in een timeout lopen, welke
+## rc-code er terugkomt en hoe de tegoeden in de tijd dalen. Een scenario
+## komt uit een JSON-bestand, bv.
+##
+##      {"zaad": 1,
+##       "latentie": {"netlogin": "lognormaal:0.05,0.5", "*": "vast:0.02"},
+##       "fouten": {"kuleuven": 0.05},
+##       "timeouts": {"opsturen": 0.01}, "timeout": 1.8,
+##       "rccodes": {"100": 0.9, "202": 0.05, "206": 0.05},
+##       "loguitrccodes": {"100": 0.8, "207": 0.2},
+##       "tegoeden": {"download": 5120, "upload": 5120, "totaal": 5120,
+##                    "verbruik": 200, "uploadverbruik": 20,
+##                    "spreiding": 50, "versnelling": 3600},
+##       "verbinding": {"online": 0.95, "inloggen": 0.05},
+##       "snel": true}
+##
+## Stappen zijn netlogin, kuleuven, invoeren, opsturen en snel (de post
+## met het bewaarde formulierschema); "*" geldt voor alle andere. Een
+## verdeling is "soort:parameters" in seconden:
+##
+##      vast:s                  altijd s
+##      uniform:a,b             tussen a en b
+##      normaal:mu,sigma        afgekapt op 0
+##      lognormaal:mediaan,sigma
+##      exponentieel:gemiddelde
+##
+## De tegoeden dalen met `verbruik` MB per uur (plus normale ruis met
+## `spreiding` MB per uur), waarbij `versnelling` gesimuleerde seconden
+## per seconde van `klok` telt (standaard de echte tijd; een benchmark
+## kan een gesimuleerde klok meegeven). Zonder bestand krijg je het gedrag
+## van de vroegere dummy-workers: 0.1 s per stap, altijd rc=100, 80% en
+## 100%.
+
+STAPPEN = ["netlogin", "kuleuven", "invoeren", "opsturen", "snel"]
+
+def verdeling(tekst):
+    ## Zet "soort:parameters" om naar een functie die met een
+    ## random.Random een duur in seconden trekt.
+    soort, _, parameters = tekst.partition(":")
+    try:
+        p = [float(waarde) for waarde in parameters.split(",") if waarde]
+    except ValueError:
+        raise ValueError("ongeldige verdeling: %s" % tekst)
+    soorten = {
+        "vast": (1, lambda r: p[0]),
+        "uniform": (2, lambda r: r.uniform(p[0], p[1])),
+        "normaal": (2, lambda r: max(0.0, r.gauss(p[0], p[1]))),
+        "lognormaal": (2, lambda r: r.lognormvariate(math.log(p[0]), p[1])),
+        "exponentieel": (1, lambda r: r.expovariate(1.0 / p[0]))}
+    if soort not in soorten or len(p) != soorten[soort][0]:
+        raise ValueError("ongeldige verdeling: %s" % tekst)
+    return soorten[soort][1]
+
+def gewogen(kansen):
+    ## {"100": 0.9, "202": 0.1} -> [(100, 0.9), (202, 0.1)]
+    return [(int(code) if str(code).isdigit() else code, float(kans)) \
+    for code, kans in sorted(kansen.items())]
+
+class Traject():
+    ## Tegoeden die in de tijd dalen, in MB.
+    def __init__(self, r, download=4096, upload=5120, totaal=5120, \
+    verbruik=0.0, uploadverbruik=0.0, spreiding=0.0, versnelling=1.0, \
+    klok=time.time):
+        self.r = r
+        self.klok = klok
+        self.download = float(download)
+        self.upload = float(upload)
+        self.totaal = totaal
+        self.verbruik = verbruik
+        self.uploadverbruik = uploadverbruik
+        self.spreiding = spreiding
+        self.versnelling = versnelling
+        self.slot = threading.Lock()
+        self.vorige = klok()
+    
+    def daal(self, over, verbruik, uren):
+        if uren <= 0 or (verbruik == 0 and self.spreiding == 0):
+            return over
+        ruis = self.r.gauss(0, self.spreiding * math.sqrt(uren))
+        return max(0.0, min(self.totaal, over - verbruik * uren + ruis))
+    
+    def nu(self, rccode):
+        ## Een extractor.Tegoeden zoals een login met deze rc-code hem zou
+        ## teruggeven.
+        with self.slot:
+            nu = self.klok()
+            uren = (nu - self.vorige) * self.versnelling / 3600.0
+            self.vorige = nu
+            self.download = self.daal(self.download, self.verbruik, uren)
+            self.upload = self.daal(self.upload, self.uploadverbruik, uren)
+            download, upload = int(self.download), int(self.upload)
+        if rccode != 100:
+            return extractor.Tegoeden(rccode, None, None, None, None, None, \
+            None)
+        return extractor.Tegoeden(rccode, download, self.totaal, \
+        extractor.percentage(download, self.totaal), upload, self.totaal, \
+        extractor.percentage(upload, self.totaal))
+
+class Scenario():
+    def __init__(self, latentie=None, fouten=None, timeouts=None, \
+    timeout=1.8, rccodes=None, loguitrccodes=None, tegoeden=None, \
+    verbinding=None, snel=False, zaad=None, klok=time.time):
+        self.r = random.Random(zaad)
+        latentie = latentie or {}
+        standaard = latentie.get("*", "vast:0.1")
+        self.latentie = dict((stap, verdeling(latentie.get(stap, \
+        standaard))) for stap in STAPPEN)
+        self.fouten = fouten or {}
+        self.timeouts = timeouts or {}
+        self.timeout = timeout
+        self.rccodes = gewogen(rccodes or {"100": 1})
+        self.loguitrccodes = gewogen(loguitrccodes or {"100": 1})
+        self.verbindingen = gewogen(verbinding or {pinger.ONLINE: 1})
+        self.traject = Traject(self.r, klok=klok, **(tegoeden or {}))
+        self.snel = snel
+        self.schema = False             ## Is er al een geslaagde login?
+    
+    def kies(self, kansen):
+        grens = self.r.random() * sum(kans for waarde, kans in kansen)
+        for waarde, kans in kansen:
+            grens -= kans
+            if grens < 0:
+                return waarde
+        return kansen[-1][0]
+    
+    def stap(self, naam):
+        ## Wacht zo lang als de stap duurt en gooit zo nodig de fout op die
+        ## het scenario voor deze stap voorziet.
+        if self.r.random() < self.timeouts.get(naam, 0):
+            time.sleep(self.timeout)
+            raise socket.timeout("gesimuleerde timeout in %s" % naam)
+        time.sleep(self.latentie[naam](self.r))
+        if self.r.random() < self.fouten.get(naam, 0):
+            raise errors.StapMislukt(naam)
+    
+    def rccode(self):
+        return self.kies(self.rccodes)
+    
+    def loguitrccode(self):
+        return self.kies(self.loguitrccodes)
+    
+    def verbinding(self):
+        ## Uitkomst van een gesimuleerde peiling (pinger.ONLINE, ...).
+        return self.kies(self.verbindingen)
+
+def laad(pad):
+    with open(pad) as bestand:
+        instellingen = json.load(bestand)
+    try:
+        return Scenario(**dict((str(sleutel), waarde) for sleutel, waarde \
+        in instellingen.items()))
+    except TypeError as fout:
+        raise ValueError("%s: %s" % (pad, fout))
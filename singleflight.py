@@ -0,0 +1,175 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import errno                            ## Foutcodes van os.open/os.kill
+import json                             ## Uitkomst van de login
+import time                             ## Wachten en leeftijd van het slot
+import os                               ## Basislib
+
+import cachedir                         ## Map voor het slot
+
+## Wanneer meerdere triggers tegelijk afgaan, logt enkel de eerste kotnetcli
+## echt in. Die houdt een slotbestand vast (aangemaakt met O_EXCL, met pid en
+## starttijd erin). Wie het slot niet krijgt, wacht tot de eerste klaar is en
+## neemt dan diens uitkomst over: de rc-code en tegoeden, of de stap die
+## misliep (zie publiceer()). Ook een 202 of 206 wordt gedeeld; anders stuurt
+## elke wachtende na elkaar hetzelfde verkeerde wachtwoord op. De uitkomst
+## draagt de gebruiker en de stroom (login, force_login) van de login; wie
+## voor een andere gebruiker of stroom wacht, neemt ze niet over en logt na
+## de eigenaar zelf in. Een slot waarvan de eigenaar niet meer bestaat of
+## dat ouder is dan MAXLEEFTIJD, is verweesd en wordt opgeruimd.
+##
+## Het slot ligt in de cachemap (zie cachedir.py). Processen die dezelfde map
+## gebruiken (dezelfde gebruiker, of KOTNETCLI_CACHE naar een gedeelde map),
+## delen dus één login.
+
+SLOT = "login.lock"
+UITKOMST = "login.uitkomst"
+MAXLEEFTIJD = 60                        ## Een login duurt nooit zo lang.
+INTERVAL = 0.05
+
+def leeft(pid):
+    if os.name != "posix":
+        ## Zonder os.kill(pid, 0) gaan we enkel op de leeftijd af.
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+class Slot():
+    def __init__(self, naam=SLOT, maxleeftijd=MAXLEEFTIJD, \
+    uitkomst=UITKOMST, gebruiker=None, stroom=None):
+        self.pad = cachedir.cachebestand(naam)
+        self.uitkomst = uitkomst
+        self.gebruiker = gebruiker
+        self.stroom = stroom
+        self.maxleeftijd = maxleeftijd
+        self.inhoud = "%d %f" % (os.getpid(), time.time())
+        self.eigenaar = False
+    
+    def probeer(self):
+        try:
+            fd = os.open(self.pad, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0600)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            return False
+        os.write(fd, self.inhoud)
+        os.close(fd)
+        self.eigenaar = True
+        return True
+    
+    def lees(self, pad=None):
+        try:
+            with open(pad or self.pad) as bestand:
+                return bestand.read()
+        except IOError:
+            return None
+    
+    def verweesd(self, inhoud):
+        try:
+            pid, starttijd = inhoud.split()
+            pid, starttijd = int(pid), float(starttijd)
+        except ValueError:
+            ## Een half geschreven slot: pas verweesd als het oud is.
+            try:
+                starttijd = os.path.getmtime(self.pad)
+            except OSError:
+                return False
+            return time.time() - starttijd > self.maxleeftijd
+        return not leeft(pid) or time.time() - starttijd > self.maxleeftijd
+    
+    def opruimen(self, inhoud):
+        ## Verplaats het slot eerst naar een eigen naam en controleer dan of
+        ## het nog steeds het verweesde slot is. Heeft iemand anders het in
+        ## tussentijd vervangen, dan zetten we het terug.
+        apart = "%s.%d.verweesd" % (self.pad, os.getpid())
+        try:
+            os.rename(self.pad, apart)
+        except OSError:
+            return
+        if self.lees(apart) == inhoud or not hasattr(os, "link"):
+            os.remove(apart)
+            return
+        try:
+            os.link(apart, self.pad)
+        except OSError:
+            pass
+        os.remove(apart)
+    
+    def publiceer(self, rccode=None, download=None, upload=None, stap=None):
+        ## Voor de eigenaar, voor vrijgeven(): de uitkomst van de login voor
+        ## wie erop wacht. Bij een mislukte stap is rccode None.
+        try:
+            cachedir.schrijfbestand(self.uitkomst, json.dumps({"tijd": \
+            time.time(), "rccode": rccode, "download": download, \
+            "upload": upload, "stap": stap, "gebruiker": self.gebruiker, \
+            "stroom": self.stroom}))
+        except (IOError, OSError):
+            ## De wachtenden loggen dan zelf in.
+            pass
+    
+    def gepubliceerd(self, sinds):
+        ## De uitkomst van een login voor dezelfde gebruiker en stroom die
+        ## na `sinds` eindigde, of None.
+        try:
+            with open(cachedir.cachebestand(self.uitkomst)) as bestand:
+                uitkomst = json.load(bestand)
+        except (IOError, OSError, ValueError):
+            return None
+        if uitkomst.get("tijd", 0) < sinds:
+            return None
+        if uitkomst.get("gebruiker") != self.gebruiker or \
+        uitkomst.get("stroom") != self.stroom:
+            return None
+        return uitkomst
+    
+    def verkrijg(self):
+        ## Geeft None terug als wij het slot hebben (en dus moeten inloggen),
+        ## of de uitkomst die een gelijktijdige login net gepubliceerd heeft.
+        wachtstart = time.time()
+        while True:
+            gekregen = self.probeer()
+            
+            ## Ook wie het slot net krijgt, kijkt eerst of de vorige
+            ## eigenaar intussen een uitkomst heeft achtergelaten.
+            uitkomst = self.gepubliceerd(wachtstart)
+            if uitkomst is not None:
+                self.vrijgeven()
+                return uitkomst
+            if gekregen:
+                return None
+            
+            inhoud = self.lees()
+            if inhoud is not None and self.verweesd(inhoud):
+                self.opruimen(inhoud)
+                continue
+            time.sleep(INTERVAL)
+    
+    def vrijgeven(self):
+        if self.eigenaar and self.lees() == self.inhoud:
+            os.remove(self.pad)
+        self.eigenaar = False
@@ -0,0 +1,113 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import contextlib                       ## Voor het slot als contextmanager
+import json                             ## Bestandsformaat van de toestand
+import time                             ## Leeftijd van de toestand
+import os                               ## Basislib
+
+import cachedir                         ## Map voor de toestand
+
+## De NetworkManager-dispatcher, cron en een login-hook roepen kotnetcli vaak
+## binnen enkele seconden na elkaar op. De laatste uitkomst (verbinding,
+## rc-code, tegoeden) wordt daarom even bijgehouden; binnen de TTL antwoordt
+## kotnetcli daaruit zonder het netwerk aan te spreken. Lezen en schrijven
+## gebeurt onder een bestandsslot, zodat gelijktijdige oproepen elkaars
+## wijzigingen niet overschrijven.
+
+TOESTAND = "toestand.json"
+SLOT = "toestand.lock"
+TTL = 60
+
+if os.name == "posix":
+    import fcntl
+
+    @contextlib.contextmanager
+    def vergrendeld(exclusief=False):
+        with open(cachedir.cachebestand(SLOT), "a") as slot:
+            fcntl.flock(slot, fcntl.LOCK_EX if exclusief else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(slot, fcntl.LOCK_UN)
+else:
+    @contextlib.contextmanager
+    def vergrendeld(exclusief=False):
+        ## Het bestand wordt atomair vervangen (zie cachedir.py); zonder
+        ## flock riskeren we hooguit dat de laatste schrijver wint.
+        yield
+
+def inlezen():
+    try:
+        with open(cachedir.cachebestand(TOESTAND)) as bestand:
+            return json.load(bestand)
+    except (IOError, OSError, ValueError):
+        return {}
+
+def lees(ttl=TTL):
+    ## Geeft de bewaarde toestand terug, of None als die er niet is of
+    ## ouder is dan ttl seconden.
+    with vergrendeld():
+        toestand = inlezen()
+    leeftijd = time.time() - toestand.get("tijd", 0)
+    if not toestand or not 0 <= leeftijd <= ttl:
+        return None
+    return toestand
+
+def bewaar(**velden):
+    ## Vervangt de toestand door de gegeven velden. Er wordt bewust niet
+    ## samengevoegd: een oude rc-code mag niet meeliften op een nieuwe tijd.
+    ## Na een peiling zonder login is bewaarVerbinding() de juiste keuze.
+    try:
+        with vergrendeld(exclusief=True):
+            toestand = dict(velden)
+            toestand["tijd"] = time.time()
+            cachedir.schrijfbestand(TOESTAND, json.dumps(toestand))
+    except (IOError, OSError):
+        ## Zonder cache werkt alles nog, alleen trager.
+        pass
+
+def bewaarVerbinding(verbinding):
+    ## Bewaart de uitkomst van een peiling. Blijft de verbinding dezelfde,
+    ## dan blijft ook de uitkomst van de laatste login (rc-code, tegoeden)
+    ## staan, met haar eigen tijd: die is door de peiling niet nieuwer
+    ## geworden. Verandert de verbinding, of was er geen login bewaard, dan
+    ## begint de toestand opnieuw met enkel de verbinding.
+    try:
+        with vergrendeld(exclusief=True):
+            toestand = inlezen()
+            if toestand.get("verbinding") == verbinding and \
+            "rccode" in toestand and "tijd" in toestand:
+                return
+            toestand = {"verbinding": verbinding, "tijd": time.time()}
+            cachedir.schrijfbestand(TOESTAND, json.dumps(toestand))
+    except (IOError, OSError):
+        pass
+
+def vergeet():
+    try:
+        with vergrendeld(exclusief=True):
+            os.remove(cachedir.cachebestand(TOESTAND))
+    except (IOError, OSError):
+        pass
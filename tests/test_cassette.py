@@ -0,0 +1,134 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Wat --record wegschrijft: de echte gebruikersnaam en het wachtwoord
+## mogen nergens in de cassette staan, ook niet als het wachtwoordveld een
+## naam heeft die niet op een wachtwoord lijkt.
+
+import tempfile                         ## Eigen map voor de cassette
+import unittest                         ## Testkader
+import urllib                           ## Geposte velden
+import shutil                           ## Opruimen
+import gzip                             ## Ruwe inhoud van de cassette
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import cassette                         ## Wat we testen
+
+GEBRUIKER = "r0741852"
+WACHTWOORD = "Zeer geheim&1"
+
+class Verzoek():
+    ## Genoeg van een mechanize-verzoek voor Opnemer.neemOp().
+    def __init__(self, methode, url, data=None):
+        self.methode = methode
+        self.url = url
+        self.data = data
+    
+    def get_method(self):
+        return self.methode
+    
+    def get_full_url(self):
+        return self.url
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.map = tempfile.mkdtemp()
+        self.pad = os.path.join(self.map, "login.cassette")
+        self.opnemer = cassette.Opnemer(self.pad)
+    
+    def tearDown(self):
+        shutil.rmtree(self.map)
+    
+    def neemLoginOp(self):
+        ## Het portaal noemt het wachtwoordveld willekeurig, hier "q7x2".
+        self.opnemer.neemOp(Verzoek("POST", \
+        "https://netlogin.kuleuven.be/cgi-bin/netlogin.pl", \
+        urllib.urlencode([("uid", "kuleuven/" + GEBRUIKER), \
+        ("q7x2", WACHTWOORD)])), 200, "OK", \
+        [("Set-Cookie", "sessie=abc"), ("X-Client", "10.1.2.3")], \
+        "<p>Welkom %s (%s) op 10.1.2.3 via 127.0.0.1</p>" \
+        "<input value=\"%s\">" % (GEBRUIKER, "kuleuven/" + GEBRUIKER, \
+        WACHTWOORD))
+        self.opnemer.neemOp(Verzoek("GET", \
+        "https://netlogin.kuleuven.be/status?wie=%s&ip=10.1.2.3" % \
+        GEBRUIKER), 200, "OK", [], "ok")
+    
+    def rauw(self):
+        with gzip.open(self.pad, "rb") as bestand:
+            return bestand.read()
+    
+    def testGemeldeGeheimenVerdwijnenOveral(self):
+        self.opnemer.geheim(GEBRUIKER, WACHTWOORD)
+        self.neemLoginOp()
+        self.opnemer.sluit()
+        inhoud = self.rauw()
+        for geheim in (GEBRUIKER, WACHTWOORD, urllib.quote_plus(WACHTWOORD), \
+        "10.1.2.3", "abc"):
+            self.assertFalse(geheim in inhoud, geheim)
+        
+        login, status = cassette.laad(self.pad)
+        self.assertEqual(login["verzoek"], urllib.urlencode([("uid", \
+        "kuleuven/" + cassette.GEBRUIKER), ("q7x2", cassette.WACHTWOORD)]))
+        self.assertEqual(login["koppen"], [("X-Client", "192.0.2.1")])
+        self.assertTrue("op 192.0.2.1 via 127.0.0.1" in login["inhoud"])
+        self.assertTrue(status["url"].endswith("?wie=%s&ip=192.0.2.1" % \
+        cassette.GEBRUIKER))
+    
+    def testUnicodeGeheimen(self):
+        self.opnemer.geheim(unicode(GEBRUIKER), WACHTWOORD.decode("utf-8"))
+        self.neemLoginOp()
+        self.opnemer.sluit()
+        self.assertFalse(WACHTWOORD in self.rauw())
+    
+    def testVeldnaamZonderMelding(self):
+        ## Zonder gemelde gegevens vindt de veldnaam "uid" nog altijd de
+        ## gebruikersnaam, ook in de HTML.
+        self.neemLoginOp()
+        gepoetst = cassette.poets(self.opnemer.uitwisselingen)
+        self.assertFalse(GEBRUIKER in gepoetst[0]["inhoud"])
+        self.assertFalse(GEBRUIKER in gepoetst[1]["url"])
+    
+    def testHerkenbaarWachtwoordveld(self):
+        uitwisselingen = [{"methode": "POST", "url": "https://x/", \
+        "verzoek": urllib.urlencode([("pwd1234", WACHTWOORD)]), \
+        "status": 200, "reden": "OK", "koppen": [], \
+        "inhoud": WACHTWOORD}]
+        gepoetst = cassette.poets(uitwisselingen)
+        self.assertEqual(gepoetst[0]["inhoud"], cassette.WACHTWOORD)
+    
+    def testModuleGeheimZonderOpname(self):
+        ## Workers melden altijd; zonder --record gebeurt er niets.
+        vorige = cassette.opnemer
+        cassette.opnemer = None
+        try:
+            cassette.geheim(GEBRUIKER, WACHTWOORD)
+        finally:
+            cassette.opnemer = vorige
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Leest de bewaarde portaalpagina's in benchmarks/pages/ zoals een worker
+## ze van netlogin krijgt: in één keer en in kleine stukken.
+##
+## Gebruik (vanuit de hoofdmap):
+##      $ python -m unittest discover
+
+import StringIO                         ## Respons uit het geheugen
+import unittest                         ## Testkader
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import extractor                        ## Wat we testen
+
+def pagina(naam):
+    with open(os.path.join(HIER, os.pardir, "benchmarks", "pages", \
+    naam)) as bestand:
+        return bestand.read()
+
+class Respons(StringIO.StringIO):
+    ## Houdt bij hoeveel er gelezen werd.
+    def __init__(self, inhoud):
+        StringIO.StringIO.__init__(self, inhoud)
+        self.gelezen = 0
+    
+    def read(self, n=-1):
+        stuk = StringIO.StringIO.read(self, n)
+        self.gelezen += len(stuk)
+        return stuk
+
+class TestExtractor(unittest.TestCase):
+    def testLoginRc100(self):
+        self.assertEqual(extractor.verwerk(pagina("login_rc100.html")), \
+        extractor.Tegoeden(100, 4096, 5120, 80, 5120, 5120, 100))
+    
+    def testLoginGeweigerdHeeftGeenTegoeden(self):
+        for rccode in (202, 206):
+            tegoeden = extractor.verwerk(pagina("login_rc%d.html" % rccode))
+            self.assertEqual(tegoeden, extractor.Tegoeden(rccode, None, \
+            None, None, None, None, None))
+    
+    def testLogout(self):
+        for rccode in (100, 207):
+            tegoeden = extractor.verwerk(pagina("logout_rc%d.html" % \
+            rccode), prefix="weblogout", tegoeden=False)
+            self.assertEqual(tegoeden.rccode, rccode)
+    
+    def testLoginprefixNietInLogout(self):
+        tegoeden = extractor.verwerk(pagina("logout_rc207.html"))
+        self.assertEqual(tegoeden.rccode, None)
+    
+    def testKleineStukken(self):
+        ## Elke stukgrootte legt "<!--" en "-->" wel eens op een grens.
+        html = pagina("login_rc100.html")
+        verwacht = extractor.verwerk(html)
+        for stukgrootte in (1, 2, 3, 5, 7, 64):
+            self.assertEqual(extractor.lees(Respons(html), \
+            stukgrootte=stukgrootte), verwacht)
+    
+    def testStoptZodraAllesGekendIs(self):
+        html = pagina("login_rc100.html")
+        respons = Respons(html + "<!-- opvulling -->" * 10000)
+        extractor.lees(respons, stukgrootte=256)
+        self.assertTrue(respons.gelezen < len(html) + 256)
+    
+    def testLegePagina(self):
+        self.assertEqual(extractor.verwerk("").rccode, None)
+
+if __name__ == "__main__":
+    unittest.main()
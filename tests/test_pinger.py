@@ -0,0 +1,122 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+## portaaldetectie() tegen een klein portaal op 127.0.0.1: een directe 204
+## is online, een omleiding naar netlogin betekent inloggen en een
+## geweigerde verbinding offline. Bij een omleiding komt de meegegeven
+## browser terug, al op de netloginpagina.
+
+import BaseHTTPServer                   ## Het nepportaal
+import threading                        ## Portaal in de achtergrond
+import unittest                         ## Testkader
+import socket                           ## Een poort zonder luisteraar
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import pinger                           ## Wat we testen
+
+try:
+    import mechanize                    ## Browser van de workers
+except ImportError:
+    mechanize = None
+
+NETLOGIN = "localhost"                  ## Andere naam voor 127.0.0.1
+
+class Portaal(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/generate_204":
+            self.send_response(204)
+            self.end_headers()
+        elif self.path == "/omleiding":
+            self.send_response(302)
+            self.send_header("Location", "http://%s:%d/netlogin" % \
+            (NETLOGIN, self.server.server_port))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            inhoud = "<html><body>netlogin</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(inhoud)))
+            self.end_headers()
+            self.wfile.write(inhoud)
+    
+    def log_message(self, *args):
+        pass
+
+def vrijePoort():
+    ## Een poort waarop niemand luistert: verbinden wordt geweigerd.
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    poort = s.getsockname()[1]
+    s.close()
+    return poort
+
+@unittest.skipUnless(mechanize is not None, "mechanize niet geïnstalleerd")
+class TestPortaaldetectie(unittest.TestCase):
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), Portaal)
+        self.draad = threading.Thread(target=self.server.serve_forever)
+        self.draad.daemon = True
+        self.draad.start()
+        self.basis = "http://127.0.0.1:%d" % self.server.server_port
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.draad.join()
+    
+    def detecteer(self, pad, browser=None):
+        return pinger.portaaldetectie(self.basis + pad, \
+        portaalhost=NETLOGIN, browser=browser)
+    
+    def testOnline(self):
+        self.assertEqual(self.detecteer("/generate_204"), (pinger.ONLINE, None))
+    
+    def testOmleidingNaarNetlogin(self):
+        uitkomst, browser = self.detecteer("/omleiding")
+        self.assertEqual(uitkomst, pinger.INLOGGEN)
+        self.assertTrue(browser.geturl().endswith("/netlogin"))
+    
+    def testOffline(self):
+        uitkomst, browser = pinger.portaaldetectie("http://127.0.0.1:%d/" % \
+        vrijePoort(), portaalhost=NETLOGIN)
+        self.assertEqual((uitkomst, browser), (pinger.OFFLINE, None))
+    
+    def testBrowserWordtHergebruikt(self):
+        import worker
+        eigen = worker.nieuweBrowser()
+        uitkomst, browser = self.detecteer("/omleiding", browser=eigen)
+        self.assertEqual(uitkomst, pinger.INLOGGEN)
+        self.assertTrue(browser is eigen)
+        ## Online: de browser is niet nodig, maar dezelfde blijft bruikbaar.
+        self.assertEqual(self.detecteer("/generate_204", browser=eigen), \
+        (pinger.ONLINE, None))
+
+if __name__ == "__main__":
+    unittest.main()
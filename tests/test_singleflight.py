@@ -0,0 +1,169 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## Het loginslot: verweesde sloten opruimen, een levend slot met rust laten
+## en de uitkomst van de eigenaar doorgeven aan wie wacht.
+
+import threading                        ## Gelijktijdige eigenaar
+import tempfile                         ## Eigen cachemap
+import unittest                         ## Testkader
+import shutil                           ## Opruimen
+import time                             ## Leeftijd van het slot
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import singleflight                     ## Wat we testen
+
+def dodepid():
+    ## Een pid dat zeker niet meer bestaat.
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    os.waitpid(pid, 0)
+    return pid
+
+class TestSlot(unittest.TestCase):
+    def setUp(self):
+        self.vorige = os.environ.get("KOTNETCLI_CACHE")
+        self.map = tempfile.mkdtemp()
+        os.environ["KOTNETCLI_CACHE"] = self.map
+    
+    def tearDown(self):
+        if self.vorige is None:
+            del os.environ["KOTNETCLI_CACHE"]
+        else:
+            os.environ["KOTNETCLI_CACHE"] = self.vorige
+        shutil.rmtree(self.map)
+    
+    def legSlot(self, inhoud, leeftijd=0):
+        pad = singleflight.Slot().pad
+        with open(pad, "w") as bestand:
+            bestand.write(inhoud)
+        if leeftijd:
+            os.utime(pad, (time.time() - leeftijd, time.time() - leeftijd))
+        return pad
+    
+    def verkrijgBinnen(self, slot, seconden=2):
+        begin = time.time()
+        uitkomst = slot.verkrijg()
+        self.assertTrue(time.time() - begin < seconden)
+        return uitkomst
+    
+    @unittest.skipUnless(os.name == "posix", "os.kill(pid, 0) enkel op posix")
+    def testDodeEigenaar(self):
+        pad = self.legSlot("%d %f" % (dodepid(), time.time()))
+        slot = singleflight.Slot()
+        self.assertEqual(self.verkrijgBinnen(slot), None)
+        self.assertTrue(slot.eigenaar)
+        self.assertEqual(slot.lees(), slot.inhoud)
+        slot.vrijgeven()
+        self.assertFalse(os.path.exists(pad))
+    
+    def testTeOudSlot(self):
+        ## Een levende eigenaar die er langer dan maxleeftijd over doet.
+        self.legSlot("%d %f" % (os.getpid(), time.time() - 120))
+        slot = singleflight.Slot(maxleeftijd=60)
+        self.assertEqual(self.verkrijgBinnen(slot), None)
+        self.assertTrue(slot.eigenaar)
+        slot.vrijgeven()
+    
+    def testHalfGeschrevenSlot(self):
+        slot = singleflight.Slot(maxleeftijd=60)
+        self.legSlot("123", leeftijd=5)
+        self.assertFalse(slot.verweesd("123"))
+        self.legSlot("123", leeftijd=120)
+        self.assertTrue(slot.verweesd("123"))
+    
+    def testLevendSlotIsNietVerweesd(self):
+        inhoud = "%d %f" % (os.getpid(), time.time())
+        self.legSlot(inhoud)
+        self.assertFalse(singleflight.Slot().verweesd(inhoud))
+    
+    def testOpruimenLaatNieuwSlotStaan(self):
+        ## Iemand anders ruimde het verweesde slot al op en nam een nieuw;
+        ## dat mogen wij niet weggooien.
+        oud = "%d %f" % (os.getpid(), time.time() - 120)
+        nieuw = "%d %f" % (os.getpid(), time.time())
+        pad = self.legSlot(nieuw)
+        singleflight.Slot().opruimen(oud)
+        with open(pad) as bestand:
+            self.assertEqual(bestand.read(), nieuw)
+        self.assertEqual(os.listdir(self.map), [os.path.basename(pad)])
+    
+    def testVrijgevenLaatVreemdSlotStaan(self):
+        slot = singleflight.Slot()
+        self.assertEqual(slot.verkrijg(), None)
+        pad = self.legSlot("%d %f" % (os.getpid(), time.time() + 1))
+        slot.vrijgeven()
+        self.assertTrue(os.path.exists(pad))
+    
+    def testWachtendeKrijgtUitkomst(self):
+        ## Ook een geweigerde login (rc=202) wordt gedeeld.
+        eigenaar = singleflight.Slot()
+        self.assertEqual(eigenaar.verkrijg(), None)
+        
+        def login():
+            time.sleep(0.2)
+            eigenaar.publiceer(rccode=202)
+            eigenaar.vrijgeven()
+        draad = threading.Thread(target=login)
+        draad.start()
+        uitkomst = self.verkrijgBinnen(singleflight.Slot())
+        draad.join()
+        self.assertEqual(uitkomst["rccode"], 202)
+        self.assertEqual(uitkomst["stap"], None)
+    
+    def testAndereGebruikerLogtZelfIn(self):
+        eigenaar = singleflight.Slot(gebruiker="r0123456", stroom="login")
+        self.assertEqual(eigenaar.verkrijg(), None)
+        
+        def login():
+            time.sleep(0.2)
+            eigenaar.publiceer(rccode=100, download=80, upload=100)
+            eigenaar.vrijgeven()
+        draad = threading.Thread(target=login)
+        draad.start()
+        for gebruiker, stroom in [("gast", "login"), \
+        ("r0123456", "force_login")]:
+            slot = singleflight.Slot(gebruiker=gebruiker, stroom=stroom)
+            self.assertEqual(self.verkrijgBinnen(slot), None)
+            self.assertTrue(slot.eigenaar)
+            slot.vrijgeven()
+        draad.join()
+        
+        zelfde = singleflight.Slot(gebruiker="r0123456", stroom="login")
+        self.assertEqual(zelfde.gepubliceerd(0)["rccode"], 100)
+    
+    def testOudeUitkomstTeltNiet(self):
+        singleflight.Slot().publiceer(rccode=100, download=80, upload=100)
+        time.sleep(0.01)
+        slot = singleflight.Slot()
+        self.assertEqual(slot.verkrijg(), None)
+        slot.vrijgeven()
+
+if __name__ == "__main__":
+    unittest.main()
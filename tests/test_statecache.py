@@ -0,0 +1,137 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## De toestand van de vorige oproep: bewaren, verlopen na de TTL en het
+## bestandsslot tussen gelijktijdige oproepen.
+
+import threading                        ## Gelijktijdige schrijver
+import tempfile                         ## Eigen cachemap
+import unittest                         ## Testkader
+import shutil                           ## Opruimen
+import json                             ## Toestand met oude tijd
+import time                             ## Leeftijd
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import cachedir                         ## Bestanden in de cachemap
+import statecache                       ## Wat we testen
+
+class TestStatecache(unittest.TestCase):
+    def setUp(self):
+        self.vorige = os.environ.get("KOTNETCLI_CACHE")
+        self.map = tempfile.mkdtemp()
+        os.environ["KOTNETCLI_CACHE"] = self.map
+    
+    def tearDown(self):
+        if self.vorige is None:
+            del os.environ["KOTNETCLI_CACHE"]
+        else:
+            os.environ["KOTNETCLI_CACHE"] = self.vorige
+        shutil.rmtree(self.map)
+    
+    def schrijf(self, leeftijd, **velden):
+        velden["tijd"] = time.time() - leeftijd
+        cachedir.schrijfbestand(statecache.TOESTAND, json.dumps(velden))
+    
+    def testBewaarEnLees(self):
+        statecache.bewaar(verbinding="online", rccode=100, download=80)
+        toestand = statecache.lees()
+        self.assertEqual(toestand["rccode"], 100)
+        self.assertEqual(toestand["download"], 80)
+        self.assertTrue(0 <= time.time() - toestand["tijd"] < 5)
+    
+    def testVerlooptNaTtl(self):
+        self.schrijf(120, rccode=100)
+        self.assertEqual(statecache.lees(ttl=60), None)
+        self.assertEqual(statecache.lees(ttl=300)["rccode"], 100)
+    
+    def testToekomstIsOngeldig(self):
+        ## Na een sprong terug van de klok is de toestand niet te vertrouwen.
+        self.schrijf(-120, rccode=100)
+        self.assertEqual(statecache.lees(ttl=300), None)
+    
+    def testBewaarVoegtNietSamen(self):
+        statecache.bewaar(verbinding="online", rccode=100, download=80)
+        statecache.bewaar(verbinding="inloggen")
+        toestand = statecache.lees()
+        self.assertEqual(toestand["verbinding"], "inloggen")
+        self.assertFalse("rccode" in toestand)
+    
+    def testPeilingBehoudtLogin(self):
+        self.schrijf(10, verbinding="online", rccode=100, download=80, \
+        upload=90)
+        statecache.bewaarVerbinding("online")
+        toestand = statecache.lees()
+        self.assertEqual(toestand["rccode"], 100)
+        self.assertEqual(toestand["upload"], 90)
+        ## De tegoeden zijn door de peiling niet nieuwer geworden.
+        self.assertTrue(time.time() - toestand["tijd"] >= 10)
+
+    def testAndereVerbindingWistLogin(self):
+        statecache.bewaar(verbinding="online", rccode=100, download=80)
+        statecache.bewaarVerbinding("inloggen")
+        toestand = statecache.lees()
+        self.assertEqual(toestand["verbinding"], "inloggen")
+        self.assertFalse("rccode" in toestand)
+
+    def testPeilingZonderLogin(self):
+        self.schrijf(30, verbinding="offline")
+        statecache.bewaarVerbinding("offline")
+        self.assertTrue(time.time() - statecache.lees()["tijd"] < 5)
+
+    def testVergeet(self):
+        statecache.bewaar(rccode=100)
+        statecache.vergeet()
+        self.assertEqual(statecache.lees(), None)
+        ## Twee keer vergeten mag.
+        statecache.vergeet()
+    
+    def testKapotBestand(self):
+        cachedir.schrijfbestand(statecache.TOESTAND, "{half")
+        self.assertEqual(statecache.lees(), None)
+    
+    @unittest.skipUnless(os.name == "posix", "flock enkel op posix")
+    def testSchrijverWachtOpSlot(self):
+        import fcntl
+        slot = open(cachedir.cachebestand(statecache.SLOT), "a")
+        fcntl.flock(slot, fcntl.LOCK_SH)
+        draad = threading.Thread(target=statecache.bewaar, \
+        kwargs={"rccode": 100})
+        draad.start()
+        try:
+            time.sleep(0.2)
+            self.assertTrue(draad.is_alive())
+            self.assertEqual(statecache.inlezen(), {})
+        finally:
+            fcntl.flock(slot, fcntl.LOCK_UN)
+            slot.close()
+        draad.join(5)
+        self.assertFalse(draad.is_alive())
+        self.assertEqual(statecache.inlezen()["rccode"], 100)
+
+if __name__ == "__main__":
+    unittest.main()
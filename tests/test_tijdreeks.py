@@ -0,0 +1,112 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## De reeks van tegoeden: wat voegtoe() schrijft, moet Reeks byte voor byte
+## zo teruglezen (kop, recordbreedte, volgorde), ook na een half record.
+
+import tempfile                         ## Eigen map voor de reeks
+import unittest                         ## Testkader
+import shutil                           ## Opruimen
+import struct                           ## Records nalezen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import extractor                        ## Tegoeden
+import tijdreeks                        ## Wat we testen
+
+def tegoeden(download, upload, downloadpercentage, uploadpercentage):
+    return extractor.Tegoeden(100, download, None, downloadpercentage, \
+    upload, None, uploadpercentage)
+
+class TestTijdreeks(unittest.TestCase):
+    def setUp(self):
+        self.map = tempfile.mkdtemp()
+        self.pad = os.path.join(self.map, tijdreeks.REEKS)
+    
+    def tearDown(self):
+        shutil.rmtree(self.map)
+    
+    def testRecordindeling(self):
+        ## Een record is 10 bytes, little-endian, na een kop van 8 bytes.
+        self.assertEqual(tijdreeks.KOP.size, 8)
+        self.assertEqual(tijdreeks.RECORD.size, 10)
+        tijdreeks.voegtoe(tegoeden(4096, 5120, 80, 100), tijd=1445000000, \
+        pad=self.pad)
+        with open(self.pad, "rb") as bestand:
+            inhoud = bestand.read()
+        self.assertEqual(inhoud, struct.pack("<4sHH", "KTQ1", 1, 10) + \
+        struct.pack("<IHHBB", 1445000000, 4096, 5120, 80, 100))
+    
+    def testHeenEnTerug(self):
+        metingen = [tijdreeks.Meting(1445000000 + 60 * i, 5000 - i, \
+        5120 - 2 * i, 90 - i % 90, 100 - i % 100) for i in range(500)]
+        for m in metingen:
+            tijdreeks.voegtoe(tegoeden(m.download, m.upload, \
+            m.downloadpercentage, m.uploadpercentage), tijd=m.tijd, \
+            pad=self.pad)
+        with tijdreeks.Reeks(self.pad) as reeks:
+            self.assertEqual(len(reeks), len(metingen))
+            self.assertEqual(list(reeks.bereik()), metingen)
+            self.assertEqual(reeks[-1], metingen[-1])
+            self.assertRaises(IndexError, lambda: reeks[len(metingen)])
+            self.assertEqual(list(reeks.bereik(metingen[10].tijd, \
+            metingen[20].tijd)), metingen[10:20])
+            self.assertEqual(list(reeks.bereik(metingen[10].tijd + 1)), \
+            metingen[11:])
+    
+    def testWaardenWordenBegrensd(self):
+        tijdreeks.voegtoe(tegoeden(100000, -5, 150, None), tijd=1, \
+        pad=self.pad)
+        with tijdreeks.Reeks(self.pad) as reeks:
+            self.assertEqual(reeks[0], tijdreeks.Meting(1, 0xffff, 0, 100, 0))
+    
+    def testHalfRecordWordtAfgekapt(self):
+        tijdreeks.voegtoe(tegoeden(1, 2, 3, 4), tijd=10, pad=self.pad)
+        with open(self.pad, "ab") as bestand:
+            bestand.write("\x01\x02\x03")
+        tijdreeks.voegtoe(tegoeden(5, 6, 7, 8), tijd=20, pad=self.pad)
+        with tijdreeks.Reeks(self.pad) as reeks:
+            self.assertEqual(list(reeks.bereik()), \
+            [tijdreeks.Meting(10, 1, 2, 3, 4), \
+            tijdreeks.Meting(20, 5, 6, 7, 8)])
+    
+    def testGeenReeks(self):
+        with tijdreeks.Reeks(self.pad) as reeks:
+            self.assertEqual(len(reeks), 0)
+            self.assertEqual(list(reeks.bereik()), [])
+        with open(self.pad, "wb") as bestand:
+            bestand.write("GEEN REEKS, MAAR TEKST")
+        self.assertRaises(ValueError, tijdreeks.Reeks, self.pad)
+    
+    def testPer(self):
+        metingen = [tijdreeks.Meting(t, 0, 0, 0, 0) for t in \
+        (0, 10, 59, 60, 61, 180)]
+        self.assertEqual([m.tijd for m in tijdreeks.per(metingen, 60)], \
+        [59, 61, 180])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+## De lopende sommen van voorspelling.py: bijwerken over meerdere oproepen
+## heen moet exact hetzelfde geven als alles opnieuw uitrekenen, en
+## hetzelfde als een rechtstreekse kleinste-kwadratenrechte.
+
+import tempfile                         ## Eigen cachemap
+import unittest                         ## Testkader
+import shutil                           ## Opruimen
+import random                           ## Onregelmatige metingen
+import sys                              ## Basislib
+import os                               ## Basislib
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HIER, os.pardir))
+
+import cachedir                         ## Bewaarde sommen
+import extractor                        ## Tegoeden
+import tijdreeks                        ## De reeks
+import voorspelling                     ## Wat we testen
+
+def rechtstreeks(metingen, uren):
+    ## Kleinste kwadraten over de metingen in het venster, zonder sommen.
+    grens = metingen[-1].tijd - uren * 3600
+    venster = [m for m in metingen if m.tijd >= grens]
+    xs = [m.tijd for m in venster]
+    xgem = float(sum(xs)) / len(xs)
+    noemer = sum((x - xgem) ** 2 for x in xs)
+    def helling(ys):
+        ygem = float(sum(ys)) / len(ys)
+        return -3600 * sum((x - xgem) * (y - ygem) for x, y in \
+        zip(xs, ys)) / noemer
+    return len(venster), helling([m.download for m in venster]), \
+    helling([m.upload for m in venster])
+
+class TestVoorspelling(unittest.TestCase):
+    def setUp(self):
+        self.vorige = os.environ.get("KOTNETCLI_CACHE")
+        self.map = tempfile.mkdtemp()
+        os.environ["KOTNETCLI_CACHE"] = self.map
+        self.pad = os.path.join(self.map, tijdreeks.REEKS)
+        self.metingen = []
+        self.tijd = 1445000000
+        self.download = 50000
+        self.upload = 50000
+        self.toeval = random.Random(17)
+    
+    def tearDown(self):
+        if self.vorige is None:
+            del os.environ["KOTNETCLI_CACHE"]
+        else:
+            os.environ["KOTNETCLI_CACHE"] = self.vorige
+        shutil.rmtree(self.map)
+    
+    def meet(self, aantal, stap=600):
+        for i in range(aantal):
+            self.tijd += self.toeval.randint(stap // 2, stap * 2)
+            self.download -= self.toeval.randint(0, 30)
+            self.upload -= self.toeval.randint(0, 5)
+            tegoeden = extractor.Tegoeden(100, self.download, None, 80, \
+            self.upload, None, 90)
+            tijdreeks.voegtoe(tegoeden, tijd=self.tijd, pad=self.pad)
+            self.metingen.append(tijdreeks.Meting(self.tijd, \
+            self.download, self.upload, 80, 90))
+    
+    def schat(self, vensters=voorspelling.VENSTERS):
+        with tijdreeks.Reeks(self.pad) as reeks:
+            return voorspelling.schat(reeks, vensters)
+    
+    def opnieuw(self, vensters=voorspelling.VENSTERS):
+        ## Zonder bewaarde sommen, maar die blijven daarna wel staan voor
+        ## de volgende bijgewerkte schatting.
+        pad = cachedir.cachebestand(voorspelling.SOMMEN)
+        with open(pad) as bestand:
+            bewaard = bestand.read()
+        os.remove(pad)
+        try:
+            return self.schat(vensters)
+        finally:
+            cachedir.schrijfbestand(voorspelling.SOMMEN, bewaard)
+    
+    def vergelijk(self, schattingen):
+        for schatting in schattingen:
+            n, download, upload = rechtstreeks(self.metingen, \
+            schatting.venster)
+            self.assertEqual(schatting.metingen, n)
+            self.assertAlmostEqual(schatting.download, download, places=6)
+            self.assertAlmostEqual(schatting.upload, upload, places=6)
+    
+    def testBijwerkenGelijkAanOpnieuw(self):
+        for ronde in range(30):
+            self.meet(self.toeval.randint(1, 40))
+            bijgewerkt = self.schat()
+            self.vergelijk(bijgewerkt)
+            self.assertEqual(self.opnieuw(), bijgewerkt)
+    
+    def testSprongGroterDanVenster(self):
+        self.meet(100)
+        self.schat()
+        self.tijd += 30 * 24 * 3600
+        self.meet(50)
+        self.vergelijk(self.schat())
+    
+    def testVensterDatNietGevraagdWerd(self):
+        ## Een venster dat een keer overgeslagen wordt, loopt daarna weer
+        ## juist mee.
+        self.meet(100)
+        self.schat([6, 24])
+        self.meet(100)
+        self.schat([6])
+        self.meet(100)
+        self.vergelijk(self.schat([6, 24]))
+    
+    def testIngekorteReeks(self):
+        self.meet(200)
+        self.schat()
+        os.remove(self.pad)
+        self.metingen = []
+        self.meet(20)
+        self.vergelijk(self.schat())
+    
+    def testGekendVerbruik(self):
+        for i in range(10):
+            tegoeden = extractor.Tegoeden(100, 5000 - 10 * i, None, 80, \
+            4000, None, 90)
+            tijdreeks.voegtoe(tegoeden, tijd=1445000000 + 3600 * i, \
+            pad=self.pad)
+        schatting = self.schat([24])[0]
+        self.assertEqual(schatting.metingen, 10)
+        self.assertAlmostEqual(schatting.download, 10.0)
+        self.assertAlmostEqual(schatting.upload, 0.0)
+    
+    def testTeWeinigMetingen(self):
+        self.meet(1)
+        self.assertEqual(self.schat([6])[0].download, None)
+
+if __name__ == "__main__":
+    unittest.main()
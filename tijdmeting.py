@@ -0,0 +1,297 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json                             ## Bewaarde histogrammen
+import math                             ## Grenzen van de emmers
+import time                             ## Datum per dag, terugvalklok
+import sys                              ## Platform
+
+import cachedir                         ## Map voor de histogrammen
+
+## Meet hoe lang elke stap van een login of logout duurt. TimingCommunicator
+## zet zich tussen de worker en de eigenlijke communicator: elk paar
+## eventXStart / eventXSuccess of eventXFailure wordt één meting van stap X
+## met uitkomst "succes" of "mislukt". De hele stroom ("totaal") slaagt enkel
+## bij een rc-code die de stroom doet slagen (zie uitkomstVan()); een login
+## met rc=202 of 206 is "geweigerd", ook al liep elke stap goed. Per stroom
+## (login, logout, force_login), stap en uitkomst komen de metingen in een
+## histogram met vier emmers per verdubbeling (stappen van ~19%). De
+## histogrammen worden per dag samengeteld in de cache, zodat p50, p95 en
+## p99 over meerdere oproepen heen te volgen zijn.
+
+BESTAND = "tijdmetingen.json"
+PEROCTAAF = 4                           ## emmers per verdubbeling
+DAGEN = 30                              ## zo lang blijven histogrammen
+TREND = 7                               ## dagen in de trend van toon()
+GESLAAGD = {"logout": (100, 207)}       ## rc-codes van een geslaagde stroom,
+                                        ## anders enkel 100
+
+def uitkomstVan(stroom, rccode):
+    ## Uitkomst van een hele stroom die tot een rc-code kwam; None betekent
+    ## dat een stap misliep voor er een rc-code was.
+    if rccode is None:
+        return "mislukt"
+    if rccode in GESLAAGD.get(stroom, (100,)):
+        return "succes"
+    return "geweigerd"
+
+def laadKlok():
+    ## time.time() kan verspringen (NTP, zomeruur); op Linux lezen we
+    ## CLOCK_MONOTONIC rechtstreeks via ctypes.
+    if not sys.platform.startswith("linux"):
+        return time.time
+    try:
+        import ctypes
+        class Tijdspec(ctypes.Structure):
+            _fields_ = [("seconden", ctypes.c_long), \
+            ("nanoseconden", ctypes.c_long)]
+        clock_gettime = ctypes.CDLL(None, use_errno=True).clock_gettime
+        clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(Tijdspec)]
+    except (OSError, AttributeError):
+        return time.time
+    
+    tijdspec = Tijdspec()
+    def monotoon():
+        clock_gettime(1, ctypes.byref(tijdspec))     ## CLOCK_MONOTONIC
+        return tijdspec.seconden + tijdspec.nanoseconden * 1e-9
+    return monotoon
+
+monotoon = laadKlok()
+
+def emmer(duur):
+    ## Index van de emmer voor een duur in seconden; emmer i loopt tot
+    ## 2 ** (i / PEROCTAAF) milliseconden.
+    milliseconden = duur * 1000.0
+    if milliseconden <= 1:
+        return 0
+    return int(math.ceil(PEROCTAAF * math.log(milliseconden, 2)))
+
+def bovengrens(index):
+    return 2 ** (float(index) / PEROCTAAF) / 1000.0
+
+class Histogram():
+    def __init__(self, toestand=None):
+        toestand = toestand or {}
+        self.emmers = dict((int(index), aantal) for index, aantal in \
+        toestand.get("emmers", {}).items())
+        self.aantal = toestand.get("aantal", 0)
+        self.som = toestand.get("som", 0.0)
+        self.maximum = toestand.get("maximum", 0.0)
+    
+    def toestand(self):
+        return {"emmers": dict((str(index), aantal) for index, aantal in \
+        self.emmers.items()), "aantal": self.aantal, "som": self.som, \
+        "maximum": self.maximum}
+    
+    def voegtoe(self, duur):
+        index = emmer(duur)
+        self.emmers[index] = self.emmers.get(index, 0) + 1
+        self.aantal += 1
+        self.som += duur
+        self.maximum = max(self.maximum, duur)
+    
+    def samenvoegen(self, ander):
+        for index, aantal in ander.emmers.items():
+            self.emmers[index] = self.emmers.get(index, 0) + aantal
+        self.aantal += ander.aantal
+        self.som += ander.som
+        self.maximum = max(self.maximum, ander.maximum)
+    
+    def percentiel(self, p):
+        ## Bovengrens van de emmer waarin het p-de percentiel valt, in
+        ## seconden. Nooit meer dan de grootste meting.
+        if self.aantal == 0:
+            return None
+        nodig = p / 100.0 * self.aantal
+        geteld = 0
+        for index in sorted(self.emmers):
+            geteld += self.emmers[index]
+            if geteld >= nodig:
+                return min(bovengrens(index), self.maximum)
+        return self.maximum
+
+def laad():
+    try:
+        with open(cachedir.cachebestand(BESTAND)) as bestand:
+            return json.load(bestand)
+    except (IOError, OSError, ValueError):
+        return {}
+
+def bewaar(dagen):
+    try:
+        cachedir.schrijfbestand(BESTAND, json.dumps(dagen, sort_keys=True))
+    except (IOError, OSError):
+        pass
+
+def sleutel(stap, uitkomst):
+    return "%s/%s" % (stap, uitkomst)
+
+def samengeteld(dagen, stroom, laatste=None):
+    ## Alle histogrammen van een stroom, over de laatste `laatste` dagen
+    ## (of alle bewaarde), per sleutel samengeteld.
+    totaal = {}
+    for dag in sorted(dagen)[-laatste if laatste else 0:]:
+        for naam, toestand in dagen[dag].get(stroom, {}).items():
+            totaal.setdefault(naam, Histogram()).samenvoegen( \
+            Histogram(toestand))
+    return totaal
+
+class TimingCommunicator():
+    ## Geeft alle events door aan `co` en meet intussen de stappen. Al de
+    ## rest (bv. eigen attributen van `co`) gaat via __getattr__.
+    def __init__(self, co, stroom="login"):
+        self.co = co
+        self.stroom = stroom
+        self.begin = monotoon()
+        self.gestart = {}
+        self.metingen = []              ## (stap, uitkomst, duur)
+        self.rccode = None              ## van de laatste tegoeden()
+        self.herhaling = False
+        self.afgerond = False
+    
+    def __getattr__(self, naam):
+        return getattr(self.co, naam)
+    
+    def start(self, stap):
+        self.gestart[stap] = monotoon()
+    
+    def einde(self, stap, uitkomst):
+        begin = self.gestart.pop(stap, None)
+        if begin is not None and not self.herhaling:
+            self.meet(stap, uitkomst, monotoon() - begin)
+    
+    def meet(self, stap, uitkomst, duur):
+        self.metingen.append((stap, uitkomst, duur))
+    
+    def eventSnelloginStart(self):
+        self.start("snel")
+        self.co.eventSnelloginStart()
+    def eventSnelloginSuccess(self):
+        self.einde("snel", "succes")
+        ## Wat volgt, is enkel het melden van de vier stappen die de snelle
+        ## login al gedaan heeft; daar valt niets aan te meten.
+        self.herhaling = True
+        self.co.eventSnelloginSuccess()
+    def eventSnelloginFailure(self):
+        self.einde("snel", "mislukt")
+        self.co.eventSnelloginFailure()
+    
+    def eventNetloginStart(self):
+        self.start("netlogin")
+        self.co.eventNetloginStart()
+    def eventNetloginSuccess(self):
+        self.einde("netlogin", "succes")
+        self.co.eventNetloginSuccess()
+    def eventNetloginFailure(self):
+        self.einde("netlogin", "mislukt")
+        self.co.eventNetloginFailure()
+    
+    def eventKuleuvenStart(self):
+        self.start("kuleuven")
+        self.co.eventKuleuvenStart()
+    def eventKuleuvenSuccess(self):
+        self.einde("kuleuven", "succes")
+        self.co.eventKuleuvenSuccess()
+    def eventKuleuvenFailure(self):
+        self.einde("kuleuven", "mislukt")
+        self.co.eventKuleuvenFailure()
+    
+    def eventInvoerenStart(self):
+        self.start("invoeren")
+        self.co.eventInvoerenStart()
+    def eventInvoerenSuccess(self):
+        self.einde("invoeren", "succes")
+        self.co.eventInvoerenSuccess()
+    def eventInvoerenFailure(self):
+        self.einde("invoeren", "mislukt")
+        self.co.eventInvoerenFailure()
+    
+    def eventOpsturenStart(self):
+        self.start("opsturen")
+        self.co.eventOpsturenStart()
+    def eventOpsturenSuccess(self):
+        self.einde("opsturen", "succes")
+        self.herhaling = False
+        self.co.eventOpsturenSuccess()
+    def eventOpsturenFailure(self):
+        self.einde("opsturen", "mislukt")
+        self.co.eventOpsturenFailure()
+    
+    def eventRccodeBekend(self, rccode):
+        self.rccode = rccode
+        self.co.eventRccodeBekend(rccode)
+    
+    def afronden(self):
+        ## Meet de hele stroom en telt alle metingen bij de histogrammen
+        ## van vandaag. Geeft de bijgewerkte histogrammen terug.
+        if self.afgerond:
+            return laad()
+        self.afgerond = True
+        mislukt = any(uitkomst == "mislukt" and stap != "snel" \
+        for stap, uitkomst, duur in self.metingen)
+        self.metingen.append(("totaal", "mislukt" if mislukt else \
+        uitkomstVan(self.stroom, self.rccode), monotoon() - self.begin))
+        
+        dagen = laad()
+        vandaag = dagen.setdefault(time.strftime("%Y-%m-%d"), {})
+        histogrammen = vandaag.setdefault(self.stroom, {})
+        for stap, uitkomst, duur in self.metingen:
+            histogram = Histogram(histogrammen.get(sleutel(stap, uitkomst)))
+            histogram.voegtoe(duur)
+            histogrammen[sleutel(stap, uitkomst)] = histogram.toestand()
+        for dag in sorted(dagen)[:-DAGEN]:
+            del dagen[dag]
+        bewaar(dagen)
+        return dagen
+    
+    def toon(self):
+        ## Rondt af en drukt de metingen van deze keer af naast p50, p95 en
+        ## p99 over alle bewaarde dagen.
+        dagen = self.afronden()
+        histogrammen = samengeteld(dagen, self.stroom)
+        
+        def ms(duur):
+            if duur is None:
+                return "-"
+            return "%.1f" % (duur * 1000)
+        
+        print "%s: tijden in ms, percentielen over %d dag(en)" % \
+        (self.stroom, len(dagen))
+        print "%-9s %-8s %9s %7s %8s %8s %8s" % ("stap", "uitkomst", \
+        "nu", "aantal", "p50", "p95", "p99")
+        for stap, uitkomst, duur in self.metingen:
+            histogram = histogrammen.get(sleutel(stap, uitkomst), Histogram())
+            print "%-9s %-8s %9s %7d %8s %8s %8s" % (stap, uitkomst, \
+            ms(duur), histogram.aantal, ms(histogram.percentiel(50)), \
+            ms(histogram.percentiel(95)), ms(histogram.percentiel(99)))
+        
+        trend = []
+        for dag in sorted(dagen)[-TREND:]:
+            histogram = samengeteld({dag: dagen[dag]}, self.stroom).get( \
+            sleutel("totaal", "succes"))
+            if histogram is not None:
+                trend.append("%s %s" % (dag[5:], \
+                ms(histogram.percentiel(95))))
+        if trend:
+            print "p95 totaal per dag: %s" % ", ".join(trend)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import collections                      ## Voor namedtuple
+import bisect                           ## Zoeken op tijd
+import struct                           ## Vaste records
+import mmap                             ## Lezen zonder alles in te laden
+import time                             ## Tijdstip van een meting
+import os                               ## Basislib
+
+import cachedir                         ## Map voor de reeks
+
+## Elke keer dat de tegoeden gekend zijn (na een login of in --monitor),
+## voegen we een meting toe aan een binair bestand dat enkel groeit: een kop
+## gevolgd door records van vaste breedte, in volgorde van tijd. Een record
+## is 10 bytes:
+##
+##      tijd (uint32, seconden sinds 1970)
+##      download, upload (uint16, MB over)
+##      downloadpercentage, uploadpercentage (uint8)
+##
+## Lezen gebeurt via mmap: record i staat op KOP.size + i * RECORD.size, en
+## een bereik vinden we met bisect op de tijd. Zo blijven vragen over
+## maanden aan metingen snel zonder het bestand in het geheugen te laden.
+
+REEKS = "tegoeden.bin"
+MAGIE = "KTQ1"
+KOP = struct.Struct("<4sHH")            ## magie, versie, recordgrootte
+RECORD = struct.Struct("<IHHBB")
+VERSIE = 1
+
+Meting = collections.namedtuple("Meting", ["tijd", "download", "upload", \
+"downloadpercentage", "uploadpercentage"])
+
+def reekspad(pad=None):
+    return pad or cachedir.cachebestand(REEKS)
+
+def begrens(waarde, maximum):
+    if waarde is None:
+        return 0
+    return max(0, min(int(waarde), maximum))
+
+def voegtoe(tegoeden, tijd=None, pad=None):
+    ## Voegt één meting toe (een extractor.Tegoeden). Eén write() op een
+    ## bestand in append-modus: gelijktijdige schrijvers lopen elkaar niet
+    ## voor de voeten.
+    record = RECORD.pack(int(tijd or time.time()), \
+    begrens(tegoeden.download, 0xffff), begrens(tegoeden.upload, 0xffff), \
+    begrens(tegoeden.downloadpercentage, 100), \
+    begrens(tegoeden.uploadpercentage, 100))
+    
+    fd = os.open(reekspad(pad), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0600)
+    try:
+        grootte = os.fstat(fd).st_size
+        if grootte == 0:
+            os.write(fd, KOP.pack(MAGIE, VERSIE, RECORD.size))
+        elif (grootte - KOP.size) % RECORD.size:
+            ## Een half geschreven record (stroomonderbreking): afkappen,
+            ## anders schuiven alle volgende records op.
+            os.ftruncate(fd, grootte - (grootte - KOP.size) % RECORD.size)
+        os.write(fd, record)
+    finally:
+        os.close(fd)
+
+class Reeks():
+    ## Alleen-lezen zicht op de reeks. len(reeks) is het aantal metingen,
+    ## reeks[i] de i-de meting.
+    def __init__(self, pad=None):
+        self.kaart = None
+        self.aantal = 0
+        try:
+            bestand = open(reekspad(pad), "rb")
+        except IOError:
+            return
+        with bestand:
+            grootte = os.fstat(bestand.fileno()).st_size
+            if grootte <= KOP.size:
+                return
+            self.kaart = mmap.mmap(bestand.fileno(), 0, \
+            access=mmap.ACCESS_READ)
+        
+        magie, versie, recordgrootte = KOP.unpack_from(self.kaart, 0)
+        if magie != MAGIE or recordgrootte != RECORD.size:
+            self.sluit()
+            raise ValueError("%s is geen reeks van tegoeden" % \
+            reekspad(pad))
+        self.aantal = (grootte - KOP.size) // RECORD.size
+    
+    def __len__(self):
+        return self.aantal
+    
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.aantal
+        if not 0 <= i < self.aantal:
+            raise IndexError(i)
+        return Meting(*RECORD.unpack_from(self.kaart, \
+        KOP.size + i * RECORD.size))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *fout):
+        self.sluit()
+    
+    def sluit(self):
+        if self.kaart is not None:
+            self.kaart.close()
+            self.kaart = None
+        self.aantal = 0
+    
+    def index(self, tijd):
+        ## Index van de eerste meting op of na tijd.
+        return bisect.bisect_left(Tijden(self), tijd)
+    
+    def bereik(self, van=None, tot=None):
+        ## Alle metingen met van <= tijd < tot, één voor één.
+        begin = 0 if van is None else self.index(van)
+        einde = self.aantal if tot is None else self.index(tot)
+        for i in xrange(begin, einde):
+            yield self[i]
+
+class Tijden():
+    ## Enkel de tijden van een reeks, voor bisect.
+    def __init__(self, reeks):
+        self.reeks = reeks
+    
+    def __len__(self):
+        return len(self.reeks)
+    
+    def __getitem__(self, i):
+        return struct.unpack_from("<I", self.reeks.kaart, \
+        KOP.size + i * RECORD.size)[0]
+
+def per(metingen, stap):
+    ## Houdt de laatste meting van elk blok van `stap` seconden over.
+    vorige = None
+    for meting in metingen:
+        if vorige is not None and meting.tijd // stap != vorige.tijd // stap:
+            yield vorige
+        vorige = meting
+    if vorige is not None:
+        yield vorige
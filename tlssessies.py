@@ -0,0 +1,209 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import threading                        ## Callbacks komen uit meerdere threads
+import base64                           ## Sessies in JSON
+import ctypes                           ## Rechtstreeks naar libssl
+import json                             ## Bestandsformaat van de cache
+import time                             ## Vervaldatum
+import ssl                              ## Basislib voor TLS
+import sys                              ## Basislib
+
+import cachedir                         ## Map voor de cache
+
+## Elke oproep van kotnetcli deed een volledige TLS-handdruk met netlogin.
+## OpenSSL kan een vorige sessie hervatten (session ID of ticket), maar de
+## ssl-module van Python 2 kan een sessie niet uitlezen of instellen. We
+## hangen daarom via ctypes twee callbacks aan de SSL_CTX van één gedeelde
+## SSLContext:
+##
+##  - bij elke nieuwe sessie (ook TLS 1.3-tickets) bewaren we die per
+##    servernaam (SNI) in de cache, met een vervaldatum;
+##  - bij het begin van een handdruk zetten we de bewaarde sessie voor die
+##    servernaam klaar, zodat OpenSSL ze in de ClientHello aanbiedt.
+##
+## Of de server de sessie aanvaardde, tellen we na elke handdruk. Een sessie
+## bevat het sleutelmateriaal van de verbinding; het bestand is daarom enkel
+## leesbaar voor de eigenaar (zie cachedir.py). Lukt de koppeling met libssl
+## niet (statisch gelinkt _ssl, debugbuild, geen libssl, een SSL_CTX die
+## niet overeenkomt met de context, ...), dan valt alles terug op gewone
+## volledige handdrukken.
+
+SESSIES = "tlssessies.json"
+MAXLEEFTIJD = 3600                      ## Bovengrens op de levensduur die
+                                        ## de server opgeeft
+
+SSL_CTRL_OPTIONS = 32                   ## SSL_CTX_get_options in 1.0.x
+SSL_CTRL_SET_SESS_CACHE_MODE = 44
+SSL_SESS_CACHE_CLIENT = 0x0001
+SSL_SESS_CACHE_NO_INTERNAL_STORE = 0x0200
+SSL_CB_HANDSHAKE_START = 0x10
+SSL_CB_HANDSHAKE_DONE = 0x20
+TLSEXT_NAMETYPE_host_name = 0
+
+slot = threading.Lock()
+sessies = None                          ## servernaam -> {"sessie", "verloopt"}
+tellers = {"volledig": 0, "hervat": 0}
+gedeeld = []                            ## [SSLContext] zodra aangemaakt
+callbacks = []                          ## ctypes houdt ze anders niet vast
+
+def laadLibssl():
+    ## Dezelfde libssl als die waarmee _ssl gelinkt is: dlsym zoekt ook in de
+    ## afhankelijkheden van _ssl.so.
+    import _ssl
+    if hasattr(sys, "gettotalrefcount") or \
+    not getattr(_ssl, "__file__", "").endswith((".so", ".pyd")):
+        return None
+    lib = ctypes.CDLL(_ssl.__file__)
+    p, i, l = ctypes.c_void_p, ctypes.c_int, ctypes.c_long
+    for naam, restype, argtypes in [
+        ("SSL_CTX_ctrl", l, [p, i, l, p]),
+        ("SSL_CTX_sess_set_new_cb", None, [p, p]),
+        ("SSL_CTX_set_info_callback", None, [p, p]),
+        ("SSL_get_servername", ctypes.c_char_p, [p, i]),
+        ("SSL_session_reused", i, [p]),
+        ("SSL_set_session", i, [p, p]),
+        ("i2d_SSL_SESSION", i, [p, ctypes.POINTER(ctypes.c_char_p)]),
+        ("d2i_SSL_SESSION", p, [p, ctypes.POINTER(ctypes.c_char_p), l]),
+        ("SSL_SESSION_get_timeout", l, [p]),
+        ("SSL_SESSION_free", None, [p])]:
+        functie = getattr(lib, naam)
+        functie.restype = restype
+        functie.argtypes = argtypes
+    if hasattr(lib, "SSL_CTX_get_options"):
+        ## Een functie vanaf OpenSSL 1.1, daarvoor een macro op SSL_CTX_ctrl.
+        lib.SSL_CTX_get_options.restype = ctypes.c_ulong
+        lib.SSL_CTX_get_options.argtypes = [p]
+    return lib
+
+def sslctx(context, lib):
+    ## Een _ssl._SSLContext begint met PyObject_HEAD gevolgd door SSL_CTX *.
+    ## Die indeling is nergens vastgelegd. We vragen daarom de opties op van
+    ## de SSL_CTX achter die pointer en vergelijken ze met context.options;
+    ## verschillen ze, dan geven we None en blijft de context ongemoeid.
+    ctx = ctypes.c_void_p.from_address(id(context) + \
+    2 * ctypes.sizeof(ctypes.c_void_p)).value
+    if not ctx:
+        return None
+    if hasattr(lib, "SSL_CTX_get_options"):
+        opties = lib.SSL_CTX_get_options(ctx)
+    else:
+        opties = lib.SSL_CTX_ctrl(ctx, SSL_CTRL_OPTIONS, 0, None)
+    masker = (1 << 8 * ctypes.sizeof(ctypes.c_ulong)) - 1
+    if opties & masker != context.options & masker:
+        return None
+    return ctx
+
+def inlezen():
+    global sessies
+    if sessies is None:
+        try:
+            with open(cachedir.cachebestand(SESSIES)) as bestand:
+                sessies = json.load(bestand)
+        except (IOError, OSError, ValueError):
+            sessies = {}
+    return sessies
+
+def bewaren():
+    try:
+        cachedir.schrijfbestand(SESSIES, json.dumps(sessies))
+    except (IOError, OSError):
+        ## Zonder cache werkt alles nog, alleen met volledige handdrukken.
+        pass
+
+def statistieken():
+    with slot:
+        return dict(tellers)
+
+def koppel(context, lib):
+    ## Geeft False als de SSL_CTX niet gevonden werd; dan geen hervatting.
+    ctx = sslctx(context, lib)
+    if ctx is None:
+        return False
+    
+    def nieuweSessie(sslp, sessie):
+        naam = lib.SSL_get_servername(sslp, TLSEXT_NAMETYPE_host_name)
+        lengte = lib.i2d_SSL_SESSION(sessie, None)
+        if not naam or lengte <= 0:
+            return 0
+        buffer = ctypes.create_string_buffer(lengte)
+        pointer = ctypes.cast(buffer, ctypes.c_char_p)
+        lib.i2d_SSL_SESSION(sessie, ctypes.byref(pointer))
+        levensduur = min(lib.SSL_SESSION_get_timeout(sessie), MAXLEEFTIJD)
+        with slot:
+            inlezen()[naam] = {"sessie": base64.b64encode(buffer.raw), \
+            "verloopt": time.time() + levensduur}
+            bewaren()
+        ## 0: OpenSSL houdt zelf de referentie naar de sessie.
+        return 0
+
+    def info(sslp, waar, ret):
+        if waar & SSL_CB_HANDSHAKE_START:
+            naam = lib.SSL_get_servername(sslp, TLSEXT_NAMETYPE_host_name)
+            with slot:
+                bewaard = inlezen().get(naam) if naam else None
+                if bewaard is not None and bewaard["verloopt"] < time.time():
+                    del sessies[naam]
+                    bewaard = None
+            if bewaard is None:
+                return
+            der = base64.b64decode(bewaard["sessie"])
+            pointer = ctypes.c_char_p(der)
+            sessie = lib.d2i_SSL_SESSION(None, ctypes.byref(pointer), len(der))
+            if sessie:
+                lib.SSL_set_session(sslp, sessie)
+                lib.SSL_SESSION_free(sessie)
+        elif waar & SSL_CB_HANDSHAKE_DONE:
+            with slot:
+                if lib.SSL_session_reused(sslp):
+                    tellers["hervat"] += 1
+                else:
+                    tellers["volledig"] += 1
+
+    nieuw = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, \
+    ctypes.c_void_p)(nieuweSessie)
+    infocb = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_int, \
+    ctypes.c_int)(info)
+    callbacks.extend([nieuw, infocb])
+
+    lib.SSL_CTX_ctrl(ctx, SSL_CTRL_SET_SESS_CACHE_MODE, \
+    SSL_SESS_CACHE_CLIENT | SSL_SESS_CACHE_NO_INTERNAL_STORE, None)
+    lib.SSL_CTX_sess_set_new_cb(ctx, ctypes.cast(nieuw, ctypes.c_void_p))
+    lib.SSL_CTX_set_info_callback(ctx, ctypes.cast(infocb, ctypes.c_void_p))
+    return True
+
+def context():
+    ## De gedeelde SSLContext voor alle https-verbindingen van het proces,
+    ## met dezelfde standaardinstellingen (certificaatcontrole) als httplib.
+    with slot:
+        if not gedeeld:
+            nieuw = ssl._create_default_https_context()
+            try:
+                lib = laadLibssl()
+                if lib is not None:
+                    koppel(nieuw, lib)
+            except (OSError, AttributeError, ImportError):
+                pass
+            gedeeld.append(nieuw)
+        return gedeeld[0]
@@ -0,0 +1,154 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+## Dependencies:    python-mechanize, python-keyring, curses
+## Author:          Gijs Timmers: https://github.com/GijsTimmers
+## Contributors:    Gijs Timmers: https://github.com/GijsTimmers
+##                  Jo Van Bulck: https://github.com/jovanbulck
+##
+## Licence:         GPLv3
+##
+## kotnetcli is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## kotnetcli is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with kotnetcli.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import collections                      ## Voor namedtuple
+import json                             ## Bewaarde sommen
+import os                               ## Basislib
+
+import cachedir                         ## Map voor de sommen
+import tijdreeks                        ## De gemeten tegoeden
+
+## Schat uit de reeks van tegoeden (tijdreeks.py) hoe snel download en
+## upload opgebruikt worden: per venster (bv. de laatste 6, 24 en 168 uur)
+## een kleinste-kwadratenrechte door de resterende MB in functie van de
+## tijd. De helling is het verbruik; daaruit volgt wanneer elk tegoed op is.
+##
+## Voor een rechte volstaan de sommen n, Σx, Σx², Σy en Σxy. Per venster
+## houden we die bij samen met de eerste en laatste index in de reeks: een
+## nieuwe meting tellen we erbij, een meting die uit het venster valt,
+## trekken we eraf. De sommen worden bewaard, zodat een volgende oproep
+## enkel de metingen sinds de vorige oproep leest; zonder bewaarde sommen
+## zoeken we het begin van het venster op met bisect. x is in seconden sinds
+## een vast referentietijdstip en y in MB, allemaal gehele getallen: optellen
+## en aftrekken blijft exact, hoe lang de reeks ook wordt.
+
+SOMMEN = "voorspelling.json"
+VENSTERS = [6, 24, 168]                 ## uren
+HORIZON = 24                            ## uren, voor het budget
+
+Schatting = collections.namedtuple("Schatting", ["venster", "metingen", \
+"download", "upload"])                  ## verbruik in MB per uur (of None)
+
+class Venster():
+    def __init__(self, lengte, toestand=None):
+        self.lengte = lengte            ## seconden
+        toestand = toestand or {}
+        self.begin = toestand.get("begin", 0)
+        self.einde = toestand.get("einde", 0)
+        self.sommen = toestand.get("sommen", [0] * 7)
+    
+    def toestand(self):
+        return {"begin": self.begin, "einde": self.einde, \
+        "sommen": self.sommen}
+    
+    def tel(self, meting, referentie, teken):
+        x = meting.tijd - referentie
+        n, sx, sxx, sd, sxd, su, sxu = self.sommen
+        self.sommen = [n + teken, sx + teken * x, sxx + teken * x * x, \
+        sd + teken * meting.download, sxd + teken * x * meting.download, \
+        su + teken * meting.upload, sxu + teken * x * meting.upload]
+    
+    def bijwerken(self, reeks, referentie):
+        if len(reeks) == 0:
+            return
+        grens = reeks[-1].tijd - self.lengte
+        if self.einde == 0 or reeks[self.einde - 1].tijd < grens:
+            ## Niets van het bewaarde venster is nog bruikbaar: begin bij de
+            ## eerste meting binnen het venster in plaats van alles sinds de
+            ## vorige keer erbij te tellen en weer af te trekken.
+            self.begin = self.einde = reeks.index(grens)
+            self.sommen = [0] * 7
+        while self.einde < len(reeks):
+            self.tel(reeks[self.einde], referentie, 1)
+            self.einde += 1
+        while self.begin < self.einde and reeks[self.begin].tijd < grens:
+            self.tel(reeks[self.begin], referentie, -1)
+            self.begin += 1
+    
+    def hellingen(self):
+        ## Verbruik in MB per uur voor download en upload: minus de helling
+        ## van de rechte. None als er te weinig verschillende tijdstippen
+        ## zijn.
+        n, sx, sxx, sd, sxd, su, sxu = self.sommen
+        noemer = n * sxx - sx * sx
+        if n < 2 or noemer == 0:
+            return None, None
+        return (-3600.0 * (n * sxd - sx * sd) / noemer, \
+        -3600.0 * (n * sxu - sx * su) / noemer)
+
+def laadSommen():
+    try:
+        with open(cachedir.cachebestand(SOMMEN)) as bestand:
+            return json.load(bestand)
+    except (IOError, OSError, ValueError):
+        return {}
+
+def bewaarSommen(sommen):
+    try:
+        cachedir.schrijfbestand(SOMMEN, json.dumps(sommen))
+    except (IOError, OSError):
+        pass
+
+def schat(reeks, vensters=VENSTERS):
+    ## Geeft een Schatting per venster (in uren) terug.
+    if len(reeks) == 0:
+        return []
+    
+    bewaard = laadSommen()
+    eerste = reeks[0].tijd
+    if bewaard.get("referentie") != eerste or \
+    bewaard.get("lengte", 0) > len(reeks):
+        ## Een andere of ingekorte reeks: opnieuw beginnen.
+        bewaard = {}
+    
+    schattingen = []
+    toestanden = {}
+    for uren in vensters:
+        sleutel = str(uren)
+        venster = Venster(uren * 3600, bewaard.get("vensters", \
+        {}).get(sleutel))
+        venster.bijwerken(reeks, eerste)
+        toestanden[sleutel] = venster.toestand()
+        download, upload = venster.hellingen()
+        schattingen.append(Schatting(uren, venster.sommen[0], download, \
+        upload))
+    
+    ## Vensters die deze keer niet gevraagd werden, blijven bewaard.
+    vensters = dict(bewaard.get("vensters", {}))
+    vensters.update(toestanden)
+    bewaarSommen({"referentie": eerste, "lengte": len(reeks), \
+    "vensters": vensters})
+    return schattingen
+
+def opTijdstip(laatste, over, verbruik):
+    ## Tijdstip waarop `over` MB op is bij `verbruik` MB per uur, of None
+    ## als het tegoed bij dat verbruik niet opraakt.
+    if verbruik is None or verbruik <= 0:
+        return None
+    return laatste.tijd + over / verbruik * 3600
+
+def budget(over, horizon=HORIZON):
+    ## MB per uur die nog gebruikt kunnen worden om `horizon` uur toe te
+    ## komen.
+    return float(over) / horizon
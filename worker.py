@@ -25,104 +25,272 @@ import re                               ## Basislib voor reguliere expressies
 import time                             ## Voor timeout om venster te sluiten
 import urllib                           ## Diverse URL-manipulaties
 import urlparse                         ## Diverse URL-manipulaties
-import mechanize                        ## Emuleert een browser
-import socket                           ## Voor ophalen IP
+import json                             ## Voor het formulierschema
 import sys                              ## Basislib
 import os                               ## Basislib
 
-from bs4 import BeautifulSoup, Comment  ## Om webinhoud proper te parsen.
+import cachedir                         ## Map voor het formulierschema
+import errors                           ## Fouten van de stappen
+import extractor                        ## Leest rc-code en tegoeden
+import localip                          ## Voor ophalen IP
+
+## mechanize is traag om te importeren en wordt door de simulatieworkers
+## niet gebruikt. Het wordt daarom pas geladen door de workers die echt met
+## netlogin praten. Hetzelfde geldt voor session (httplib, ssl, de TLS-
+## sessies), cassette (gzip, tempfile), httptrace en simulatie (random,
+## pinger): die laden de functies die ze gebruiken, zoals in kotnetcli.py.
+
+def laad_mechanize():
+    global mechanize
+    import mechanize                    ## Emuleert een browser
+
+def nieuweBrowser(bron=None):
+    ## Alle workers (en de portaaldetectie in pinger.py) gebruiken dezelfde
+    ## browserinstellingen. robots.txt ophalen kost een extra verzoek per
+    ## host en zegt niets over een loginformulier; dat slaan we dus over.
+    ## Alle browsers delen de verbindingspool van session.py; met bron
+    ## vertrekken hun verbindingen van dat lokale IP-adres.
+    import session                      ## Gedeelde verbindingspool
+    laad_mechanize()
+    browser = mechanize.Browser()
+    browser.addheaders = [('User-agent', 'Firefox')]
+    browser.set_handle_robots(False)
+    for handler in session.handlers(bron):
+        browser.add_handler(handler)
+    return browser
+
+## Met KOTNETCLI_NETLOGIN (bv. http://127.0.0.1:8080) praten de workers
+## met een ander portaal, zoals benchmarks/nepportaal.py.
+NETLOGIN = os.environ.get("KOTNETCLI_NETLOGIN", \
+"https://netlogin.kuleuven.be").rstrip("/")
+LOGUIT = NETLOGIN + "/cgi-bin/wayf2.pl"
+
+def loguitgegevens(gebruikersnaam, ip):
+    ## De velden van het loguitformulier van netlogin, in volgorde.
+    return [("inout", "logout"),
+            ("ip", ip),
+            ("network", "KotNet"),
+            ("uid", "kuleuven/%s" % utf8(gebruikersnaam)),
+            ("lang", "ned")]
+
+## Na een geslaagde login onthouden we waar het loginformulier naartoe
+## gepost wordt en hoe de velden heten (het wachtwoordveld krijgt een
+## willekeurige naam). Volgende logins posten dan meteen naar dat doel,
+## zonder eerst netlogin te openen en KU Leuven te kiezen. Gebruikersnaam en
+## wachtwoord zelf worden nooit in het schema bewaard.
+FORMULIERSCHEMA = "formulierschema.json"
+
+def laadFormulierschema():
+    try:
+        with open(cachedir.cachebestand(FORMULIERSCHEMA)) as bestand:
+            return json.load(bestand)
+    except (IOError, OSError, ValueError):
+        return None
+
+def bewaarFormulierschema(schema):
+    try:
+        cachedir.schrijfbestand(FORMULIERSCHEMA, json.dumps(schema))
+    except (IOError, OSError):
+        ## Zonder schema werkt alles nog, alleen trager.
+        pass
+
+def vergeetFormulierschema():
+    try:
+        os.remove(cachedir.cachebestand(FORMULIERSCHEMA))
+    except OSError:
+        pass
+
+def utf8(tekst):
+    if isinstance(tekst, unicode):
+        return tekst.encode("utf-8")
+    return tekst
 
 class Kotnetlogin():
-    def __init__(self, co, gebruikersnaam, wachtwoord, afsluiten=True):
+    def __init__(self, co, gebruikersnaam, wachtwoord, afsluiten=True, \
+    browser=None, bron=None):
         
-        self.browser = mechanize.Browser()
-        self.browser.addheaders = [('User-agent', 'Firefox')]
+        ## Een browser die al op de netloginpagina staat (bv. na de
+        ## portaaldetectie in pinger.py) hoeft netlogin niet meer te openen.
+        self.netloginGeladen = browser is not None
+        if browser is None:
+            browser = nieuweBrowser(bron)
+        self.browser = browser
         
         self.gebruikersnaam = gebruikersnaam
         self.wachtwoord = wachtwoord
+        import cassette                 ## Gegevens uit --record weren
+        cassette.geheim(gebruikersnaam, wachtwoord)
         
         self.co = co
         self.afsluiten = afsluiten
+        self.formulierschema = None
+        self.gelezen = None             ## Tegoeden uit schemaOpsturen()
+        
+    def snelinloggen(self):
+        ## Post rechtstreeks naar het bewaarde formulierdoel. Geeft False
+        ## terug als er geen schema is of als de server het niet aanvaardt;
+        ## dan moet de gewone procedure (netlogin, kuleuven, ...) lopen.
+        schema = laadFormulierschema()
+        if schema is None:
+            return False
+        
+        ## Hierna staat de browser niet meer op de netloginpagina.
+        self.netloginGeladen = False
+        self.co.eventSnelloginStart()
+        try:
+            rccode = self.schemaOpsturen(schema)
+        except:
+            self.co.eventSnelloginFailure()
+            return False
+        
+        ## Een verkeerd wachtwoord (rc=202) kan ook betekenen dat het
+        ## wachtwoordveld intussen anders heet. Enkel 100 en 206 bewijzen
+        ## dat het schema nog klopt; anders vergeten we het en laat de
+        ## gewone procedure (één keer, met het veld van een verse pagina)
+        ## het definitieve antwoord geven. Zo blijft een verouderd schema
+        ## niet elke volgende login als verkeerd wachtwoord melden.
+        if rccode not in (100, 206):
+            vergeetFormulierschema()
+            self.co.eventSnelloginFailure()
+            return False
+        
+        self.co.eventSnelloginSuccess()
+        for start, succes in [
+            (self.co.eventNetloginStart, self.co.eventNetloginSuccess),
+            (self.co.eventKuleuvenStart, self.co.eventKuleuvenSuccess),
+            (self.co.eventInvoerenStart, self.co.eventInvoerenSuccess),
+            (self.co.eventOpsturenStart, self.co.eventOpsturenSuccess)]:
+            start()
+            succes()
+        self.formulierschema = schema
+        return True
+    
+    def schemaOpsturen(self, schema):
+        ## Vult gebruikersnaam en wachtwoord in het schema in, post naar het
+        ## doel en geeft de rc-code van het antwoord terug. Het gelezen
+        ## antwoord blijft bewaard voor tegoeden(), zodat de pagina maar één
+        ## keer door de extractor gaat.
+        velden = []
+        for naam, waarde in schema["velden"]:
+            if naam == schema["gebruikersnaamveld"]:
+                waarde = self.gebruikersnaam
+            elif naam == schema["wachtwoordveld"]:
+                waarde = self.wachtwoord
+            velden.append((utf8(naam), utf8(waarde)))
+        
+        self.gelezen = None
+        respons = self.browser.open(schema["doel"], \
+        urllib.urlencode(velden), timeout=1.8)
+        self.gelezen = extractor.lees(respons)
+        return self.gelezen.rccode
+    
+    def opnieuwOpsturen(self):
+        ## Stuurt het loginformulier van daarnet nog eens op, bv. nadat de
+        ## andere sessies uitgelogd zijn. Zonder schema doorlopen we
+        ## gewoon alle stappen opnieuw.
+        if self.formulierschema is None:
+            self.netloginGeladen = False
+            self.netlogin()
+            self.kuleuven()
+            self.gegevensinvoeren()
+            self.gegevensopsturen()
+            return
+        
+        self.co.eventOpsturenStart()
+        try:
+            self.schemaOpsturen(self.formulierschema)
+            self.co.eventOpsturenSuccess()
+        except:
+            self.co.eventOpsturenFailure()
+            raise errors.StapMislukt("opsturen")
         
     def netlogin(self):
         self.co.eventNetloginStart()
         try:
-            respons = self.browser.open("https://netlogin.kuleuven.be", \
-            timeout=1.8)
-            html = respons.read()
+            if not self.netloginGeladen:
+                respons = self.browser.open(NETLOGIN, timeout=1.8)
+                html = respons.read()
             self.co.eventNetloginSuccess()
         except:
             self.co.eventNetloginFailure()
-            sys.exit(1)
+            raise errors.StapMislukt("netlogin")
         
     def kuleuven(self):
         self.co.eventKuleuvenStart()
+        import httptrace                ## Parse-stappen voor --trace
         try:
-            self.browser.select_form(nr=1)
+            with httptrace.stap("formulier"):
+                self.browser.select_form(nr=1)
             self.browser.submit()
             self.co.eventKuleuvenSuccess()
         except:
             self.co.eventKuleuvenFailure()
-            sys.exit(1)
+            raise errors.StapMislukt("kuleuven")
 
     def gegevensinvoeren(self):
         self.co.eventInvoerenStart()
+        import httptrace                ## Parse-stappen voor --trace
         try:
-            self.browser.select_form(nr=1)
+            with httptrace.stap("formulier"):
+                self.browser.select_form(nr=1)
             self.browser.form["uid"] = self.gebruikersnaam
             wachtwoordvaknaam = \
             self.browser.form.find_control(type="password").name
             
             self.browser.form[wachtwoordvaknaam] = self.wachtwoord
+            self.formulierschema = self.formulierschemaOpmaken( \
+            "uid", wachtwoordvaknaam)
             self.co.eventInvoerenSuccess()
         except:
             self.co.eventInvoerenFailure()
-            sys.exit(1)
-        
+            raise errors.StapMislukt("invoeren")
+    
+    def formulierschemaOpmaken(self, gebruikersnaamveld, wachtwoordveld):
+        ## click_request_data() geeft exact wat submit() zou versturen:
+        ## het doel en de ge-urlencodeerde velden, inclusief de verborgen.
+        if self.browser.form.method.upper() != "POST":
+            return None
+        doel, data, headers = self.browser.form.click_request_data()
+        velden = []
+        for naam, waarde in urlparse.parse_qsl(data, keep_blank_values=True):
+            if naam in (gebruikersnaamveld, wachtwoordveld):
+                waarde = ""
+            velden.append([naam, waarde])
+        return {"doel": doel,
+                "velden": velden,
+                "gebruikersnaamveld": gebruikersnaamveld,
+                "wachtwoordveld": wachtwoordveld}
         
     def gegevensopsturen(self):
         self.co.eventOpsturenStart()
+        self.gelezen = None
         try:
             self.browser.submit()
             self.co.eventOpsturenSuccess()
         except:
             self.co.eventOpsturenFailure()
-            sys.exit(1)
+            raise errors.StapMislukt("opsturen")
         
         
     def tegoeden(self):
-        html = self.browser.response().read()
-        
-        soup = BeautifulSoup(html, "html.parser")
-        
         ## Zoek naar de rc-code in de comments van het html-bestand. Deze
-        ## bevat de status.
-        comments = soup.findAll(text=lambda text:isinstance(text, Comment))
-        p = re.compile("weblogin: rc=\d+")
-        for c in comments:
-            m = p.search(c)
-            #m = p.findall(c)
-            #print m
-            if m:
-                rccode = int(m.group().strip("weblogin: rc="))
-                ## m = p.search(c): zoekt naar de RE p in c. Indien die is
-                ## gevonden, is m een object; m.group() geeft vervolgens 
-                ## weer waar de RE matcht. Dit doet het maar één keer; als
-                ## je strings op meerdere matches wilt controleren, moet je
-                ## p.findall(c) gebruiken, zoals hieronder.
+        ## bevat de status. De extractor leest enkel tot rc-code en
+        ## tegoeden gekend zijn (zie extractor.py). Na snelinloggen() of
+        ## opnieuwOpsturen() is het antwoord al gelezen.
+        self.resultaat = self.gelezen
+        self.gelezen = None
+        if self.resultaat is None:
+            self.resultaat = extractor.lees(self.browser.response())
+        rccode = self.rccode = self.resultaat.rccode
+        self.co.eventRccodeBekend(rccode)
         
         if rccode == 100:            
             ## succesvolle login
-            ## downloadpercentage parsen
-            p = re.compile("\d+")
-            m = p.findall(comments[6])
-            self.downloadpercentage = int(round(float(m[0]) / float(m[1]) * 100, 0))
-            
-            ## uploadpercentage parsen
-            p = re.compile("\d+")
-            m = p.findall(comments[7])
-            self.uploadpercentage = int(round(float(m[0]) / float(m[1]) * 100, 0))
+            if self.formulierschema is not None:
+                bewaarFormulierschema(self.formulierschema)
             
+            self.downloadpercentage = self.resultaat.downloadpercentage
+            self.uploadpercentage = self.resultaat.uploadpercentage
             
             self.co.eventTegoedenBekend(self.downloadpercentage, \
             self.uploadpercentage)
@@ -132,108 +300,115 @@ class Kotnetlogin():
             
         elif rccode == 202:
             ## verkeerd wachtwoord
-            print "Uw logingegevens kloppen niet. Gebruik kotnetcli " + \
-            "--forget om deze te resetten."
             self.co.beeindig_sessie()
             return(True)
         
         elif rccode == 206:
             ## al ingelogd op ander IP
-            print "U bent al ingelogd op een ander IP-adres. Gebruik " + \
-            "kotnetcli --force-login om u toch in te loggen." 
             self.co.beeindig_sessie()
             return(False)
         
         else:
+            ## rc-code onbekend; de commandolijn toont de pagina
             self.co.beeindig_sessie()
-            print html
-            print "\nrc-code onbekend. Stuur bovenstaande informatie naar"
-            print "gijs.timmers@student.kuleuven.be om ondersteuning te krijgen."
-            
             return(True)
             
         #print self.afsluiten
         if self.afsluiten:
             self.co.beeindig_sessie()
         
-    def uitteloggenipophalen(self):
-        html = self.browser.response().read()
-        soup = BeautifulSoup(html)
-        
-        forms = soup.findAll("form")
-        form = forms[1]
-        uitteloggenip = form.contents[3]["value"]
-        
-        return uitteloggenip
+    def uitteloggenipsophalen(self):
+        ## Op de rc=206-pagina staat voor elke andere sessie een
+        ## loguitformulier met een verborgen veld "ip".
+        ips = []
+        for formulier in self.browser.forms():
+            try:
+                ip = formulier.find_control("ip").value
+            except mechanize.ControlNotFoundError:
+                continue
+            if ip and ip not in ips:
+                ips.append(ip)
+        return ips
+
+def loguitParallel(gebruikersnaam, wachtwoord, ips, bron=None):
+    ## Logt alle gegeven IP-adressen tegelijk uit, elk in een eigen thread.
+    ## Geeft per IP de rc-code terug (None als het uitloggen mislukte).
+    import threading
+    import communicator
+    
+    resultaten = {}
+    def loguit(ip):
+        kl = Kotnetloguit(communicator.QuietCommunicator(), gebruikersnaam, \
+        wachtwoord, uitteloggenip=ip, afsluiten=False, bron=bron)
+        try:
+            kl.netlogin()
+            kl.kuleuven()
+            kl.gegevensinvoeren()
+            kl.gegevensopsturen()
+            kl.tegoeden()
+            resultaten[ip] = kl.rccode
+        except errors.StapMislukt:
+            resultaten[ip] = None
+    
+    threads = [threading.Thread(target=loguit, args=(ip,)) for ip in ips]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultaten
 
 class Kotnetloguit():
-    def __init__(self, co, gebruikersnaam, wachtwoord, uitteloggenip=None, afsluiten=True):
+    def __init__(self, co, gebruikersnaam, wachtwoord, uitteloggenip=None, afsluiten=True, \
+    interface=None, bron=None):
         
-        self.browser = mechanize.Browser()
-        self.browser.addheaders = [('User-agent', 'Firefox')]
+        self.browser = nieuweBrowser(bron)
         
         self.gebruikersnaam = gebruikersnaam
         self.wachtwoord = wachtwoord
+        import cassette                 ## Gegevens uit --record weren
+        cassette.geheim(gebruikersnaam, wachtwoord)
         
         self.co = co
         self.uitteloggenip = uitteloggenip
         self.afsluiten = afsluiten
         
         if self.uitteloggenip == None:
-            ## Lokale IP ophalen: lelijk, maar werkt.
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("gmail.com",80))
-            self.uitteloggenip = s.getsockname()[0]
-            s.close()
-        
-        ## Formulier aanmaken. Het opsturen van dit formulier geeft toegang
-        ## tot de noodzakelijke loguitpagina. 
-        bestand = open("formulier.html", "w")
-        bestand.write("<html><body>\n")
-        bestand.write('<FORM METHOD=POST ACTION=' \
-        '"https://netlogin.kuleuven.be/cgi-bin/wayf2.pl">\n')
-        bestand.write('<INPUT type=hidden name="inout" value="logout">\n')
-        bestand.write('<INPUT type=hidden name="ip" value="%s">\n' \
-        % self.uitteloggenip)
-        bestand.write('<INPUT type=hidden name="network" value="KotNet">\n')
-        bestand.write('<INPUT type=hidden name="uid" value="kuleuven/%s">\n' % \
-        self.gebruikersnaam)
-        bestand.write('<INPUT type=hidden name="lang" value="ned">\n')
-        #bestand.write('<INPUT type=submit value="logout">\n')
-        bestand.write('<INPUT type=submit value="logout kuleuven/%s@%s">\n' % (self.gebruikersnaam, self.uitteloggenip))
-        bestand.write('</FORM>\n')
-        bestand.write('</body></html>\n')
-        bestand.close()
-        
-        self.lokatie_formulier = urlparse.urljoin("file:", \
-        urllib.pathname2url(os.path.join(os.getcwd(), "formulier.html")))
+            ## Lokale IP ophalen: het adres op de route naar netlogin, of
+            ## dat van de opgegeven interface.
+            self.uitteloggenip = localip.lokaalip(interface)
+        
+        ## Het opsturen van dit formulier geeft toegang tot de noodzakelijke
+        ## loguitpagina. We posten de velden rechtstreeks vanuit het geheugen
+        ## in plaats van eerst een formulier.html in de cwd te schrijven.
+        self.loguitgegevens = loguitgegevens(self.gebruikersnaam, \
+        self.uitteloggenip)
     
     def netlogin(self):
         self.co.eventNetloginStart()
         try:
-            self.browser.open(self.lokatie_formulier, timeout=1.8)                        
-            self.browser.select_form(nr=0)
-            self.browser.submit()
-            os.remove(os.path.join(os.getcwd(), "formulier.html"))
+            self.browser.open(LOGUIT, urllib.urlencode(self.loguitgegevens), \
+            timeout=1.8)
             self.co.eventNetloginSuccess()
         except:
             self.co.eventNetloginFailure()
-            sys.exit(1)
+            raise errors.StapMislukt("netlogin")
     
     def kuleuven(self):
         pass
     
     def gegevensinvoeren(self):
         self.co.eventInvoerenStart()
+        import httptrace                ## Parse-stappen voor --trace
         try:
-            self.browser.select_form(nr=1)
+            with httptrace.stap("formulier"):
+                self.browser.select_form(nr=1)
             wachtwoordvaknaam = \
             self.browser.form.find_control(type="password").name
             self.browser.form[wachtwoordvaknaam] = self.wachtwoord
             self.co.eventInvoerenSuccess()
         except:
             self.co.eventInvoerenFailure()
-            sys.exit(1)
+            raise errors.StapMislukt("invoeren")
     
     def gegevensopsturen(self):
         self.co.eventOpsturenStart()
@@ -242,26 +417,19 @@ class Kotnetloguit():
             self.co.eventOpsturenSuccess()
         except:
             self.co.eventOpsturenFailure()
-            sys.exit(1)
+            raise errors.StapMislukt("opsturen")
     
     def tegoeden(self):
-        html = self.browser.response().read()
-        #print html
-        soup = BeautifulSoup(html)
-        
         ## Zoek naar de rc-code in de comments van het html-bestand. Deze
         ## bevat de status.
-        comments = soup.findAll(text=lambda text:isinstance(text, Comment))
-        p = re.compile("weblogout: rc=\d+")
-        
-        rccode = 100 
-        ## if not error codes appear, assume that everything went OK.
-        for c in comments:
-            m = p.search(c)
-            #m = p.findall(c)
-            #print m
-            if m:
-                rccode = int(m.group().strip("weblogout: rc="))
+        self.resultaat = extractor.lees(self.browser.response(), \
+        prefix="weblogout", tegoeden=False)
+        
+        rccode = self.rccode = self.resultaat.rccode
+        if rccode is None:
+            ## if not error codes appear, assume that everything went OK.
+            rccode = self.rccode = 100
+        self.co.eventRccodeBekend(rccode)
             
         if rccode == 100:
             ## succesvolle logout
@@ -269,136 +437,160 @@ class Kotnetloguit():
             
         elif rccode == 207:
             ## al uitgelogd
-            print "U had uzelf reeds succesvol uitgelogd."
-        else:
-            print html
+            pass
         
         #print self.afsluiten
         if self.afsluiten:
             self.co.beeindig_sessie()
         
-class Dummylogin():
-    def __init__(self, co, gebruikersnaam, wachtwoord):
-        
-        self.browser = mechanize.Browser()
-        self.browser.addheaders = [('User-agent', 'Firefox')]
+def simulatiestap(scenario, naam, start, succes, mislukt):
+    start()
+    try:
+        scenario.stap(naam)
+        succes()
+    except:
+        mislukt()
+        raise errors.StapMislukt(naam)
+
+class Simulatielogin():
+    ## Gedraagt zich als Kotnetlogin (dezelfde stappen, events, rccode en
+    ## resultaat), maar zonder netwerk: duur, fouten, rc-code en tegoeden
+    ## komen uit een simulatie.Scenario. Meerdere logins die hetzelfde
+    ## scenario delen, delen ook het traject van de tegoeden en het
+    ## "bewaarde" formulierschema van snelinloggen().
+    def __init__(self, co, gebruikersnaam, wachtwoord, afsluiten=True, \
+    browser=None, bron=None, scenario=None):
         
         self.gebruikersnaam = gebruikersnaam
         self.wachtwoord = wachtwoord
         
         self.co = co
+        self.afsluiten = afsluiten
+        import simulatie                ## Standaardscenario
+        self.scenario = scenario or simulatie.Scenario()
+        self.netloginGeladen = browser is not None
+        self.getrokken = None           ## rc-code van snelinloggen()
+        self.rccode = None
+        self.resultaat = None
+    
+    def stap(self, naam, start, succes, mislukt):
+        simulatiestap(self.scenario, naam, start, succes, mislukt)
+    
+    def snelinloggen(self):
+        ## Zoals Kotnetlogin.snelinloggen(), als het scenario "snel" heeft
+        ## en er al een login geslaagd is.
+        if not self.scenario.snel or not self.scenario.schema:
+            return False
         
-    def netlogin(self):
-        self.co.eventNetloginStart()
+        self.co.eventSnelloginStart()
         try:
-            time.sleep(0.1)
-            self.co.eventNetloginSuccess()
+            self.scenario.stap("snel")
+            rccode = self.scenario.rccode()
         except:
-            self.co.eventNetloginFailure()
-            sys.exit(1)
+            self.co.eventSnelloginFailure()
+            return False
+        if rccode not in (100, 206):
+            self.scenario.schema = False
+            self.co.eventSnelloginFailure()
+            return False
+        
+        self.co.eventSnelloginSuccess()
+        for start, succes in [
+            (self.co.eventNetloginStart, self.co.eventNetloginSuccess),
+            (self.co.eventKuleuvenStart, self.co.eventKuleuvenSuccess),
+            (self.co.eventInvoerenStart, self.co.eventInvoerenSuccess),
+            (self.co.eventOpsturenStart, self.co.eventOpsturenSuccess)]:
+            start()
+            succes()
+        self.getrokken = rccode
+        return True
+    
+    def netlogin(self):
+        self.stap("netlogin", self.co.eventNetloginStart, \
+        self.co.eventNetloginSuccess, self.co.eventNetloginFailure)
         
     def kuleuven(self):
-        self.co.eventKuleuvenStart()
-        try:
-            time.sleep(0.1)
-            self.co.eventKuleuvenSuccess()
-        except:
-            self.co.eventKuleuvenFailure()
-            sys.exit(1)
+        self.stap("kuleuven", self.co.eventKuleuvenStart, \
+        self.co.eventKuleuvenSuccess, self.co.eventKuleuvenFailure)
 
     def gegevensinvoeren(self):
-        self.co.eventInvoerenStart()
-        try:
-            time.sleep(0.1)
-            self.co.eventInvoerenSuccess()
-        except:
-            self.co.eventInvoerenFailure()
-            sys.exit(1)
-        
+        self.stap("invoeren", self.co.eventInvoerenStart, \
+        self.co.eventInvoerenSuccess, self.co.eventInvoerenFailure)
         
     def gegevensopsturen(self):
-        self.co.eventOpsturenStart()
-        try:
-            time.sleep(0.1)
-            self.co.eventOpsturenSuccess()
-        except:
-            self.co.eventOpsturenFailure()
-            sys.exit(1)
-        
+        self.stap("opsturen", self.co.eventOpsturenStart, \
+        self.co.eventOpsturenSuccess, self.co.eventOpsturenFailure)
         
     def tegoeden(self):
-        self.downloadpercentage = 80
-        self.uploadpercentage   = 100
+        rccode = self.getrokken
+        if rccode is None:
+            rccode = self.scenario.rccode()
+        self.resultaat = self.scenario.traject.nu(rccode)
+        self.rccode = rccode
+        self.co.eventRccodeBekend(rccode)
         
-        self.co.eventTegoedenBekend(self.downloadpercentage, \
-        self.uploadpercentage)
+        if rccode == 100:
+            self.scenario.schema = True
+            self.downloadpercentage = self.resultaat.downloadpercentage
+            self.uploadpercentage = self.resultaat.uploadpercentage
+            
+            self.co.eventTegoedenBekend(self.downloadpercentage, \
+            self.uploadpercentage)
         
         self.co.beeindig_sessie()
+        return rccode != 206
 
-class Dummyloguit():
-    def __init__(self, co, gebruikersnaam, wachtwoord):
-        
-        self.browser = mechanize.Browser()
-        self.browser.addheaders = [('User-agent', 'Firefox')]
+class Simulatieloguit():
+    ## Gedraagt zich als Kotnetloguit, met de rc-code uit het scenario.
+    def __init__(self, co, gebruikersnaam, wachtwoord, uitteloggenip=None, \
+    interface=None, scenario=None):
         
         self.gebruikersnaam = gebruikersnaam
         self.wachtwoord = wachtwoord
         
         self.co = co
-        
-        self.lokaleip = "192.168.1.1"
-        
-        ## Formulier aanmaken. Het opsturen van dit formulier geeft toegang
-        ## tot de noodzakelijke loguitpagina. 
-        bestand = open("formulier.html", "w")
-        bestand.write("<html><body>\n")
-        bestand.write('<FORM METHOD=POST ACTION=' \
-        '"https://netlogin.kuleuven.be/cgi-bin/wayf2.pl">\n')
-        bestand.write('<INPUT type=hidden name="inout" value="logout">\n')
-        bestand.write('<INPUT type=hidden name="ip" value="%s">\n' \
-        % self.lokaleip)
-        bestand.write('<INPUT type=hidden name="network" value="KotNet">\n')
-        bestand.write('<INPUT type=hidden name="uid" value="kuleuven/%s">\n' % \
-        self.gebruikersnaam)
-        bestand.write('<INPUT type=hidden name="lang" value="ned">\n')
-        bestand.write('<INPUT type=submit value="logout">\n')
-        bestand.write('</FORM>\n')
-        bestand.write('</body></html>\n')
-        bestand.close()
-        
-        self.lokatie_formulier = urlparse.urljoin("file:", \
-        urllib.pathname2url(os.path.join(os.getcwd(), "formulier.html")))
+        import simulatie                ## Standaardscenario
+        self.scenario = scenario or simulatie.Scenario()
+        self.rccode = None
+        self.resultaat = None
+        
+        self.lokaleip = uitteloggenip or "192.168.1.1"
+        self.loguitgegevens = loguitgegevens(self.gebruikersnaam, \
+        self.lokaleip)
+    
+    def stap(self, naam, start, succes, mislukt):
+        simulatiestap(self.scenario, naam, start, succes, mislukt)
     
     def netlogin(self):
-        self.co.eventNetloginStart()
-        try:
-            time.sleep(0.1)
-            os.remove(os.path.join(os.getcwd(), "formulier.html"))
-            self.co.eventNetloginSuccess()
-        except:
-            self.co.eventNetloginFailure()
-            sys.exit(1)
+        self.stap("netlogin", self.co.eventNetloginStart, \
+        self.co.eventNetloginSuccess, self.co.eventNetloginFailure)
     
     def kuleuven(self):
         pass
     
     def gegevensinvoeren(self):
-        self.co.eventInvoerenStart()
-        try:
-            time.sleep(0.1)
-            self.co.eventInvoerenSuccess()
-        except:
-            self.co.eventInvoerenFailure()
-            sys.exit(1)
+        self.stap("invoeren", self.co.eventInvoerenStart, \
+        self.co.eventInvoerenSuccess, self.co.eventInvoerenFailure)
     
     def gegevensopsturen(self):
-        self.co.eventOpsturenStart()
-        try:
-            time.sleep(0.1)
-            self.co.eventOpsturenSuccess()
-        except:
-            self.co.eventOpsturenFailure()
-            sys.exit(1)
+        self.stap("opsturen", self.co.eventOpsturenStart, \
+        self.co.eventOpsturenSuccess, self.co.eventOpsturenFailure)
     
     def tegoeden(self):
+        self.rccode = self.scenario.loguitrccode()
+        self.co.eventRccodeBekend(self.rccode)
+        self.resultaat = extractor.Tegoeden(self.rccode, None, None, None, \
+        None, None, None)
         self.co.beeindig_sessie()
+
+class Dummylogin(Simulatielogin):
+    ## Het standaardscenario: 0.1 s per stap, altijd rc=100 met 80% en
+    ## 100%.
+    def __init__(self, co, gebruikersnaam, wachtwoord, scenario=None):
+        Simulatielogin.__init__(self, co, gebruikersnaam, wachtwoord, \
+        scenario=scenario)
+
+class Dummyloguit(Simulatieloguit):
+    def __init__(self, co, gebruikersnaam, wachtwoord, scenario=None):
+        Simulatieloguit.__init__(self, co, gebruikersnaam, wachtwoord, \
+        scenario=scenario)